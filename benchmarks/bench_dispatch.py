@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark du dispatch des features: séquentiel vs concurrent.
+
+Simule une charge mixte (keywords/commands rapides, rôles parfois lents, Ollama
+parfois très lent) et mesure, pour chaque feature, le temps entre la réception
+du message et la fin de son traitement (p50 / p99).
+
+    python benchmarks/bench_dispatch.py [nb_messages]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bot.features import registry  # noqa: E402
+
+
+class FakeFeature:
+    # Sans `interests`: feature historique, appelée pour chaque message
+    def __init__(self, name: str, latency, ordered: bool = False) -> None:
+        self.name = name
+        self.ordered = ordered
+        self._latency = latency
+        self.samples: list[float] = []
+
+    def setup(self, client) -> None:
+        pass
+
+    async def on_message(self, message) -> None:
+        await asyncio.sleep(self._latency())
+        self.samples.append(time.perf_counter() - message.received_at)
+
+
+def _build_features(seed: int) -> list[FakeFeature]:
+    rnd = random.Random(seed)
+    return [
+        FakeFeature("keyword_responses", lambda: 0.002),
+        FakeFeature("role_triggers", lambda: 0.300 if rnd.random() < 0.1 else 0.010, ordered=True),
+        FakeFeature("grant_commands", lambda: 0.001, ordered=True),
+        FakeFeature("ollama_qna", lambda: 1.500 if rnd.random() < 0.05 else 0.0),
+        FakeFeature("commands", lambda: 0.001),
+    ]
+
+
+def _pct(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[idx] * 1000
+
+
+async def _run(mode: str, n: int) -> list[FakeFeature]:
+    os.environ[registry.DISPATCH_MODE_ENV] = mode
+    os.environ[registry.DISPATCH_TIMEOUT_ENV] = "0"
+    registry._features.clear()
+    features = _build_features(seed=42)
+    for f in features:
+        registry.register(f)
+    registry.setup_all(None)  # type: ignore[arg-type]
+
+    # Message de serveur ordinaire, pour passer MessageContext.build comme en production
+    guild = SimpleNamespace(id=1, me=SimpleNamespace(id=2))
+    author = SimpleNamespace(id=3, bot=False)
+
+    async def one(i: int) -> None:
+        msg = SimpleNamespace(
+            id=i, author=author, guild=guild, content="salut", mentions=[], received_at=time.perf_counter()
+        )
+        await registry.dispatch_on_message(msg)  # type: ignore[arg-type]
+
+    # Messages arrivant en rafale (20 msg/s), traités comme le ferait discord.py (1 tâche / message)
+    tasks = []
+    for i in range(n):
+        tasks.append(asyncio.create_task(one(i)))
+        await asyncio.sleep(0.05)
+    await asyncio.gather(*tasks)
+    return features
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    results = {mode: asyncio.run(_run(mode, n)) for mode in ("sequential", "concurrent")}
+    print(f"{n} messages, latence de fin de traitement par feature (ms)")
+    print(f"{'feature':<20}{'seq p50':>10}{'seq p99':>10}{'conc p50':>10}{'conc p99':>10}")
+    for seq_f, conc_f in zip(results["sequential"], results["concurrent"]):
+        print(
+            f"{seq_f.name:<20}"
+            f"{_pct(seq_f.samples, 50):>10.1f}{_pct(seq_f.samples, 99):>10.1f}"
+            f"{_pct(conc_f.samples, 50):>10.1f}{_pct(conc_f.samples, 99):>10.1f}"
+        )
+    all_seq = [s for f in results["sequential"] for s in f.samples]
+    all_conc = [s for f in results["concurrent"] for s in f.samples]
+    print(f"{'toutes':<20}{_pct(all_seq, 50):>10.1f}{_pct(all_seq, 99):>10.1f}{_pct(all_conc, 50):>10.1f}{_pct(all_conc, 99):>10.1f}")
+    print(f"moyenne globale: seq={statistics.mean(all_seq) * 1000:.1f}ms conc={statistics.mean(all_conc) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
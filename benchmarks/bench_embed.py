@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: coût par hit de l'embed keyword_responses (construction vs cache).
+
+Mesure le temps et la mémoire allouée par hit pour l'embed « rules_summary » de
+keyword_responses.example.json (5 champs):
+  - avant: discord.Embed reconstruit + add_field à chaque hit,
+  - après: embed pré-construit au chargement et réutilisé.
+
+    python benchmarks/bench_embed.py
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bot.features.keyword_responses import KeywordEmbedConfig  # noqa: E402
+
+
+def _load_config() -> KeywordEmbedConfig:
+    with open(os.path.join(ROOT, "keyword_responses.example.json"), encoding="utf-8") as f:
+        item = json.load(f)["embeds"][1]
+    return KeywordEmbedConfig(
+        triggers=item["triggers"],
+        title=item["title"],
+        description=item["description"],
+        color=0x3498DB,
+        fields=item["fields"],
+        footer=item["footer"],
+    )
+
+
+def _allocated_per_call(fn, n: int = 2000) -> float:
+    tracemalloc.start()
+    keep = [fn() for _ in range(n)]  # garder les objets vivants: on mesure ce qui est alloué
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return current / n
+
+
+def main() -> None:
+    cfg = _load_config()
+    rebuild = lambda: cfg._build(lambda text: text)  # noqa: E731 - comportement avant cache
+    cached = cfg.build_embed
+
+    n = 20_000
+    t_rebuild = min(timeit.repeat(rebuild, number=n, repeat=5)) / n * 1e6
+    t_cached = min(timeit.repeat(cached, number=n, repeat=5)) / n * 1e6
+    a_rebuild = _allocated_per_call(rebuild)
+    a_cached = _allocated_per_call(cached)
+
+    print(f"{'':<24}{'µs/hit':>10}{'octets/hit':>14}")
+    print(f"{'avant (reconstruit)':<24}{t_rebuild:>10.2f}{a_rebuild:>14.0f}")
+    print(f"{'après (pré-construit)':<24}{t_cached:>10.2f}{a_cached:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
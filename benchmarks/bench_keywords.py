@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark keyword_responses: boucle `trig in content` vs automate Aho-Corasick.
+
+    python benchmarks/bench_keywords.py
+"""
+from __future__ import annotations
+
+import os
+import random
+import string
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bot.matching import AhoCorasick  # noqa: E402
+
+ALPHABET = string.ascii_lowercase + "éèà -'"
+
+
+def _random_word(rnd: random.Random, lo: int = 4, hi: int = 12) -> str:
+    return "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(lo, hi))).strip() or "x"
+
+
+def _messages(rnd: random.Random, triggers: list[str], n: int = 200) -> list[str]:
+    msgs = []
+    for i in range(n):
+        words = [_random_word(rnd, 2, 8) for _ in range(rnd.randint(5, 60))]
+        if i % 10 == 0:  # ~10% des messages contiennent un trigger
+            words.insert(rnd.randrange(len(words) + 1), rnd.choice(triggers))
+        msgs.append(" ".join(words))
+    return msgs
+
+
+def _loop_match(index: dict[str, object], content: str) -> str | None:
+    for trig in index:
+        if trig in content:
+            return trig
+    return None
+
+
+def _ac_match(ac: AhoCorasick, keys: list[str], content: str) -> str | None:
+    hits = ac.find_all(content)
+    return keys[min(hits)] if hits else None
+
+
+def main() -> None:
+    rnd = random.Random(1)
+    print(f"{'triggers':>9}{'build (ms)':>12}{'boucle (µs/msg)':>18}{'automate (µs/msg)':>20}{'gain':>8}")
+    for n in (10, 1_000, 50_000):
+        triggers = list(dict.fromkeys(_random_word(rnd, 5, 14) for _ in range(n)))
+        index = {t: None for t in triggers}
+        msgs = _messages(rnd, triggers)
+
+        t0 = timeit.default_timer()
+        keys = list(index)
+        ac = AhoCorasick(keys)
+        build_ms = (timeit.default_timer() - t0) * 1000
+
+        assert all(_loop_match(index, m) == _ac_match(ac, keys, m) for m in msgs)
+
+        reps = 3 if n >= 50_000 else 20
+        loop_t = min(timeit.repeat(lambda: [_loop_match(index, m) for m in msgs], number=1, repeat=reps))
+        ac_t = min(timeit.repeat(lambda: [_ac_match(ac, keys, m) for m in msgs], number=1, repeat=reps))
+        loop_us = loop_t / len(msgs) * 1e6
+        ac_us = ac_t / len(msgs) * 1e6
+        print(f"{len(triggers):>9}{build_ms:>12.1f}{loop_us:>18.1f}{ac_us:>20.1f}{loop_us / ac_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark des requêtes vers Ollama: une session HTTP par question vs session partagée.
+
+Lance un faux serveur Ollama local (réponse immédiate, sans génération) pour ne
+mesurer que le coût côté client: pool de connexions, résolution DNS, handshake TCP.
+
+    python benchmarks/bench_ollama_session.py [nb_requêtes]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bot.features.ollama_qna import OllamaQnAFeature  # noqa: E402
+
+
+async def _generate(request: web.Request) -> web.Response:
+    await request.json()
+    return web.json_response({"response": "42", "done": True})
+
+
+async def _start_stub() -> tuple[web.AppRunner, int]:
+    app = web.Application()
+    app.router.add_post("/api/generate", _generate)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    return runner, port
+
+
+async def _per_request(base_url: str, timeout: int) -> str:
+    # Ancien comportement: une ClientSession (et donc un pool) par question
+    payload = {"model": "bench", "prompt": "ping ?", "stream": False}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async with session.post(f"{base_url}/api/generate", json=payload) as resp:
+            data = await resp.json()
+            return str(data.get("response"))
+
+
+async def _measure(label: str, call, n: int) -> None:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1e3)
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:<22}{p50:>10.3f}{p99:>10.3f}{sum(samples):>12.1f}")
+
+
+async def main(n: int) -> None:
+    runner, port = await _start_stub()
+    # "localhost" plutôt que 127.0.0.1 pour inclure la résolution DNS
+    base_url = f"http://localhost:{port}"
+    os.environ.update(OLLAMA_ENABLED="1", OLLAMA_BASE_URL=base_url, OLLAMA_MODEL="bench", OLLAMA_TIMEOUT="10")
+    feature = OllamaQnAFeature()
+    feature.setup(None)  # type: ignore[arg-type]
+    try:
+        print(f"{'mode':<22}{'p50 ms':>10}{'p99 ms':>10}{'total ms':>12}")
+        await _measure("session par requête", lambda: _per_request(base_url, 10), n)
+        await _measure("session partagée", lambda: feature._query_ollama("ping ?"), n)
+    finally:
+        await feature.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
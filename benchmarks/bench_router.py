@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Benchmark des commandes préfixées: parcours linéaire + liste d'IDs vs table du routeur.
+
+Simule la recherche de la commande et le contrôle d'accès pour N commandes grant,
+avec la dernière commande de la liste (pire cas de l'ancien parcours).
+
+    python benchmarks/bench_router.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bot.features.grant_commands import GrantCommand  # noqa: E402
+from bot.features.router import Command, CommandRouter  # noqa: E402
+
+
+async def _noop(ctx) -> None:  # pragma: no cover - jamais appelé
+    return None
+
+
+class _Author:
+    id = 999_999
+
+
+def _grants(n: int) -> list[GrantCommand]:
+    # 20 IDs autorisés par commande, l'auteur étant le dernier
+    return [
+        GrantCommand(
+            name=f"cmd{i}",
+            allowed_user_ids=frozenset(range(1000 * i, 1000 * i + 19)) | {_Author.id},
+            role_name=f"Role {i}",
+        )
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    author = _Author()
+    print(f"{'commandes':>10}{'linéaire µs':>14}{'routeur µs':>13}")
+    for n in (10, 100, 1000):
+        grants = _grants(n)
+        # Avant: liste de commandes parcourue, allowed_user_ids en liste
+        legacy = [(gc.name, list(gc.allowed_user_ids)) for gc in grants]
+        router = CommandRouter()
+        router.publish("grant", [Command(gc.name, _noop, allowed_user_ids=gc.allowed_user_ids) for gc in grants])
+        wanted = f"cmd{n - 1}"
+
+        def linear() -> bool:
+            for name, ids in legacy:
+                if name == wanted:
+                    return author.id in ids
+            return False
+
+        def routed() -> bool:
+            cmd = router.get(wanted)
+            return cmd is not None and cmd.allows(author)
+
+        assert linear() and routed()
+        number = 20_000
+        t_linear = min(timeit.repeat(linear, number=number, repeat=5)) / number * 1e6
+        t_routed = min(timeit.repeat(routed, number=number, repeat=5)) / number * 1e6
+        print(f"{n:>10}{t_linear:>14.2f}{t_routed:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
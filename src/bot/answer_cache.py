@@ -0,0 +1,172 @@
+"""Cache des réponses Ollama par (modèle, question normalisée), en mémoire et optionnellement sur disque."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Tuple
+
+from .env import env_float, env_int
+from .metrics import metrics
+from .ttl import TTLCache
+
+logger = logging.getLogger("nyahchan.answer_cache")
+
+# Durée de vie (s) d'une réponse en cache; 0 = cache désactivé
+OLLAMA_CACHE_TTL_ENV = "OLLAMA_CACHE_TTL"
+DEFAULT_CACHE_TTL = 24 * 3600.0
+# Nombre max de réponses gardées en mémoire (LRU)
+OLLAMA_CACHE_MAX_ENV = "OLLAMA_CACHE_MAX"
+DEFAULT_CACHE_MAX = 500
+# Fichier SQLite du niveau disque (vide = mémoire seulement) et son nombre max d'entrées
+OLLAMA_CACHE_PATH_ENV = "OLLAMA_CACHE_PATH"
+OLLAMA_CACHE_DISK_MAX_ENV = "OLLAMA_CACHE_DISK_MAX"
+DEFAULT_CACHE_DISK_MAX = 5000
+
+# Mentions d'utilisateurs, de rôles et de salons: <@123>, <@!123>, <@&123>, <#123>
+_MENTION_RE = re.compile(r"<(?:@[!&]?|#)\d+>")
+_SPACES_RE = re.compile(r"\s+")
+
+_Key = Tuple[str, str]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Question réduite à sa forme comparable: sans mentions, casse repliée, espaces compactés."""
+    return _SPACES_RE.sub(" ", _MENTION_RE.sub(" ", prompt)).strip().casefold()
+
+
+class AnswerCache:
+    """Réponses déjà générées, par (modèle, question normalisée).
+
+    Deux niveaux:
+    - mémoire: LRU borné à OLLAMA_CACHE_MAX entrées;
+    - disque (si OLLAMA_CACHE_PATH est défini): table SQLite qui survit aux
+      redémarrages, bornée à OLLAMA_CACHE_DISK_MAX entrées (les moins
+      récemment utilisées sont supprimées). Un succès sur disque est remonté
+      en mémoire. Les accès disque tournent dans un thread pour ne pas bloquer
+      la boucle asyncio.
+
+    Chaque entrée expire OLLAMA_CACHE_TTL secondes après son écriture.
+    """
+
+    def __init__(self) -> None:
+        self.ttl = DEFAULT_CACHE_TTL
+        self.disk_max = DEFAULT_CACHE_DISK_MAX
+        self._memory: TTLCache[_Key, str] = TTLCache(maxsize=DEFAULT_CACHE_MAX)
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        metrics.gauge("ollama_cache_entries", lambda: {"memory": len(self._memory)})
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def configure(self) -> None:
+        """Relire OLLAMA_CACHE_* (appelé par ollama_qna.setup, après le chargement du .env)."""
+        self.ttl = env_float(OLLAMA_CACHE_TTL_ENV, DEFAULT_CACHE_TTL)
+        self._memory.maxsize = env_int(OLLAMA_CACHE_MAX_ENV, DEFAULT_CACHE_MAX, minimum=1)
+        self.disk_max = env_int(OLLAMA_CACHE_DISK_MAX_ENV, DEFAULT_CACHE_DISK_MAX, minimum=1)
+        self.close()
+        path = (os.getenv(OLLAMA_CACHE_PATH_ENV) or "").strip()
+        if not path or not self.enabled:
+            return
+        try:
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS answers_used ON answers (used)")
+            db.execute("DELETE FROM answers WHERE expires <= ?", (time.time(),))
+            db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache disque Ollama indisponible ({path}): {e}")
+            return
+        self._db = db
+        logger.info(f"Cache disque Ollama: {path}")
+
+    def close(self) -> None:
+        db, self._db = self._db, None
+        if db is not None:
+            with self._db_lock:
+                db.close()
+
+    @staticmethod
+    def key(model: str, prompt: str) -> _Key:
+        return (model, normalize_prompt(prompt))
+
+    async def get(self, key: _Key) -> str | None:
+        if not self.enabled:
+            return None
+        answer = self._memory.get(key)
+        if answer is not None:
+            # LRU: une lecture remet l'entrée en fin de file, sans prolonger son TTL
+            self._memory.set(key, answer, self._memory.remaining(key))
+            metrics.incr("ollama_cache", result="hit", tier="memory")
+            return answer
+        if self._db is not None:
+            found = await asyncio.to_thread(self._disk_get, _disk_key(key))
+            if found is not None:
+                answer, expires = found
+                self._memory.set(key, answer, expires - time.time())
+                metrics.incr("ollama_cache", result="hit", tier="disk")
+                return answer
+        metrics.incr("ollama_cache", result="miss")
+        return None
+
+    async def put(self, key: _Key, answer: str) -> None:
+        if not self.enabled or not key[1]:
+            return
+        self._memory.set(key, answer, self.ttl)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, _disk_key(key), answer, time.time() + self.ttl)
+
+    def _disk_get(self, key: str) -> Tuple[str, float] | None:
+        with self._db_lock:
+            db = self._db
+            if db is None:
+                return None
+            try:
+                now = time.time()
+                row = db.execute("SELECT answer, expires FROM answers WHERE key = ? AND expires > ?", (key, now)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE answers SET used = ? WHERE key = ?", (now, key))
+                    db.commit()
+                return row
+            except sqlite3.Error as e:
+                logger.warning(f"Lecture du cache disque Ollama impossible: {e}")
+                return None
+
+    def _disk_put(self, key: str, answer: str, expires: float) -> None:
+        with self._db_lock:
+            db = self._db
+            if db is None:
+                return
+            try:
+                now = time.time()
+                db.execute(
+                    "INSERT OR REPLACE INTO answers (key, answer, expires, used) VALUES (?, ?, ?, ?)",
+                    (key, answer, expires, now),
+                )
+                db.execute("DELETE FROM answers WHERE expires <= ?", (now,))
+                db.execute(
+                    "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_max,),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Écriture du cache disque Ollama impossible: {e}")
+
+
+def _disk_key(key: _Key) -> str:
+    model, prompt = key
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+# Instance partagée (ollama_qna)
+answer_cache = AnswerCache()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict
+
+
+DEFAULT_FAQ_PATH = "faq.json"
+FAQ_ENV = "FAQ_CONFIG"
+
+
+def get_faq_path() -> str:
+    """Return configured FAQ path or default.
+
+    The .env variable FAQ_CONFIG can override the default path.
+    """
+    return os.getenv(FAQ_ENV, DEFAULT_FAQ_PATH)
+
+
+def load_faq(path: str | None = None) -> Dict[str, Any]:
+    """Load FAQ JSON.
+
+    Returns an empty structure if file does not exist or is invalid.
+    """
+    if path is None:
+        path = get_faq_path()
+    if not path:
+        return {"entries": []}
+    if not os.path.exists(path):
+        # If the file does not exist yet, create it with an empty structure
+        data: Dict[str, Any] = {"entries": []}
+        save_faq(data, path)
+        return data
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return {"entries": []}
+        data.setdefault("entries", [])
+        return data
+    except Exception:
+        return {"entries": []}
+
+
+def save_faq(data: Dict[str, Any], path: str | None = None) -> None:
+    """Save FAQ JSON to disk.
+
+    Overwrites the target file.
+    """
+    if path is None:
+        path = get_faq_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
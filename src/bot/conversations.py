@@ -0,0 +1,80 @@
+"""Historique borné des échanges avec Ollama, par salon ou fil (mode conversation)."""
+from __future__ import annotations
+
+import logging
+from typing import Dict, List
+
+from .env import env_flag, env_float, env_int
+from .metrics import metrics
+from .ttl import TTLCache
+
+logger = logging.getLogger("nyahchan.conversations")
+
+# 1 = les questions d'un même salon/fil partagent un historique (envoyé via /api/chat)
+OLLAMA_CONVERSATION_ENV = "OLLAMA_CONVERSATION"
+# Échanges (question + réponse) gardés par salon, et taille max de l'historique en caractères
+OLLAMA_HISTORY_TURNS_ENV = "OLLAMA_HISTORY_TURNS"
+DEFAULT_HISTORY_TURNS = 6
+OLLAMA_HISTORY_CHARS_ENV = "OLLAMA_HISTORY_CHARS"
+DEFAULT_HISTORY_CHARS = 6000
+# Conversation oubliée après N secondes sans nouvelle question; nombre max de conversations gardées
+OLLAMA_CONVERSATION_TTL_ENV = "OLLAMA_CONVERSATION_TTL"
+DEFAULT_CONVERSATION_TTL = 1800.0
+OLLAMA_CONVERSATION_MAX_ENV = "OLLAMA_CONVERSATION_MAX"
+DEFAULT_CONVERSATION_MAX = 200
+
+Message = Dict[str, str]
+
+
+class ConversationStore:
+    """Messages `{"role", "content"}` récents par salon, au format de /api/chat.
+
+    Chaque salon (un fil Discord a son propre id) garde au plus
+    OLLAMA_HISTORY_TURNS échanges et OLLAMA_HISTORY_CHARS caractères: les plus
+    anciens sont retirés en premier. Une conversation sans nouvel échange
+    pendant OLLAMA_CONVERSATION_TTL secondes est oubliée; au-delà de
+    OLLAMA_CONVERSATION_MAX conversations, la moins récemment active l'est aussi.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.turns = DEFAULT_HISTORY_TURNS
+        self.max_chars = DEFAULT_HISTORY_CHARS
+        self.ttl = DEFAULT_CONVERSATION_TTL
+        self._history: TTLCache[int, List[Message]] = TTLCache(maxsize=DEFAULT_CONVERSATION_MAX)
+        metrics.gauge("ollama_conversations", lambda: {"channels": len(self._history)})
+
+    def configure(self) -> None:
+        """Relire OLLAMA_CONVERSATION* / OLLAMA_HISTORY_* (appelé par ollama_qna.setup)."""
+        self.enabled = env_flag(OLLAMA_CONVERSATION_ENV, False)
+        self.turns = env_int(OLLAMA_HISTORY_TURNS_ENV, DEFAULT_HISTORY_TURNS, minimum=1)
+        self.max_chars = env_int(OLLAMA_HISTORY_CHARS_ENV, DEFAULT_HISTORY_CHARS)
+        self.ttl = env_float(OLLAMA_CONVERSATION_TTL_ENV, DEFAULT_CONVERSATION_TTL)
+        self._history.maxsize = env_int(OLLAMA_CONVERSATION_MAX_ENV, DEFAULT_CONVERSATION_MAX, minimum=1)
+        if not self.enabled:
+            self._history.clear()
+
+    def history(self, channel_id: int) -> List[Message]:
+        """Copie de l'historique du salon (vide s'il n'y en a pas ou s'il a expiré)."""
+        return list(self._history.get(channel_id) or ())
+
+    def record(self, channel_id: int, question: str, answer: str) -> None:
+        """Ajouter un échange terminé et retirer les plus anciens au-delà des limites."""
+        if not self.enabled or self.ttl <= 0:
+            return
+        messages = self.history(channel_id)
+        messages.append({"role": "user", "content": question})
+        messages.append({"role": "assistant", "content": answer})
+        del messages[: max(len(messages) - 2 * self.turns, 0)]
+        total = sum(len(m["content"]) for m in messages)
+        # Toujours garder le dernier échange, même s'il dépasse à lui seul la limite
+        while len(messages) > 2 and total > self.max_chars:
+            total -= len(messages.pop(0)["content"]) + len(messages.pop(0)["content"])
+        self._history.set(channel_id, messages, self.ttl)
+
+    def forget(self, channel_id: int) -> None:
+        self._history.pop(channel_id)
+
+
+# Instance partagée (ollama_qna)
+conversations = ConversationStore()
@@ -0,0 +1,117 @@
+"""Cooldowns par trigger, par salon et par utilisateur pour les features à triggers."""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Hashable
+
+from .env import env_float, env_int, parse_float
+from .metrics import metrics
+from .ttl import TTLCache
+
+logger = logging.getLogger("nyahchan.cooldowns")
+
+# Valeurs par défaut (secondes, 0 = pas de cooldown) quand une entrée JSON n'a pas de "cooldown"
+COOLDOWN_TRIGGER_ENV = "COOLDOWN_TRIGGER"
+COOLDOWN_CHANNEL_ENV = "COOLDOWN_CHANNEL"
+COOLDOWN_USER_ENV = "COOLDOWN_USER"
+# Nombre max de cooldowns actifs gardés en mémoire (les plus anciens sont évincés)
+COOLDOWN_MAX_ENTRIES_ENV = "COOLDOWN_MAX_ENTRIES"
+DEFAULT_MAX_ENTRIES = 10_000
+
+@dataclass(frozen=True)
+class Cooldown:
+    """Durées en secondes; 0 désactive la portée correspondante.
+
+    - trigger: un seul envoi par trigger, tous salons confondus ;
+    - channel: un envoi par trigger et par salon ;
+    - user: un envoi par trigger et par auteur.
+    """
+
+    trigger: float = 0.0
+    channel: float = 0.0
+    user: float = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.trigger > 0 or self.channel > 0 or self.user > 0
+
+
+def _seconds(raw: object, default: float, name: str) -> float:
+    return parse_float(raw, default, f"Cooldown {name}")  # type: ignore[return-value]
+
+
+def default_cooldown() -> Cooldown:
+    """Cooldown par défaut lu depuis l'environnement (relu à chaque chargement de config)."""
+    return Cooldown(
+        trigger=env_float(COOLDOWN_TRIGGER_ENV, 0.0),
+        channel=env_float(COOLDOWN_CHANNEL_ENV, 0.0),
+        user=env_float(COOLDOWN_USER_ENV, 0.0),
+    )
+
+
+def parse_cooldown(raw: object, default: Cooldown) -> Cooldown:
+    """Champ "cooldown" d'une entrée JSON.
+
+    Un nombre est un cooldown par salon; un objet {"trigger", "channel", "user"}
+    remplace seulement les portées indiquées; absent -> `default`.
+    """
+    if raw is None:
+        return default
+    if isinstance(raw, dict):
+        return Cooldown(
+            trigger=_seconds(raw.get("trigger"), default.trigger, "trigger"),
+            channel=_seconds(raw.get("channel"), default.channel, "channel"),
+            user=_seconds(raw.get("user"), default.user, "user"),
+        )
+    return Cooldown(trigger=default.trigger, channel=_seconds(raw, default.channel, "channel"), user=default.user)
+
+
+class CooldownTracker:
+    """Mémorise les derniers envois dans un TTLCache borné.
+
+    Une entrée n'existe que pendant la durée de son cooldown: la mémoire dépend du
+    nombre de cooldowns actifs, pas du nombre de salons ou d'utilisateurs vus.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._active: TTLCache[tuple, bool] = TTLCache(maxsize=maxsize)
+
+    def configure(self) -> None:
+        """Relire COOLDOWN_MAX_ENTRIES (appelé au chargement des configs, après le .env)."""
+        self._active.maxsize = env_int(COOLDOWN_MAX_ENTRIES_ENV, DEFAULT_MAX_ENTRIES, minimum=1)
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def hit(self, feature: str, key: Hashable, channel_id: int, user_id: int, cooldown: Cooldown) -> str | None:
+        """Enregistrer un envoi si aucun cooldown n'est actif.
+
+        Renvoie None si l'envoi est autorisé (et démarre les cooldowns), sinon la
+        portée qui le bloque ("trigger", "channel" ou "user"), comptée dans
+        la métrique `cooldown_suppressed`.
+        """
+        if not cooldown.active:
+            return None
+        keys = (
+            ("trigger", (feature, key), cooldown.trigger),
+            ("channel", (feature, key, channel_id), cooldown.channel),
+            ("user", (feature, key, "u", user_id), cooldown.user),
+        )
+        active = self._active
+        for scope, ckey, ttl in keys:
+            if ttl > 0 and ckey in active:
+                metrics.incr("cooldown_suppressed", feature=feature, scope=scope)
+                logger.debug("Cooldown %s actif pour %s/%r (%.1fs restantes)", scope, feature, key, active.remaining(ckey))
+                return scope
+        for _, ckey, ttl in keys:
+            if ttl > 0:
+                active.set(ckey, True, ttl)
+        return None
+
+    def clear(self) -> None:
+        self._active.clear()
+
+
+# Instance partagée par les features
+cooldowns = CooldownTracker()
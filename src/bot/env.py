@@ -0,0 +1,48 @@
+"""Lecture des réglages de l'environnement (.env): nombres et interrupteurs, avec repli sur la valeur par défaut."""
+from __future__ import annotations
+
+import logging
+import os
+
+logger = logging.getLogger("nyahchan.env")
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off")
+
+
+def parse_float(raw: object, default: float | None, name: str, minimum: float | None = 0.0) -> float | None:
+    """`raw` converti en nombre, ramené à `minimum` (None = sans borne).
+
+    Absent ou vide -> `default`; invalide -> `default` avec un avertissement
+    qui cite `name` (variable d'environnement ou champ JSON).
+    """
+    if raw is None or (isinstance(raw, str) and not raw.strip()):
+        return default
+    try:
+        value = float(raw)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        logger.warning("%s invalide: %r (défaut %s utilisé)", name, raw, default)
+        return default
+    return value if minimum is None else max(value, minimum)
+
+
+def env_float(name: str, default: float, minimum: float | None = 0.0) -> float:
+    """Nombre lu dans la variable `name` (voir parse_float)."""
+    return parse_float(os.getenv(name), default, name, minimum)  # type: ignore[return-value]
+
+
+def env_int(name: str, default: int, minimum: int = 0) -> int:
+    """Entier lu dans la variable `name` (partie entière), au moins `minimum`."""
+    return max(int(env_float(name, default, minimum)), minimum)
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """Interrupteur: 1/true/yes/on ou 0/false/no/off; absent ou autre valeur -> `default`."""
+    raw = (os.getenv(name) or "").strip().lower()
+    if raw in _TRUE:
+        return True
+    if raw in _FALSE:
+        return False
+    if raw:
+        logger.warning("%s invalide: %r (défaut %s utilisé)", name, raw, "1" if default else "0")
+    return default
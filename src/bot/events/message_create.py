@@ -1,11 +1,19 @@
 import discord
-from ..features.registry import dispatch_on_message
+from ..features.registry import dispatch_message_delete, dispatch_on_message
 
 
 def setup_message_event(client: discord.Client):
     @client.event
     async def on_message(message: discord.Message):
-        # Ignore bots and DMs
-        if message.author.bot or message.guild is None:
-            return
+        # Bots et DMs sont filtrés par le registry (MessageContext.build)
         await dispatch_on_message(message)
+
+    # Événements "raw": reçus même si le message supprimé n'est plus dans le cache de discord.py
+    @client.event
+    async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+        await dispatch_message_delete(payload.message_id)
+
+    @client.event
+    async def on_raw_bulk_message_delete(payload: discord.RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            await dispatch_message_delete(message_id)
@@ -1,6 +1,9 @@
+import asyncio
 import logging
 import discord
 
+from ..members import warm_up
+
 logger = logging.getLogger("nyahchan.events.ready")
 
 
@@ -10,6 +13,9 @@ def setup_ready_event(client: discord.Client):
         assert client.user is not None
         logger.info(f"Connecté comme {client.user} ({client.user.id})")
 
+        # Chargement des membres en tâche de fond (MEMBER_CACHE_WARMUP=1)
+        asyncio.ensure_future(warm_up(client))
+
         # Synchroniser les commandes de modération (slash commands)
         moderation = getattr(client, "moderation", None)
         if moderation is not None:
@@ -0,0 +1,28 @@
+import discord
+
+from ..roles import role_batcher, role_cache
+
+
+def setup_role_events(client: discord.Client):
+    """Garder l'index des rôles par nom à jour avec la gateway."""
+
+    @client.event
+    async def on_guild_role_create(role: discord.Role):
+        role_cache.add(role)
+
+    @client.event
+    async def on_guild_role_update(before: discord.Role, after: discord.Role):
+        role_cache.update(before, after)
+
+    @client.event
+    async def on_guild_role_delete(role: discord.Role):
+        role_cache.remove(role)
+
+    @client.event
+    async def on_member_update(before: discord.Member, after: discord.Member):
+        # Nos propres modifications de rôles sont désormais visibles dans le cache
+        role_batcher.confirm(after)
+
+    @client.event
+    async def on_guild_remove(guild: discord.Guild):
+        role_cache.invalidate(guild.id)
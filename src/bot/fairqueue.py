@@ -0,0 +1,90 @@
+"""Limiteur de concurrence avec file d'attente équitable entre appelants (par utilisateur)."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Hashable
+
+
+class QueueFull(Exception):
+    """La file d'attente est pleine (au total ou pour cet appelant)."""
+
+
+class FairLimiter:
+    """Au plus `limit` opérations en cours; les suivantes attendent, servies à tour de rôle par clé.
+
+    Chaque clé (un utilisateur) a sa propre file; quand une place se libère,
+    elle revient à la clé suivante dans la rotation, pas à l'attente la plus
+    ancienne: un utilisateur qui enchaîne les questions ne bloque pas les autres.
+    Au-delà de `max_waiting` attentes au total, ou de `per_key` pour une même
+    clé, `acquire` lève QueueFull tout de suite au lieu d'attendre.
+
+    Pas de verrou: prévu pour être utilisé depuis la boucle asyncio uniquement.
+    """
+
+    def __init__(self, limit: int = 2, max_waiting: int = 20, per_key: int = 2) -> None:
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.per_key = per_key
+        self.running = 0
+        self.waiting = 0
+        self._queues: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable) -> AsyncIterator[float]:
+        """`async with limiter.slot(user_id) as waited:` -> secondes passées en file."""
+        waited = await self.acquire(key)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    async def acquire(self, key: Hashable) -> float:
+        if self.running < self.limit and not self._queues:
+            self.running += 1
+            return 0.0
+        queue = self._queues.get(key)
+        if self.waiting >= self.max_waiting or (queue is not None and len(queue) >= self.per_key):
+            raise QueueFull(f"{self.waiting} en attente, {self.running} en cours")
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[key] = deque()
+        queue.append(future)
+        self.waiting += 1
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._discard(key, future)
+            else:
+                # La place a été attribuée juste avant l'annulation: la passer au suivant
+                self.release()
+            raise
+        return time.monotonic() - start
+
+    def release(self) -> None:
+        self.running -= 1
+        while self.running < self.limit and self._queues:
+            key, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self.waiting -= 1
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if future.done():
+                continue
+            self.running += 1
+            future.set_result(None)
+
+    def _discard(self, key: Hashable, future: asyncio.Future) -> None:
+        queue = self._queues.get(key)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        self.waiting -= 1
+        if not queue:
+            del self._queues[key]
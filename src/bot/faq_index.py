@@ -0,0 +1,169 @@
+"""Index vectoriel de la FAQ: questions embarquées une fois via Ollama, recherche cosinus top-k en mémoire."""
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+import aiohttp
+
+from .answer_cache import normalize_prompt
+from .env import env_flag, env_float, env_int
+from .metrics import metrics
+
+try:  # calcul vectorisé; sans numpy, repli en Python pur (suffisant pour une petite FAQ)
+    import numpy as np  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    np = None
+
+logger = logging.getLogger("nyahchan.faq")
+
+# 1 = répondre depuis la FAQ (faq.json) quand une question y ressemble assez
+OLLAMA_FAQ_ENV = "OLLAMA_FAQ"
+# Modèle d'embeddings (doit être installé sur les serveurs Ollama)
+OLLAMA_EMBED_MODEL_ENV = "OLLAMA_EMBED_MODEL"
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+# Similarité cosinus minimale (0 à 1) pour répondre depuis la FAQ
+OLLAMA_FAQ_THRESHOLD_ENV = "OLLAMA_FAQ_THRESHOLD"
+DEFAULT_FAQ_THRESHOLD = 0.85
+# Nombre de correspondances gardées par recherche (journalisées en debug)
+OLLAMA_FAQ_TOP_K_ENV = "OLLAMA_FAQ_TOP_K"
+DEFAULT_FAQ_TOP_K = 3
+
+# Textes envoyés par requête d'embeddings lors de la construction de l'index
+_EMBED_BATCH = 32
+
+Embedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+@dataclass(frozen=True)
+class FaqMatch:
+    score: float
+    question: str
+    answer: str
+
+
+class FaqIndex:
+    """Questions de la FAQ et leurs vecteurs normalisés, en une matrice (une ligne par formulation).
+
+    Chaque formulation n'est embarquée qu'une fois: les vecteurs sont gardés par
+    (modèle, texte) et réutilisés quand la FAQ est rechargée, seules les
+    nouvelles formulations sont envoyées à Ollama. Une recherche embarque la
+    question posée puis calcule toutes les similarités cosinus d'un coup
+    (produit matrice-vecteur, les lignes étant déjà normalisées).
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.model = DEFAULT_EMBED_MODEL
+        self.threshold = DEFAULT_FAQ_THRESHOLD
+        self.top_k = DEFAULT_FAQ_TOP_K
+        self._vectors: Dict[Tuple[str, str], List[float]] = {}
+        self._rows: List[Tuple[int, str, str]] = []  # (entrée, formulation, réponse) par ligne de la matrice
+        self._matrix: Any = None
+        metrics.gauge("ollama_faq_entries", lambda: {"questions": len(self._rows)})
+
+    @property
+    def ready(self) -> bool:
+        return self._matrix is not None and bool(self._rows)
+
+    def configure(self) -> None:
+        """Relire OLLAMA_FAQ* / OLLAMA_EMBED_MODEL (appelé par ollama_qna.setup)."""
+        self.enabled = env_flag(OLLAMA_FAQ_ENV, False)
+        self.model = (os.getenv(OLLAMA_EMBED_MODEL_ENV) or DEFAULT_EMBED_MODEL).strip()
+        self.threshold = env_float(OLLAMA_FAQ_THRESHOLD_ENV, DEFAULT_FAQ_THRESHOLD)
+        self.top_k = env_int(OLLAMA_FAQ_TOP_K_ENV, DEFAULT_FAQ_TOP_K, minimum=1)
+
+    async def build(self, entries: Sequence[Dict[str, Any]], embed: Embedder) -> None:
+        """(Re)construire l'index à partir des entrées de faq.json; lève l'erreur d'embedding éventuelle."""
+        rows: List[Tuple[int, str, str]] = []
+        for idx, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                continue
+            answer = str(entry.get("answer") or "").strip()
+            if not answer:
+                continue
+            for q in entry.get("questions") or []:
+                text = normalize_prompt(str(q))
+                if text:
+                    rows.append((idx, text, answer))
+        missing = sorted({text for _, text, _ in rows if (self.model, text) not in self._vectors})
+        for start in range(0, len(missing), _EMBED_BATCH):
+            batch = missing[start:start + _EMBED_BATCH]
+            for text, vector in zip(batch, await embed(batch)):
+                self._vectors[(self.model, text)] = _normalize(vector)
+        # Oublier les vecteurs des formulations retirées de la FAQ
+        wanted = {(self.model, text) for _, text, _ in rows}
+        self._vectors = {k: v for k, v in self._vectors.items() if k in wanted}
+        vectors = [self._vectors[(self.model, text)] for _, text, _ in rows]
+        matrix = np.asarray(vectors, dtype=np.float32) if np is not None and vectors else vectors
+        # Remplacement d'un bloc: une recherche concurrente voit l'ancien ou le nouvel index, jamais un mélange
+        self._rows, self._matrix = rows, matrix
+        logger.info(
+            f"[faq] Index construit: {len(rows)} formulation(s), {len(missing)} nouvel(s) embedding(s)"
+            f"{'' if np is not None else ' (sans numpy)'}"
+        )
+
+    def search(self, vector: Sequence[float]) -> List[FaqMatch]:
+        """Les `top_k` entrées les plus proches de `vector`, par similarité décroissante (une par entrée)."""
+        rows, matrix = self._rows, self._matrix
+        if not rows or matrix is None:
+            return []
+        query = _normalize(vector)
+        if np is not None:
+            scores = (matrix @ np.asarray(query, dtype=np.float32)).tolist()
+        else:
+            scores = [sum(a * b for a, b in zip(row, query)) for row in matrix]
+        order = sorted(range(len(rows)), key=scores.__getitem__, reverse=True)
+        matches: List[FaqMatch] = []
+        seen: set[int] = set()
+        for i in order:
+            entry, question, answer = rows[i]
+            if entry in seen:
+                continue
+            seen.add(entry)
+            matches.append(FaqMatch(float(scores[i]), question, answer))
+            if len(matches) >= self.top_k:
+                break
+        return matches
+
+    def best(self, vector: Sequence[float]) -> FaqMatch | None:
+        """Meilleure entrée si sa similarité atteint le seuil, sinon None."""
+        matches = self.search(vector)
+        if matches:
+            logger.debug("[faq] Top %d: %s", len(matches), ", ".join(f"{m.question!r}={m.score:.3f}" for m in matches))
+        if matches and matches[0].score >= self.threshold:
+            metrics.incr("ollama_faq", result="hit")
+            return matches[0]
+        metrics.incr("ollama_faq", result="miss")
+        return None
+
+
+async def fetch_embeddings(session: aiohttp.ClientSession, base_url: str, model: str, texts: List[str]) -> List[List[float]]:
+    """Embeddings de `texts` via /api/embed (par lot), ou /api/embeddings (un par un) sur les anciens Ollama."""
+    async with session.post(f"{base_url}/api/embed", json={"model": model, "input": texts}) as resp:
+        if resp.status == 200:
+            data = await resp.json()
+            vectors = data.get("embeddings") or []
+            if len(vectors) == len(texts):
+                return vectors
+            raise ValueError(f"{len(vectors)} embedding(s) reçu(s) pour {len(texts)} texte(s)")
+        if resp.status != 404:
+            raise ValueError(f"HTTP {resp.status}: {(await resp.text())[:200]}")
+    vectors = []
+    for text in texts:
+        async with session.post(f"{base_url}/api/embeddings", json={"model": model, "prompt": text}) as resp:
+            if resp.status != 200:
+                raise ValueError(f"HTTP {resp.status}: {(await resp.text())[:200]}")
+            vectors.append((await resp.json()).get("embedding") or [])
+    return vectors
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = sum(x * x for x in vector) ** 0.5
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+# Instance partagée (ollama_qna)
+faq_index = FaqIndex()
@@ -1,59 +1,73 @@
 from __future__ import annotations
 
-import os
 import logging
 import discord
+from .context import Interest, MessageContext
 from .registry import register
+from .router import Command, router
+from ..outbound import Priority, send
 
 logger = logging.getLogger("nyahchan.feature.commands")
 
 
 class CommandsFeature:
     name = "commands"
+    # Les commandes passent par le routeur partagé: la feature ne reçoit pas de messages
+    interests = Interest.NONE
 
     def setup(self, client: discord.Client) -> None:  # noqa: D401
-        pass  # no special setup needed
+        router.publish(
+            self.name,
+            [
+                Command("ping", self._ping),
+                Command("help", self._help, aliases=("aide",)),
+                Command(
+                    "roles",
+                    self._roles,
+                    permission="manage_roles",
+                    denied_message="Permission insuffisante pour !roles",
+                ),
+            ],
+            precedence=-1,
+        )
 
-    async def on_message(self, message: discord.Message) -> None:  # noqa: D401
-        if message.author.bot or message.guild is None:
+    async def _ping(self, ctx: MessageContext) -> None:
+        if ctx.args:
             return
-        prefix = os.getenv("PREFIX", "!")
-        content = message.content or ""
-        if not content.startswith(prefix):
+        try:
+            await send(ctx.message.channel, "Pong!", priority=Priority.HIGH)
+        except Exception:
             return
-        body = content[len(prefix):].strip().lower()
-        if body == "ping":
-            try:
-                await message.channel.send("Pong!")
-            except Exception:
-                return
-            logger.debug("ping command")
-        elif body in ("help", "aide"):
-            try:
-                await message.channel.send(
-                    "Commandes disponibles:\n"
-                    f"{prefix}ping - test de réactivité\n"
-                    f"{prefix}help - affiche cette aide\n"
-                    f"Triggers de rôles: définis dans role_triggers.json ou .env"
-                )
-            except Exception:
-                return
-            logger.debug("help command")
-        elif body == "roles":
-            if isinstance(message.author, discord.Member) and message.author.guild_permissions.manage_roles:
-                roles = sorted(message.guild.roles, key=lambda r: r.position, reverse=True)  # type: ignore[union-attr]
-                lines = [f"{r.position:>3} | {r.name}" for r in roles]
-                text = "Liste des rôles (haut -> bas):\n" + "\n".join(lines[:50])
-                try:
-                    await message.channel.send(f"```\n{text}\n```")
-                except Exception:
-                    return
-                logger.debug("roles command")
-            else:
-                try:
-                    await message.channel.send("Permission insuffisante pour !roles")
-                except Exception:
-                    pass
+        logger.debug("ping command")
+
+    async def _help(self, ctx: MessageContext) -> None:
+        if ctx.args:
+            return
+        prefix = ctx.prefix
+        try:
+            await send(
+                ctx.message.channel,
+                "Commandes disponibles:\n"
+                f"{prefix}ping - test de réactivité\n"
+                f"{prefix}help - affiche cette aide\n"
+                f"Triggers de rôles: définis dans role_triggers.json ou .env",
+                priority=Priority.HIGH,
+            )
+        except Exception:
+            return
+        logger.debug("help command")
+
+    async def _roles(self, ctx: MessageContext) -> None:
+        if ctx.args:
+            return
+        roles = sorted(ctx.guild.roles, key=lambda r: r.position, reverse=True)
+        lines = [f"{r.position:>3} | {r.name}" for r in roles]
+        text = "Liste des rôles (haut -> bas):\n" + "\n".join(lines[:50])
+        try:
+            await send(ctx.message.channel, f"```\n{text}\n```", priority=Priority.HIGH)
+        except Exception:
+            return
+        logger.debug("roles command")
 
 
 register(CommandsFeature())
@@ -0,0 +1,81 @@
+"""Contexte de message pré-analysé, partagé par toutes les features."""
+from __future__ import annotations
+
+import enum
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import discord
+
+from ..matching import trigger_matcher
+
+
+class Interest(enum.Flag):
+    """Ce qu'une feature veut recevoir. Sert à construire la table de routage du registry."""
+
+    NONE = 0
+    COMMAND = enum.auto()  # messages qui commencent par le préfixe
+    MENTION = enum.auto()  # messages qui mentionnent le bot
+    TEXT = enum.auto()  # tout message avec du texte
+    TRIGGERS = enum.auto()  # messages où l'index partagé trouve un trigger publié par la feature
+
+
+def get_prefix() -> str:
+    return os.getenv("PREFIX", "!")
+
+
+@dataclass
+class MessageContext:
+    """Données dérivées d'un message, calculées une seule fois par message.
+
+    `command` vaut le premier mot après le préfixe (en minuscules) si le message
+    est une commande, sinon None. `args` contient les mots suivants (casse d'origine).
+    """
+
+    message: discord.Message
+    content: str
+    lowered: str
+    prefix: str
+    body: str = ""
+    command: str | None = None
+    args: List[str] = field(default_factory=list)
+    bot_member: discord.Member | None = None
+    mentions_bot: bool = False
+    _trigger_hits: Dict[str, List[Any]] | None = field(default=None, repr=False)
+
+    @property
+    def trigger_hits(self) -> Dict[str, List[Any]]:
+        """Résultat de l'index partagé (une seule passe par message, calculée à la demande)."""
+        if self._trigger_hits is None:
+            self._trigger_hits = trigger_matcher.match(self.lowered) if self.lowered else {}
+        return self._trigger_hits
+
+    def hits_for(self, owner: str) -> List[Any]:
+        """Charges utiles des motifs de `owner` trouvés dans le message (ordre quelconque)."""
+        return self.trigger_hits.get(owner, [])
+
+    @property
+    def guild(self) -> discord.Guild:
+        return self.message.guild  # type: ignore[return-value]
+
+    @classmethod
+    def build(cls, message: discord.Message, prefix: str | None = None) -> "MessageContext | None":
+        """Construire le contexte, ou None pour les messages ignorés (bots, DMs)."""
+        if message.author.bot or message.guild is None:
+            return None
+        if prefix is None:
+            prefix = get_prefix()
+        content = message.content or ""
+        ctx = cls(message=message, content=content, lowered=content.lower(), prefix=prefix)
+        if prefix and content.startswith(prefix):
+            ctx.body = content[len(prefix):].strip()
+            parts = ctx.body.split()
+            if parts:
+                ctx.command = parts[0].lower()
+                ctx.args = parts[1:]
+        me = message.guild.me
+        ctx.bot_member = me
+        if me is not None and message.mentions:
+            ctx.mentions_bot = any(u.id == me.id for u in message.mentions)
+        return ctx
@@ -1,37 +1,57 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import json
 import logging
 from dataclasses import dataclass
-from typing import List, Optional
+from functools import partial
+from typing import Dict, FrozenSet, List, Tuple
 
 import discord
 
+from .context import Interest, MessageContext
 from .registry import register
+from .router import Command, router
+from ..env import env_int
+from ..media import media_cache
+from ..members import member_cache
+from ..outbound import Priority, outbound, send
+from ..roles import ensure_role
 
 logger = logging.getLogger("nyahchan.feature.grant")
 
 CONFIG_ENV = "GRANT_COMMANDS_CONFIG"
+# Attributions simultanées pour une commande à plusieurs cibles, et nombre max de cibles
+GRANT_CONCURRENCY_ENV = "GRANT_CONCURRENCY"
+DEFAULT_GRANT_CONCURRENCY = 5
+GRANT_MAX_TARGETS_ENV = "GRANT_MAX_TARGETS"
+DEFAULT_GRANT_MAX_TARGETS = 200
 
 
 @dataclass
 class GrantCommand:
     name: str
-    allowed_user_ids: List[int]
+    allowed_user_ids: FrozenSet[int]
     role_name: str
     gif_path: str | None = None
+    aliases: Tuple[str, ...] = ()
 
 
 class GrantCommandsFeature:
     name = "grant_commands"
+    # Les commandes passent par le routeur partagé: la feature ne reçoit pas de messages
+    interests = Interest.NONE
 
     def __init__(self) -> None:
-        self.prefix = os.getenv("PREFIX", "!")
         self.commands: List[GrantCommand] = []
+        self.concurrency = DEFAULT_GRANT_CONCURRENCY
+        self.max_targets = DEFAULT_GRANT_MAX_TARGETS
 
     def _load_from_config(self) -> None:
-        self.commands.clear()
+        commands: List[GrantCommand] = []
+        self.concurrency = env_int(GRANT_CONCURRENCY_ENV, DEFAULT_GRANT_CONCURRENCY, minimum=1)
+        self.max_targets = env_int(GRANT_MAX_TARGETS_ENV, DEFAULT_GRANT_MAX_TARGETS, minimum=1)
         # Charger depuis JSON si présent (par défaut: grant_commands.json à la racine)
         path = os.getenv(CONFIG_ENV, "grant_commands.json")
         if path and os.path.exists(path):
@@ -40,6 +60,9 @@ class GrantCommandsFeature:
                     data = json.load(f)
                 for item in data.get("commands", []):
                     name = str(item.get("name", "")).strip().lower()
+                    aliases = tuple(
+                        a for a in (str(x).strip().lower() for x in item.get("aliases", []) or []) if a and a != name
+                    )
                     rname = str(item.get("role_name", "")).strip()
                     gif_path = item.get("gif_path")
                     ids_raw = item.get("allowed_user_ids", [])
@@ -50,13 +73,21 @@ class GrantCommandsFeature:
                         except Exception:
                             pass
                     if name and rname and ids:
-                        self.commands.append(GrantCommand(name=name, allowed_user_ids=ids, role_name=rname, gif_path=gif_path))
-                logger.info(f"Chargé {len(self.commands)} commande(s) grant depuis {path}.")
+                        commands.append(
+                            GrantCommand(
+                                name=name,
+                                allowed_user_ids=frozenset(ids),
+                                role_name=rname,
+                                gif_path=gif_path,
+                                aliases=aliases,
+                            )
+                        )
+                logger.info(f"Chargé {len(commands)} commande(s) grant depuis {path}.")
             except Exception as e:
                 logger.error(f"Erreur lecture {CONFIG_ENV}: {e}")
 
         # Fallback .env simple: un seul mapping
-        if not self.commands:
+        if not commands:
             one_name = os.getenv("GRANT_CMD_NAME")
             one_role = os.getenv("GRANT_ROLE_NAME")
             one_gif = os.getenv("GRANT_GIF_PATH")
@@ -67,9 +98,21 @@ class GrantCommandsFeature:
                 except Exception:
                     ids = []
                 if ids:
-                    self.commands.append(GrantCommand(name=one_name.lower(), allowed_user_ids=ids, role_name=one_role, gif_path=one_gif))
+                    commands.append(
+                        GrantCommand(name=one_name.lower(), allowed_user_ids=frozenset(ids), role_name=one_role, gif_path=one_gif)
+                    )
                     logger.info("Fallback .env chargé pour grant_commands.")
 
+        self.commands = commands
+        # Contrôle d'accès (frozenset d'IDs) et routage faits par le routeur partagé
+        router.publish(
+            self.name,
+            [
+                Command(gc.name, partial(self._run, gc), aliases=gc.aliases, allowed_user_ids=gc.allowed_user_ids)
+                for gc in commands
+            ],
+        )
+
     def setup(self, client: discord.Client) -> None:  # noqa: D401
         self._load_from_config()
 
@@ -77,114 +120,143 @@ class GrantCommandsFeature:
         """Recharger la configuration des grant commands depuis le JSON/env."""
         self._load_from_config()
 
-    async def _ensure_role(self, guild: discord.Guild, role_name: str) -> Optional[discord.Role]:
-        for r in guild.roles:
-            if r.name == role_name:
-                return r
-        try:
-            role = await guild.create_role(name=role_name, mentionable=True, reason="Création auto via grant command")
-            # auto position sous le top rôle du bot si possible
-            me = guild.me
-            if me and me.top_role and me.top_role.position > 1:
-                target_pos = me.top_role.position - 1
-                try:
-                    await role.edit(position=target_pos, reason="Auto-reposition sous top rôle du bot")
-                except Exception:
-                    pass
-            return role
-        except Exception as e:
-            logger.error(f"Impossible de créer le rôle '{role_name}': {e}")
-            return None
-
-    def _parse_target_member(self, message: discord.Message) -> Optional[discord.Member]:
-        if message.mentions:
-            m = message.mentions[0]
-            return m if isinstance(m, discord.Member) else None
-        # Essayer de lire un ID brut après la commande
-        try:
-            parts = (message.content or "").split()
-            if len(parts) >= 2:
-                raw = parts[1].strip("<@!>")
-                uid = int(raw)
-                return message.guild.get_member(uid)  # type: ignore[union-attr]
-        except Exception:
-            pass
-        return None
-
-    async def on_message(self, message: discord.Message) -> None:  # noqa: D401
-        if message.author.bot or message.guild is None:
-            return
+    async def _parse_targets(self, ctx: MessageContext) -> Tuple[List[discord.Member], int]:
+        """Membres visés: mentions, IDs bruts et membres des rôles mentionnés (sans doublons, dans l'ordre).
 
-        content = message.content or ""
-        if not content.startswith(self.prefix):
-            return
+        Renvoie aussi le nombre de cibles ignorées au-delà de GRANT_MAX_TARGETS.
+        """
+        message = ctx.message
+        guild = ctx.guild
+        found: Dict[int, discord.Member] = {}
+        dropped: set[int] = set()
 
-        me = message.guild.me
-        if me is None or not me.guild_permissions.manage_roles:
-            return
+        def add(member: discord.Member | None) -> None:
+            if member is None or member.id in found:
+                return
+            if len(found) < self.max_targets:
+                found[member.id] = member
+            else:
+                dropped.add(member.id)
 
-        # Extraire nom de commande
-        body = content[len(self.prefix):].strip()
-        cmd = body.split()[0].lower() if body else ""
-        if not cmd:
-            return
-
-        # Correspondance commande
-        matched: Optional[GrantCommand] = None
-        for gc in self.commands:
-            if gc.name == cmd:
-                matched = gc
-                break
-        if matched is None:
-            return
+        for m in message.mentions:
+            if isinstance(m, discord.Member):
+                add(m)
+        roles: List[discord.Role] = list(getattr(message, "role_mentions", []) or [])
+        for raw in ctx.args:
+            if raw.startswith("<@&"):
+                continue  # déjà dans role_mentions
+            try:
+                uid = int(raw.strip("<@!>"))
+            except ValueError:
+                continue
+            if uid in found:
+                continue
+            # Un ID brut peut être celui d'un rôle (tous ses membres) ou d'un membre
+            role = guild.get_role(uid)
+            if role is not None:
+                roles.append(role)
+            else:
+                add(await member_cache.resolve(guild, uid))
+        for role in roles:
+            # L'ID du serveur est celui de @everyone: jamais « tous les membres »
+            if role.is_default():
+                continue
+            # role.members vient du cache: complet seulement avec USE_MEMBERS_INTENT=1
+            for m in role.members:
+                add(m)
+        return list(found.values()), len(dropped)
 
-        # Vérifier permissions d'appelant
-        if message.author.id not in matched.allowed_user_ids:
+    async def _run(self, matched: GrantCommand, ctx: MessageContext) -> None:
+        message = ctx.message
+        me = ctx.bot_member
+        if me is None or not me.guild_permissions.manage_roles:
             return
 
-        # Trouver la cible
-        target = self._parse_target_member(message)
-        if target is None:
+        # Trouver les cibles
+        targets, dropped = await self._parse_targets(ctx)
+        if not targets:
             try:
-                await message.channel.send("Spécifie une cible: ex. !{0} @membre".format(matched.name))
+                await send(
+                    message.channel,
+                    "Spécifie une ou plusieurs cibles: ex. {0}{1} @membre @membre2 (ou @rôle)".format(ctx.prefix, matched.name),
+                    priority=Priority.HIGH,
+                )
             except Exception:
                 pass
             return
 
-        # Assurer le rôle
-        role = await self._ensure_role(message.guild, matched.role_name)
+        # Assurer le rôle (une fois pour toutes les cibles)
+        role = await ensure_role(ctx.guild, matched.role_name, reason="Création auto via grant command")
         if role is None:
             return
 
         # Vérifier hiérarchie
         if role.position >= me.top_role.position:
             try:
-                await message.channel.send(
-                    f"Je ne peux pas gérer le rôle '{role.name}' (position trop haute). Place mon rôle au-dessus."
+                await send(
+                    message.channel,
+                    f"Je ne peux pas gérer le rôle '{role.name}' (position trop haute). Place mon rôle au-dessus.",
+                    priority=Priority.HIGH,
                 )
             except Exception:
                 pass
             return
 
-        # Attribuer
-        if role in target.roles:
-            # déjà présent, rien à faire
-            return
-        try:
-            await target.add_roles(role, reason=f"Grant command '{matched.name}' par {message.author}")
+        # Protégé du budget de dispatch: un gros lot va jusqu'au bout et envoie son résumé
+        await asyncio.shield(self._grant_all(matched, ctx, role, targets, dropped))
+
+    async def _grant_all(
+        self,
+        matched: GrantCommand,
+        ctx: MessageContext,
+        role: discord.Role,
+        targets: List[discord.Member],
+        dropped: int = 0,
+    ) -> None:
+        message = ctx.message
+        pending = [t for t in targets if role not in t.roles]
+        already = len(targets) - len(pending)
+        sem = asyncio.Semaphore(self.concurrency)
+        reason = f"Grant command '{matched.name}' par {message.author}"
+
+        async def grant(target: discord.Member) -> bool:
+            async with sem:
+                try:
+                    await outbound.call(
+                        lambda: target.add_roles(role, reason=reason),
+                        route=("member", target.guild.id, target.id),
+                        priority=Priority.HIGH,
+                    )
+                except Exception as e:
+                    logger.error(f"Échec add rôle {role.name} à {target.display_name} via grant: {e}")
+                    return False
             logger.info(f"Rôle '{role.name}' attribué à {target.display_name} via commande {matched.name}.")
-            # Envoyer le GIF si défini
-            if matched.gif_path:
-                # Préserver relative path depuis racine projet
-                if os.path.exists(matched.gif_path):
-                    try:
-                        await message.channel.send(file=discord.File(matched.gif_path))
-                    except Exception as e:
-                        logger.debug(f"Envoi gif échoué: {e}")
-                else:
-                    logger.debug(f"gif_path introuvable: {matched.gif_path}")
-        except Exception as e:
-            logger.error(f"Échec add rôle {role.name} via grant: {e}")
+            return True
+
+        results = await asyncio.gather(*(grant(t) for t in pending))
+        granted = sum(results)
+        failed = len(results) - granted
+
+        # Envoyer le GIF si défini (chemin relatif à la racine du projet), une fois par commande
+        if granted and matched.gif_path:
+            try:
+                await media_cache.send(message.channel, matched.gif_path, priority=Priority.LOW)
+            except Exception as e:
+                logger.debug(f"Envoi gif échoué: {e}")
+
+        # Une seule réponse récapitulative pour un lot (une cible seule garde le comportement historique)
+        if len(targets) > 1 or failed or dropped:
+            parts = [f"Rôle '{role.name}' attribué à {granted} membre(s)"]
+            if already:
+                parts.append(f"{already} l'avaient déjà")
+            if failed:
+                parts.append(f"{failed} échec(s)")
+            if dropped:
+                parts.append(f"{dropped} cible(s) ignorée(s) au-delà de la limite de {self.max_targets}")
+            try:
+                await send(message.channel, ", ".join(parts) + ".", priority=Priority.HIGH)
+            except Exception:
+                pass
 
 
 register(GrantCommandsFeature())
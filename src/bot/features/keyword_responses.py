@@ -3,12 +3,17 @@ from __future__ import annotations
 import logging
 import json
 import os
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 import discord
 
+from .context import Interest, MessageContext
 from .registry import register
 from ..config.keyword_responses_store import load_keyword_responses
+from ..cooldowns import Cooldown, cooldowns, default_cooldown, parse_cooldown
+from ..matching import MATCH_REGEX, MATCH_SUBSTRING, parse_match_mode, trigger_matcher
+from ..metrics import metrics
+from ..outbound import OutboundDropped, Priority, send
 
 
 logger = logging.getLogger("nyahchan.feature.keyword_responses")
@@ -17,6 +22,9 @@ logger = logging.getLogger("nyahchan.feature.keyword_responses")
 CONFIG_ENV = "KEYWORD_RESPONSES_CONFIG"
 DEFAULT_CONFIG_PATH = "keyword_responses.json"
 
+# Placeholders remplacés à l'envoi dans le titre, la description, les champs et le footer
+TEMPLATE_PLACEHOLDERS = ("{user}", "{user_name}", "{channel}", "{trigger}")
+
 
 class KeywordEmbedConfig:
     """Configuration d'un embed déclenché par un ou plusieurs mots-clés."""
@@ -31,8 +39,16 @@ class KeywordEmbedConfig:
         footer: str | None = None,
         image_url: str | None = None,
         thumbnail_url: str | None = None,
+        match: str = MATCH_SUBSTRING,
+        name: str | None = None,
+        cooldown: Cooldown | None = None,
     ) -> None:
-        self.triggers = [t.lower() for t in triggers]
+        # Les regex gardent leur casse (\W != \w); elles sont compilées insensibles à la casse
+        self.triggers = list(triggers) if match == MATCH_REGEX else [t.lower() for t in triggers]
+        self.match = match
+        # Clé des cooldowns: le nom interne, sinon le premier trigger (stable entre deux reloads)
+        self.name = name or self.triggers[0]
+        self.cooldown = cooldown or Cooldown()
         self.title = title
         self.description = description
         self.color = color
@@ -41,39 +57,81 @@ class KeywordEmbedConfig:
         self.image_url = image_url
         self.thumbnail_url = thumbnail_url
 
-    def build_embed(self) -> discord.Embed:
+        # Embed construit une seule fois au chargement et réutilisé à chaque envoi
+        # (send() ne fait que le sérialiser). Les configs avec placeholders sont
+        # reconstruites à chaque envoi avec les valeurs du message.
+        self.templated = any(
+            ph in text
+            for text in self._texts()
+            for ph in TEMPLATE_PLACEHOLDERS
+        )
+        self._embed = self._build(lambda text: text)
+
+    def _texts(self) -> List[str]:
+        texts = [self.title, self.description, self.footer or ""]
+        for f in self.fields:
+            texts.append(str(f.get("name", "")))
+            texts.append(str(f.get("value", "")))
+        return texts
+
+    def _build(self, render: Callable[[str], str]) -> discord.Embed:
         embed = discord.Embed(
-            title=self.title,
-            description=self.description,
+            title=render(self.title),
+            description=render(self.description),
             color=self.color,
         )
         for f in self.fields:
             embed.add_field(
-                name=f.get("name", ""),
-                value=f.get("value", ""),
+                name=render(f.get("name", "")),
+                value=render(f.get("value", "")),
                 inline=f.get("inline", False),
             )
         if self.footer:
-            embed.set_footer(text=self.footer)
+            embed.set_footer(text=render(self.footer))
         if self.image_url:
             embed.set_image(url=self.image_url)
         if self.thumbnail_url:
             embed.set_thumbnail(url=self.thumbnail_url)
         return embed
 
+    def build_embed(self, values: Dict[str, str] | None = None) -> discord.Embed:
+        """Embed à envoyer: l'instance pré-construite, ou une copie rendue si la config a des placeholders.
+
+        L'embed partagé ne doit pas être modifié par l'appelant.
+        """
+        if not self.templated:
+            return self._embed
+        values = values or {}
+
+        def render(text: str) -> str:
+            for ph in TEMPLATE_PLACEHOLDERS:
+                if ph in text:
+                    text = text.replace(ph, values.get(ph, ""))
+            return text
+
+        return self._build(render)
+
 
 class KeywordResponsesFeature:
     name = "keyword_responses"
+    interests = Interest.TRIGGERS
 
     def __init__(self) -> None:
         # Liste d'embeds configurables; chaque config peut avoir plusieurs triggers.
         self.configs: List[KeywordEmbedConfig] = []
-        # Index rapide: mot-clé -> config
+        # Index rapide: mot-clé -> config (l'ordre d'insertion donne la priorité)
         self._trigger_index: Dict[str, KeywordEmbedConfig] = {}
+        # Clés de _trigger_index dans l'ordre de priorité, publiées dans l'index partagé
+        self._trigger_keys: List[str] = []
+
     def _load_from_store(self) -> None:
-        self.configs.clear()
-        self._trigger_index.clear()
+        # Tout est construit dans des variables locales puis publié d'un coup:
+        # un message traité pendant un reload voit l'ancien ou le nouvel état, jamais un mélange.
+        configs: List[KeywordEmbedConfig] = []
+        trigger_index: Dict[str, KeywordEmbedConfig] = {}
         path = os.getenv(CONFIG_ENV, DEFAULT_CONFIG_PATH)
+        cooldowns.configure()
+        default = default_cooldown()
         try:
             data = load_keyword_responses(path)
             embeds_data = data.get("embeds", [])
@@ -134,6 +192,9 @@ class KeywordResponsesFeature:
                 if thumbnail_url is not None:
                     thumbnail_url = str(thumbnail_url)
 
+                match_mode = parse_match_mode(item.get("match"))
+                name = str(item.get("name") or "").strip() or None
+
                 if triggers and title:
                     cfg = KeywordEmbedConfig(
                         triggers=triggers,
@@ -144,18 +205,32 @@ class KeywordResponsesFeature:
                         footer=footer,
                         image_url=image_url,
                         thumbnail_url=thumbnail_url,
+                        match=match_mode,
+                        name=name,
+                        cooldown=parse_cooldown(item.get("cooldown"), default),
                     )
-                    self.configs.append(cfg)
+                    configs.append(cfg)
                     for trig in cfg.triggers:
-                        self._trigger_index[trig] = cfg
-            logger.info(
-                "KeywordResponsesFeature: %d configuration(s) chargée(s) depuis %s (%d trigger(s)).",
-                len(self.configs),
-                path,
-                len(self._trigger_index),
-            )
+                        trigger_index[trig] = cfg
+            trigger_keys = list(trigger_index)
         except Exception as e:
             logger.error("Erreur lecture config keyword responses (%s): %s", path, e)
+            return
+
+        self.configs, self._trigger_index, self._trigger_keys = configs, trigger_index, trigger_keys
+        # Charge utile = (rang, trigger, config): le rang le plus bas donne la priorité
+        trigger_matcher.publish(
+            self.name,
+            trigger_keys,
+            [(rank, trig, trigger_index[trig]) for rank, trig in enumerate(trigger_keys)],
+            [trigger_index[trig].match for trig in trigger_keys],
+        )
+        logger.info(
+            "KeywordResponsesFeature: %d configuration(s) chargée(s) depuis %s (%d trigger(s)).",
+            len(configs),
+            path,
+            len(trigger_index),
+        )
 
     def setup(self, client: discord.Client) -> None:  # noqa: D401
         self._load_from_store()
@@ -164,21 +239,38 @@ class KeywordResponsesFeature:
         """Recharger la configuration depuis le store JSON."""
         self._load_from_store()
 
-    async def on_message(self, message: discord.Message) -> None:  # noqa: D401
-        if message.author.bot or message.guild is None:
-            return
+    async def on_message(self, message: discord.Message, ctx: MessageContext | None = None) -> None:  # noqa: D401
+        if ctx is None:
+            ctx = MessageContext.build(message)
+            if ctx is None:
+                return
 
-        content = (message.content or "").lower()
-
-        for trig, cfg in self._trigger_index.items():
-            if trig in content:
-                try:
-                    embed = cfg.build_embed()
-                    await message.channel.send(embed=embed)
-                    logger.debug("Embed envoyé pour le mot-clé '%s'", trig)
-                except Exception as e:
-                    logger.warning("Échec de l'envoi de l'embed pour '%s': %s", trig, e)
-                break
+        # Hits calculés une fois par message par l'index partagé; le premier trigger (ordre de config) gagne
+        hits = ctx.hits_for(self.name)
+        if not hits:
+            return
+        _, trig, cfg = min(hits, key=lambda h: h[0])
+        if cooldowns.hit(self.name, cfg.name, message.channel.id, message.author.id, cfg.cooldown):
+            return
+        try:
+            values = None
+            if cfg.templated:
+                values = {
+                    "{user}": message.author.mention,
+                    "{user_name}": getattr(message.author, "display_name", str(message.author)),
+                    "{channel}": getattr(message.channel, "mention", ""),
+                    "{trigger}": trig,
+                }
+            embed = cfg.build_embed(values)
+            # Le même embed déjà en file pour ce salon n'est envoyé qu'une fois
+            coalesce = None if cfg.templated else ("embed", message.channel.id, cfg.name)
+            await send(message.channel, embed=embed, priority=Priority.NORMAL, coalesce=coalesce)
+            metrics.incr("trigger_sent", feature=self.name)
+            logger.debug("Embed envoyé pour le mot-clé '%s'", trig)
+        except OutboundDropped:
+            logger.debug("Embed pour '%s' abandonné (file sortante saturée)", trig)
+        except Exception as e:
+            logger.warning("Échec de l'envoi de l'embed pour '%s': %s", trig, e)
 
 
 register(KeywordResponsesFeature())
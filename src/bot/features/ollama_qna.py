@@ -1,18 +1,98 @@
 from __future__ import annotations
 
 import os
+import json
 import logging
 import asyncio
 import time
+from collections import Counter
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Hashable, Tuple
 import aiohttp
 import discord
+from .context import Interest, MessageContext
 from .registry import register
+from ..answer_cache import answer_cache, normalize_prompt
+from ..config.faq_store import load_faq
+from ..conversations import conversations
+from ..env import env_flag, env_float, env_int
+from ..fairqueue import FairLimiter, QueueFull
+from ..faq_index import FaqMatch, faq_index, fetch_embeddings
+from ..metrics import metrics
+from ..ollama_backends import (
+    DEFAULT_HEALTH_INTERVAL,
+    DEFAULT_MAX_FAILURES,
+    OLLAMA_HEALTH_INTERVAL_ENV,
+    OLLAMA_MAX_FAILURES_ENV,
+    Backend,
+    backend_pool,
+    parse_backends,
+)
+from ..ollama_warmup import DEFAULT_KEEPALIVE_PING, OLLAMA_KEEPALIVE_PING_ENV, OLLAMA_WARMUP_ENV, model_warmer
+from ..outbound import Priority, outbound, send
+from ..singleflight import SingleFlight
 
 logger = logging.getLogger("nyahchan.feature.ollama")
 
+# Pool de connexions HTTP vers Ollama (session unique, gardée ouverte)
+OLLAMA_POOL_SIZE_ENV = "OLLAMA_POOL_SIZE"
+DEFAULT_POOL_SIZE = 8
+OLLAMA_HTTP_KEEPALIVE_ENV = "OLLAMA_HTTP_KEEPALIVE"
+DEFAULT_HTTP_KEEPALIVE = 60.0
+OLLAMA_DNS_TTL_ENV = "OLLAMA_DNS_TTL"
+DEFAULT_DNS_TTL = 300
+# Délai max (s) d'établissement d'une connexion: un serveur éteint est détecté vite
+OLLAMA_CONNECT_TIMEOUT_ENV = "OLLAMA_CONNECT_TIMEOUT"
+DEFAULT_CONNECT_TIMEOUT = 5.0
+
+# Streaming: réponse affichée pendant la génération, puis complétée par éditions
+OLLAMA_STREAM_ENV = "OLLAMA_STREAM"
+# Nombre de caractères reçus avant de poster le premier message
+OLLAMA_STREAM_FIRST_CHARS_ENV = "OLLAMA_STREAM_FIRST_CHARS"
+DEFAULT_STREAM_FIRST_CHARS = 40
+# Intervalle minimal (s) entre deux éditions d'un même message
+OLLAMA_STREAM_EDIT_INTERVAL_ENV = "OLLAMA_STREAM_EDIT_INTERVAL"
+DEFAULT_STREAM_EDIT_INTERVAL = 1.0
+# Ajouté à une réponse streamée interrompue parce que sa question a été supprimée ou remplacée
+STREAM_CANCELLED_NOTE = "\n*(annulé)*"
+
+# Générations simultanées envoyées à Ollama; au-delà, les questions attendent à tour de rôle par auteur
+OLLAMA_CONCURRENCY_ENV = "OLLAMA_CONCURRENCY"
+DEFAULT_CONCURRENCY = 2
+# Questions en attente au total / par auteur avant de répondre "occupée"
+OLLAMA_MAX_QUEUE_ENV = "OLLAMA_MAX_QUEUE"
+DEFAULT_MAX_QUEUE = 20
+OLLAMA_QUEUE_PER_USER_ENV = "OLLAMA_QUEUE_PER_USER"
+DEFAULT_QUEUE_PER_USER = 2
+OLLAMA_BUSY_MESSAGE_ENV = "OLLAMA_BUSY_MESSAGE"
+DEFAULT_BUSY_MESSAGE = "Je réponds déjà à beaucoup de questions, réessaie dans un instant !"
+
+
+# Durée pendant laquelle Ollama garde le modèle chargé après une requête (ex: "30m", "-1" = toujours)
+OLLAMA_MODEL_KEEP_ALIVE_ENV = "OLLAMA_MODEL_KEEP_ALIVE"
+
+
+class OllamaError(Exception):
+    """Échec d'une génération; le message est le texte affiché à l'utilisateur."""
+
+
+class _Failover(OllamaError):
+    """Échec imputable au serveur (injoignable, HTTP 5xx): la question peut repartir sur un autre."""
+
+
+def _http_error(backend: Backend, status: int, text: str) -> OllamaError:
+    message = f"Erreur Ollama ({status}): {text[:500]}"
+    if status >= 500:
+        backend_pool.failure(backend, f"HTTP {status}")
+        return _Failover(message)
+    return OllamaError(message)
+
 
 class OllamaQnAFeature:
     name = "ollama_qna"
+    interests = Interest.MENTION
+    # La génération est déjà bornée par OLLAMA_TIMEOUT: pas de budget de dispatch supplémentaire
+    dispatch_timeout = None
 
     def __init__(self) -> None:
         # L'activation et la configuration dépendent de .env, évalués plus tard dans setup()
@@ -22,6 +102,24 @@ class OllamaQnAFeature:
         self.timeout: int | None = None
         self.prefix = os.getenv("PREFIX", "!")  # Could reuse but we rely on mention; kept for possible future expansion
         self.max_chunk = 1900  # keep some margin under Discord 2000 char limit
+        # Session HTTP partagée par toutes les questions (créée dans setup, fermée par close)
+        self._session: aiohttp.ClientSession | None = None
+        self.stream = True
+        self.stream_first_chars = DEFAULT_STREAM_FIRST_CHARS
+        self.stream_edit_interval = DEFAULT_STREAM_EDIT_INTERVAL
+        # Limite de générations simultanées (file équitable par auteur) et fusion des questions identiques
+        self.limiter = FairLimiter(DEFAULT_CONCURRENCY, DEFAULT_MAX_QUEUE, DEFAULT_QUEUE_PER_USER)
+        self.busy_message = DEFAULT_BUSY_MESSAGE
+        self.keep_alive: str | int | None = None
+        self._flights = SingleFlight()
+        # Réponses en cours, pour les annuler si la question est supprimée ou remplacée
+        self._tasks: Dict[int, asyncio.Task] = {}  # id du message -> tâche de réponse
+        self._by_user: Dict[Tuple[int, int], int] = {}  # (serveur, auteur) -> id de sa question en cours
+        self._cancelled: Dict[int, str] = {}  # id du message -> raison de l'annulation
+        self._streams: Dict[int, "_StreamReply"] = {}  # id du message -> réponse affichée au fil du flux
+        self._waiters: "Counter[Hashable]" = Counter()  # clé de génération -> questions qui l'attendent
+        self._faq_task: asyncio.Task | None = None
+        metrics.gauge("ollama_queue", lambda: {"running": self.limiter.running, "waiting": self.limiter.waiting})
 
     def setup(self, client: discord.Client) -> None:  # noqa: D401
         # Décide ici, après que .env ait été chargé dans main.async_main()
@@ -50,48 +148,267 @@ class OllamaQnAFeature:
             logger.error(f"[ollama] OLLAMA_TIMEOUT invalide: {timeout_raw!r}. Désactivation de la feature.")
             self.enabled = False
             return
+        self.stream = env_flag(OLLAMA_STREAM_ENV, True)
+        self.stream_first_chars = env_int(OLLAMA_STREAM_FIRST_CHARS_ENV, DEFAULT_STREAM_FIRST_CHARS)
+        self.stream_edit_interval = env_float(OLLAMA_STREAM_EDIT_INTERVAL_ENV, DEFAULT_STREAM_EDIT_INTERVAL)
+        self.limiter.limit = env_int(OLLAMA_CONCURRENCY_ENV, DEFAULT_CONCURRENCY, minimum=1)
+        self.limiter.max_waiting = env_int(OLLAMA_MAX_QUEUE_ENV, DEFAULT_MAX_QUEUE)
+        self.limiter.per_key = env_int(OLLAMA_QUEUE_PER_USER_ENV, DEFAULT_QUEUE_PER_USER, minimum=1)
+        self.busy_message = os.getenv(OLLAMA_BUSY_MESSAGE_ENV) or DEFAULT_BUSY_MESSAGE
+        self.keep_alive = _keep_alive(os.getenv(OLLAMA_MODEL_KEEP_ALIVE_ENV))
+        backend_pool.configure(
+            parse_backends(self.base_url),
+            max_failures=env_int(OLLAMA_MAX_FAILURES_ENV, DEFAULT_MAX_FAILURES),
+            health_interval=env_float(OLLAMA_HEALTH_INTERVAL_ENV, DEFAULT_HEALTH_INTERVAL),
+        )
+        conversations.configure()
+        self._session = self._new_session()
+        answer_cache.configure()
+        backend_pool.start(self._get_session)
+        faq_index.configure()
+        self._schedule_faq_build()
+        if env_flag(OLLAMA_WARMUP_ENV, False):
+            # En tâche de fond: le bot se connecte à Discord pendant le chargement du modèle
+            model_warmer.start(
+                self._get_session,
+                backend_pool.backends,
+                self.model,
+                self.keep_alive,
+                env_float(OLLAMA_KEEPALIVE_PING_ENV, DEFAULT_KEEPALIVE_PING),
+            )
         logger.info(
             f"[ollama] Activé | base_url={self.base_url} | model={self.model} | timeout={self.timeout}s | max_chunk={self.max_chunk}"
+            f" | concurrence={self.limiter.limit} | faq={'oui' if faq_index.enabled else 'non'} | conversation={'oui' if conversations.enabled else 'non'} | stream={'oui' if self.stream else 'non'} | cache={f'{answer_cache.ttl:.0f}s' if answer_cache.enabled else 'non'}"
+        )
+
+    @property
+    def ready(self) -> bool:
+        """Modèle chargé sur tous les serveurs (toujours vrai sans OLLAMA_WARMUP)."""
+        return self.enabled and (not model_warmer.ready or model_warmer.all_ready)
+
+    def _new_session(self) -> aiohttp.ClientSession:
+        """Session avec pool de connexions keep-alive et cache DNS (OLLAMA_POOL_SIZE, OLLAMA_HTTP_KEEPALIVE, OLLAMA_DNS_TTL)."""
+        pool_size = env_int(OLLAMA_POOL_SIZE_ENV, DEFAULT_POOL_SIZE, minimum=1)
+        dns_ttl = env_int(OLLAMA_DNS_TTL_ENV, DEFAULT_DNS_TTL)
+        connector = aiohttp.TCPConnector(
+            limit=pool_size,
+            limit_per_host=pool_size,
+            keepalive_timeout=env_float(OLLAMA_HTTP_KEEPALIVE_ENV, DEFAULT_HTTP_KEEPALIVE),
+            use_dns_cache=dns_ttl > 0,
+            ttl_dns_cache=dns_ttl or None,
         )
+        timeout = aiohttp.ClientTimeout(
+            total=self.timeout, sock_connect=env_float(OLLAMA_CONNECT_TIMEOUT_ENV, DEFAULT_CONNECT_TIMEOUT) or None
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Recréée si elle a été fermée entre-temps (ex: close() puis nouveau message)
+        if self._session is None or self._session.closed:
+            self._session = self._new_session()
+        return self._session
+
+    async def close(self) -> None:
+        """Fermer la session HTTP et arrêter les sondes de santé (appelé à l'arrêt du bot)."""
+        backend_pool.stop()
+        model_warmer.stop()
+        if self._faq_task is not None:
+            self._faq_task.cancel()
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+        answer_cache.close()
+
+    def reload(self) -> None:
+        """Reconstruire l'index de la FAQ après modification de faq.json (webGUI)."""
+        if self.enabled:
+            self._schedule_faq_build()
+
+    def _schedule_faq_build(self) -> None:
+        if not faq_index.enabled:
+            return
+        if self._faq_task is not None:
+            self._faq_task.cancel()
+        # En tâche de fond: les embeddings peuvent prendre quelques secondes au démarrage
+        self._faq_task = asyncio.get_running_loop().create_task(self._build_faq())
+
+    async def _build_faq(self) -> None:
+        try:
+            await faq_index.build(load_faq().get("entries", []), self._embed)
+        except Exception as e:
+            logger.warning(f"[faq] Construction de l'index impossible (modèle {faq_index.model!r}): {e}")
+
+    async def _embed(self, texts: list[str]) -> list[list[float]]:
+        backend = backend_pool.pick()
+        if backend is None:
+            raise OllamaError("(Aucun serveur Ollama configuré)")
+        with backend_pool.use(backend):
+            return await fetch_embeddings(self._get_session(), backend.url, faq_index.model, texts)
 
-    async def _query_ollama(self, prompt: str) -> str:
-        # Use /api/generate endpoint (simpler, stateless)
-        url = f"{self.base_url.rstrip('/')}/api/generate"
-        payload = {"model": self.model, "prompt": prompt, "stream": False}
+    async def _faq_lookup(self, prompt: str) -> FaqMatch | None:
+        """Entrée de la FAQ assez proche de la question, ou None (index absent, embedding en échec)."""
+        if not faq_index.ready:
+            return None
         try:
-            start = time.perf_counter()
-            logger.debug(f"[ollama] POST {url} model={self.model} prompt_len={len(prompt)}")
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                async with session.post(url, json=payload) as resp:
+            vectors = await self._embed([normalize_prompt(prompt)])
+        except Exception as e:
+            logger.debug(f"[faq] Embedding de la question impossible: {e}")
+            return None
+        return faq_index.best(vectors[0])
+
+    def _request(self, prompt: str, history: list | None, stream: bool) -> tuple[str, dict]:
+        """Chemin et corps de la requête: /api/chat avec l'historique en mode conversation, sinon /api/generate."""
+        if history is not None:
+            messages = history + [{"role": "user", "content": prompt}]
+            payload = {"model": self.model, "messages": messages, "stream": stream}
+            path = "/api/chat"
+        else:
+            # Use /api/generate endpoint (simpler, stateless)
+            payload = {"model": self.model, "prompt": prompt, "stream": stream}
+            path = "/api/generate"
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return path, payload
+
+    def _next_backend(self, tried: list[Backend], error: OllamaError | None) -> Backend:
+        """Serveur suivant à essayer; relève `error` quand il n'en reste plus."""
+        backend = backend_pool.pick(exclude=tried)
+        if backend is None:
+            raise error or OllamaError("(Aucun serveur Ollama configuré)")
+        if error is not None:
+            metrics.incr("ollama_failover")
+            logger.warning(f"[ollama] Nouvel essai sur {backend.url} après: {error}")
+        tried.append(backend)
+        return backend
+
+    async def _query_ollama(self, prompt: str, history: list | None = None) -> str:
+        """Réponse complète à `prompt`; lève OllamaError en cas d'échec.
+
+        Un serveur injoignable ou en erreur 5xx est signalé au pool et la
+        question repart sur le serveur suivant.
+        """
+        tried: list[Backend] = []
+        error: OllamaError | None = None
+        while True:
+            backend = self._next_backend(tried, error)
+            try:
+                return await self._query_backend(backend, prompt, history)
+            except _Failover as e:
+                error = e
+
+    async def _query_backend(self, backend: Backend, prompt: str, history: list | None) -> str:
+        path, payload = self._request(prompt, history, stream=False)
+        url = backend.url + path
+        start = time.perf_counter()
+        try:
+            with backend_pool.use(backend):
+                logger.debug(f"[ollama] POST {url} model={self.model} prompt_len={len(prompt)}")
+                async with self._get_session().post(url, json=payload) as resp:
                     dur = (time.perf_counter() - start) * 1000
                     if resp.status != 200:
                         text = await resp.text()
-                        logger.warning(f"[ollama] HTTP {resp.status} en {dur:.0f}ms: {text[:200]}")
-                        return f"Erreur Ollama ({resp.status}): {text[:500]}"
+                        logger.warning(f"[ollama] HTTP {resp.status} en {dur:.0f}ms ({backend.url}): {text[:200]}")
+                        raise _http_error(backend, resp.status, text)
                     data = await resp.json()
-                    # Response key may be 'response'
-                    answer = str(data.get("response", "(Réponse vide)")).strip()
+                    answer = (_text_of(data) or "(Réponse vide)").strip()
                     logger.debug(f"[ollama] Réponse OK en {dur:.0f}ms, len={len(answer)}")
-                    return answer
+            backend_pool.success(backend, time.perf_counter() - start)
+            return answer
+        except OllamaError:
+            raise
+        except aiohttp.ClientConnectionError as e:
+            # Y compris le délai de connexion dépassé (OLLAMA_CONNECT_TIMEOUT)
+            backend_pool.failure(backend, repr(e))
+            raise _Failover(f"(Erreur Ollama: {e})") from e
         except asyncio.TimeoutError:
-            logger.warning("[ollama] Timeout de la requête")
-            return "(Timeout de la requête Ollama)"
+            logger.warning(f"[ollama] Timeout de la requête ({backend.url})")
+            backend_pool.failure(backend, "timeout")
+            raise OllamaError("(Timeout de la requête Ollama)") from None
         except Exception as e:
             logger.error(f"[ollama] Exception requête: {e}")
-            return f"(Erreur Ollama: {e})"
+            raise OllamaError(f"(Erreur Ollama: {e})") from e
+
+    async def _stream_ollama(self, prompt: str, history: list | None = None) -> AsyncIterator[str]:
+        """Morceaux de la réponse au fil de la génération (flux NDJSON de /api/generate ou /api/chat).
+
+        Comme `_query_ollama`, lève OllamaError en cas d'échec (éventuellement après
+        quelques morceaux). Un autre serveur n'est essayé que si rien n'a encore été reçu.
+        """
+        tried: list[Backend] = []
+        error: OllamaError | None = None
+        while True:
+            backend = self._next_backend(tried, error)
+            received = False
+            try:
+                async with aclosing(self._stream_backend(backend, prompt, history)) as stream:
+                    async for piece in stream:
+                        received = True
+                        yield piece
+                return
+            except _Failover as e:
+                if received:
+                    raise OllamaError(str(e)) from e
+                error = e
 
-    async def on_message(self, message: discord.Message) -> None:  # noqa: D401
+    async def _stream_backend(self, backend: Backend, prompt: str, history: list | None) -> AsyncIterator[str]:
+        path, payload = self._request(prompt, history, stream=True)
+        url = backend.url + path
+        start = time.perf_counter()
+        try:
+            with backend_pool.use(backend):
+                logger.debug(f"[ollama] POST {url} (stream) model={self.model} prompt_len={len(prompt)}")
+                async with self._get_session().post(url, json=payload) as resp:
+                    if resp.status != 200:
+                        text = await resp.text()
+                        logger.warning(f"[ollama] HTTP {resp.status} ({backend.url}): {text[:200]}")
+                        raise _http_error(backend, resp.status, text)
+                    first = True
+                    async for line in resp.content:
+                        if not line.strip():
+                            continue
+                        try:
+                            data = json.loads(line)
+                        except ValueError:
+                            logger.debug(f"[ollama] Ligne de flux invalide ignorée: {line[:200]!r}")
+                            continue
+                        if "error" in data:
+                            raise OllamaError(f"(Erreur Ollama: {data['error']})")
+                        piece = _text_of(data)
+                        if piece:
+                            if first:
+                                first = False
+                                metrics.observe("ollama_first_token_seconds", time.perf_counter() - start)
+                            yield piece
+                        if data.get("done"):
+                            break
+            backend_pool.success(backend, time.perf_counter() - start)
+            logger.debug(f"[ollama] Flux terminé en {(time.perf_counter() - start) * 1000:.0f}ms")
+        except OllamaError:
+            raise
+        except aiohttp.ClientConnectionError as e:
+            # Y compris le délai de connexion dépassé (OLLAMA_CONNECT_TIMEOUT)
+            backend_pool.failure(backend, repr(e))
+            raise _Failover(f"(Erreur Ollama: {e})") from e
+        except asyncio.TimeoutError:
+            logger.warning(f"[ollama] Timeout de la requête ({backend.url})")
+            backend_pool.failure(backend, "timeout")
+            raise OllamaError("(Timeout de la requête Ollama)") from None
+        except Exception as e:
+            logger.error(f"[ollama] Exception requête: {e}")
+            raise OllamaError(f"(Erreur Ollama: {e})") from e
+
+    async def on_message(self, message: discord.Message, ctx: MessageContext | None = None) -> None:  # noqa: D401
         if not self.enabled:
             return
-        if message.author.bot or message.guild is None:
-            return
+        if ctx is None:
+            ctx = MessageContext.build(message)
+            if ctx is None:
+                return
         # Trigger: bot mention + un point d'interrogation dans le contenu
-        if not message.mentions:
+        bot_user = ctx.bot_member
+        if bot_user is None or not ctx.mentions_bot:
             return
-        bot_user = message.guild.me
-        if bot_user is None or bot_user not in message.mentions:
-            return
-        content = (message.content or "").strip()
+        content = ctx.content.strip()
         # Remove mention markup from prompt
         cleaned = content.replace(f"<@{bot_user.id}>", "").replace(f"<@!{bot_user.id}>", "").strip()
         if not cleaned:
@@ -106,11 +423,128 @@ class OllamaQnAFeature:
             )
         except Exception:
             pass
-        await self._answer(message, cleaned)
+        await self._run_answer(message, cleaned)
+
+    async def on_message_delete(self, message_id: int) -> None:
+        """Question supprimée: abandonner sa réponse si elle est encore en cours."""
+        self.cancel(message_id, "deleted")
+
+    def cancel(self, message_id: int, reason: str) -> bool:
+        """Annuler la réponse en cours à `message_id`; False s'il n'y en a pas."""
+        task = self._tasks.get(message_id)
+        if task is None or task.done():
+            return False
+        self._cancelled[message_id] = reason
+        task.cancel()
+        metrics.incr("ollama_cancelled", reason=reason)
+        logger.info(f"[ollama] Réponse au message {message_id} annulée ({reason})")
+        return True
+
+    async def _run_answer(self, message: discord.Message, prompt: str) -> None:
+        """Répondre dans une tâche suivie par message et par auteur.
+
+        Une nouvelle question du même auteur sur le même serveur annule la
+        précédente si elle n'a pas encore reçu sa réponse.
+        """
+        user_key = (message.guild.id, message.author.id)
+        previous = self._by_user.get(user_key)
+        if previous is not None:
+            self.cancel(previous, "superseded")
+        task = asyncio.ensure_future(self._answer(message, prompt))
+        self._tasks[message.id] = task
+        self._by_user[user_key] = message.id
+        try:
+            await task
+        except asyncio.CancelledError:
+            if self._cancelled.pop(message.id, None) is None:
+                # Annulation du dispatch lui-même (arrêt du bot): propager à la réponse
+                task.cancel()
+                raise
+        finally:
+            self._tasks.pop(message.id, None)
+            self._cancelled.pop(message.id, None)
+            if self._by_user.get(user_key) == message.id:
+                del self._by_user[user_key]
 
     async def _answer(self, message: discord.Message, prompt: str) -> None:
-        # Query Ollama
-        answer = await self._query_ollama(prompt)
+        if faq_index.enabled:
+            match = await self._faq_lookup(prompt)
+            if match is not None:
+                logger.debug(f"[faq] Réponse servie depuis la FAQ ({match.question!r}, similarité {match.score:.3f})")
+                await self._send_chunks(message, match.answer)
+                self._remember(message, prompt, match.answer)
+                return
+        key = answer_cache.key(self.model, prompt)
+        # En mode conversation, une question de suivi dépend de l'historique du salon:
+        # ni cache ni fusion avec la même question posée ailleurs
+        history = conversations.history(message.channel.id) if conversations.enabled else None
+        if history:
+            key = (*key, message.channel.id)
+        else:
+            cached = await answer_cache.get(key)
+            if cached is not None:
+                logger.debug(f"[ollama] Réponse servie depuis le cache (len={len(cached)})")
+                await self._send_chunks(message, cached)
+                self._remember(message, prompt, cached)
+                return
+        # Une même question déjà en cours de génération: attendre sa réponse au lieu d'en relancer une
+        leader = key not in self._flights
+        self._waiters[key] += 1
+        try:
+            answer = await self._flights.do(key, lambda: self._generate(message, prompt, key, history))
+        except asyncio.CancelledError:
+            # Plus personne n'attend cette génération: l'arrêter, ce qui ferme le flux HTTP
+            # et libère le serveur Ollama (une génération partagée continue pour les autres,
+            # qui recevront la réponse complète, mais n'est plus affichée sous cette question)
+            if self._waiters[key] == 1 and self._flights.cancel(key):
+                metrics.incr("ollama_generation_aborted")
+            reply = self._streams.get(message.id) if leader else None
+            if reply is not None:
+                await reply.abort(STREAM_CANCELLED_NOTE)
+            raise
+        except QueueFull as e:
+            metrics.incr("ollama_busy")
+            logger.info(f"[ollama] File pleine ({e}), question de {message.author.id} refusée")
+            try:
+                await send(message.channel, self.busy_message, priority=Priority.HIGH)
+            except Exception as e2:
+                logger.debug(f"Échec envoi message 'occupée': {e2}")
+            return
+        except OllamaError as e:
+            # En streaming, l'initiateur a déjà vu l'erreur dans sa réponse
+            if not (leader and self.stream):
+                await self._send_chunks(message, str(e))
+            return
+        else:
+            if not leader:
+                metrics.incr("ollama_coalesced")
+                await self._send_chunks(message, answer or "(Réponse vide)")
+            self._remember(message, prompt, answer)
+        finally:
+            self._waiters[key] -= 1
+            if self._waiters[key] <= 0:
+                del self._waiters[key]
+
+    def _remember(self, message: discord.Message, prompt: str, answer: str) -> None:
+        if conversations.enabled and answer:
+            conversations.record(message.channel.id, prompt, answer)
+
+    async def _generate(self, message: discord.Message, prompt: str, key, history: list | None) -> str:
+        """Générer et afficher la réponse à `message`, sous le limiteur; lève OllamaError ou QueueFull."""
+        async with self.limiter.slot(message.author.id) as waited:
+            metrics.observe("ollama_queue_wait_seconds", waited)
+            if self.stream:
+                answer = await self._answer_stream(message, prompt, history)
+            else:
+                # Query Ollama
+                answer = await self._query_ollama(prompt, history)
+                await self._send_chunks(message, answer)
+        # Seules les réponses complètes et sans historique sont mises en cache (pas les erreurs)
+        if answer and not history:
+            await answer_cache.put(key, answer)
+        return answer
+
+    async def _send_chunks(self, message: discord.Message, answer: str) -> None:
         # Force markdown formatting (wrap in triple backticks if looks codey?)
         # For simplicity, send as-is; ensure chunking
         chunks = self._chunk(answer)
@@ -119,12 +553,38 @@ class OllamaQnAFeature:
             header = f"(part {idx}/{len(chunks)})\n" if len(chunks) > 1 else ""
             out = header + ch
             try:
-                await message.channel.send(out)
+                await send(message.channel, out, priority=Priority.NORMAL)
                 logger.debug(f"[ollama] Chunk {idx}/{len(chunks)} envoyé (len={len(out)})")
             except Exception as e:
                 logger.debug(f"Échec envoi chunk réponse Ollama: {e}")
                 break
 
+    async def _answer_stream(self, message: discord.Message, prompt: str, history: list | None = None) -> str:
+        """Afficher la réponse au fil du flux et renvoyer son texte complet; lève OllamaError après l'avoir affichée."""
+        reply = _StreamReply(message.channel, self.max_chunk, self.stream_first_chars, self.stream_edit_interval)
+        self._streams[message.id] = reply
+        parts: list[str] = []
+        try:
+            # aclosing: sortir de la boucle ferme aussi la requête HTTP en cours
+            async with aclosing(self._stream_ollama(prompt, history)) as stream:
+                async for piece in stream:
+                    parts.append(piece)
+                    # Même si Discord refuse l'affichage, la réponse reste lue jusqu'au bout
+                    # pour le cache et les questions identiques en attente
+                    await reply.feed(piece)
+        except OllamaError as e:
+            await reply.feed(f"\n{e}")
+            await reply.finish()
+            raise
+        except asyncio.CancelledError:
+            await reply.abort(STREAM_CANCELLED_NOTE)
+            raise
+        finally:
+            self._streams.pop(message.id, None)
+        await reply.finish()
+        logger.debug(f"[ollama] Réponse streamée en {reply.sent} message(s)")
+        return "".join(parts).strip()
+
     def _chunk(self, text: str) -> list[str]:
         if len(text) <= self.max_chunk:
             return [text]
@@ -137,4 +597,126 @@ class OllamaQnAFeature:
         return parts
 
 
+class _StreamReply:
+    """Réponse affichée au fil du flux: un premier message dès `first_chars` caractères,
+    puis des éditions espacées d'au moins `edit_interval` secondes.
+
+    Au-delà de `max_chunk` caractères, le message courant est figé et la suite
+    part dans un nouveau message. Les éditions passent par l'ordonnanceur sortant
+    et sont fusionnées par message: une édition en attente envoie toujours le
+    texte le plus récent. Après `abort`, plus rien n'est affiché.
+    """
+
+    def __init__(self, channel: discord.abc.Messageable, max_chunk: int, first_chars: int, edit_interval: float) -> None:
+        self.channel = channel
+        self.max_chunk = max_chunk
+        self.first_chars = first_chars
+        self.edit_interval = edit_interval
+        self.sent = 0
+        self._text = ""  # contenu voulu du message courant
+        self._current: discord.Message | None = None
+        self._shown = ""  # contenu du message courant côté Discord
+        self._last_edit = 0.0
+        self._latest: Dict[int, str] = {}
+        self._failed = False
+        self._last: tuple[discord.Message, str] | None = None  # dernier message posté et son contenu
+        self._note: str | None = None  # posé par abort
+
+    async def feed(self, piece: str) -> bool:
+        """Ajouter un morceau; False si l'envoi vers Discord a échoué ou si l'affichage est abandonné."""
+        if self._note is not None:
+            return False
+        self._text += piece
+        if self._current is None and len(self._text.strip()) < self.first_chars:
+            return True
+        if self._current is None or len(self._text) > self.max_chunk or (
+            time.monotonic() - self._last_edit >= self.edit_interval
+        ):
+            await self._flush()
+        return not self._failed
+
+    async def finish(self) -> None:
+        if self._note is not None:
+            return
+        await self._flush()
+        if self.sent == 0 and not self._failed:
+            await self._post("(Réponse vide)")
+
+    async def abort(self, note: str) -> None:
+        """Arrêter l'affichage et ajouter `note` au dernier message posté (une seule fois)."""
+        if self._note is not None:
+            return
+        self._note = note
+        if self._last is not None:
+            await self._mark(*self._last)
+
+    async def _flush(self) -> None:
+        while not self._failed and self._note is None and len(self._text) > self.max_chunk:
+            head, self._text = self._text[: self.max_chunk], self._text[self.max_chunk:]
+            await self._show(head)
+            self._current, self._shown = None, ""
+        if not self._failed and self._note is None and self._text.strip() and self._text != self._shown:
+            await self._show(self._text)
+
+    async def _show(self, text: str) -> None:
+        if self._current is None:
+            self._current = await self._post(text)
+            self._shown = text
+            if self._current is not None:
+                self._last = (self._current, text)
+                # Abandon survenu pendant l'envoi: marquer aussi ce message
+                if self._note is not None:
+                    await self._mark(self._current, text)
+        elif text != self._shown:
+            self._last = (self._current, text)
+            await self._edit(self._current, text)
+            self._shown = text
+
+    async def _mark(self, msg: discord.Message, text: str) -> None:
+        await self._edit(msg, text + (self._note or ""))
+
+    async def _post(self, text: str) -> discord.Message | None:
+        try:
+            msg = await send(self.channel, text, priority=Priority.NORMAL)
+        except Exception as e:
+            logger.debug(f"Échec envoi réponse Ollama: {e}")
+            self._failed = True
+            return None
+        self.sent += 1
+        self._last_edit = time.monotonic()
+        return msg
+
+    async def _edit(self, msg: discord.Message, text: str) -> None:
+        self._latest[msg.id] = text
+        try:
+            await outbound.call(
+                lambda: msg.edit(content=self._latest[msg.id]),
+                route=("channel", msg.channel.id),
+                priority=Priority.NORMAL,
+                coalesce=("edit", msg.id),
+            )
+        except Exception as e:
+            logger.debug(f"Échec édition réponse Ollama: {e}")
+            self._failed = True
+        self._last_edit = time.monotonic()
+
+
+def _text_of(data: dict) -> str:
+    """Texte d'une réponse (ou d'un morceau de flux) de /api/generate ou /api/chat."""
+    if "message" in data:
+        return str((data.get("message") or {}).get("content") or "")
+    return str(data.get("response") or "")
+
+
+def _keep_alive(raw: str | None) -> str | int | None:
+    """OLLAMA_MODEL_KEEP_ALIVE tel qu'attendu par Ollama: secondes (nombre) ou durée ("30m")."""
+    if raw is None or not raw.strip():
+        return None
+    raw = raw.strip()
+    try:
+        return int(raw)
+    except ValueError:
+        return raw
+
+
 register(OllamaQnAFeature())
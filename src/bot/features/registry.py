@@ -1,8 +1,24 @@
 from __future__ import annotations
 
-from typing import Awaitable, Callable, List, Protocol
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Protocol
 import discord
 
+from .context import Interest, MessageContext, get_prefix
+from ..env import parse_float
+
+logger = logging.getLogger("nyahchan.registry")
+
+# Mode de dispatch: "concurrent" (défaut) ou "sequential" (comportement historique)
+DISPATCH_MODE_ENV = "DISPATCH_MODE"
+# Budget de temps par défaut (secondes) accordé à chaque feature pour un message; 0 = illimité
+DISPATCH_TIMEOUT_ENV = "DISPATCH_TIMEOUT"
+DEFAULT_DISPATCH_TIMEOUT = 15.0
+# Liste de features (séparées par des virgules) à exécuter dans l'ordre d'enregistrement
+DISPATCH_ORDERED_ENV = "DISPATCH_ORDERED"
+
 
 class Feature(Protocol):
     name: str
@@ -14,16 +30,122 @@ class Feature(Protocol):
         ...
 
 
+# Attributs optionnels lus sur une feature par le dispatcher :
+#   interests: Interest            -> routage: la feature ne reçoit que ces messages, avec le
+#                                     MessageContext partagé en second argument de on_message.
+#                                     Sans cet attribut, elle reçoit tous les messages (sans contexte).
+#   Interest.TRIGGERS              -> la feature publie ses motifs dans matching.trigger_matcher
+#                                     sous son nom et n'est routée que si l'un d'eux est trouvé
+#   command_names: set[str]        -> avec Interest.COMMAND, limite aux commandes listées
+#   Interest.NONE                  -> jamais routée (ex: commandes publiées dans features.router)
+#   enabled: bool                  -> False = la feature n'est pas routée
+#   ordered: bool                  -> exécutée dans la chaîne séquentielle (ordre d'enregistrement)
+#   dispatch_timeout: float | None -> budget propre (None = illimité), sinon DISPATCH_TIMEOUT
+#   async close()                  -> appelée par close_all() à l'arrêt du bot
+#   async on_message_delete(id)    -> appelée par dispatch_message_delete() quand un message est supprimé
+# Les deux peuvent être surchargés par l'environnement :
+#   DISPATCH_ORDERED=role_triggers,grant_commands
+#   DISPATCH_TIMEOUT_<NOM>=secondes (ex: DISPATCH_TIMEOUT_OLLAMA_QNA=0)
+
 _features: List[Feature] = []
 
+_concurrent: bool = True
+_default_timeout: float | None = DEFAULT_DISPATCH_TIMEOUT
+_ordered_names: set[str] = set()
+_prefix: str = "!"
+
+# Table de routage, reconstruite après setup_all()/reload_all()
+_legacy: List[Feature] = []
+_text: List[Feature] = []
+_triggers: List[Feature] = []
+_mention: List[Feature] = []
+_any_command: List[Feature] = []
+_by_command: Dict[str, List[Feature]] = {}
+
 
 def register(feature: Feature) -> None:
     _features.append(feature)
 
 
+def _parse_timeout(raw: str | None, default: float | None, name: str) -> float | None:
+    # 0 ou négatif = pas de budget
+    value = parse_float(raw, default, name, minimum=None)
+    return value if value is None or value > 0 else None
+
+
+def _load_dispatch_config() -> None:
+    global _concurrent, _default_timeout, _ordered_names
+    mode = os.getenv(DISPATCH_MODE_ENV, "concurrent").strip().lower()
+    _concurrent = mode != "sequential"
+    _default_timeout = _parse_timeout(os.getenv(DISPATCH_TIMEOUT_ENV), DEFAULT_DISPATCH_TIMEOUT, DISPATCH_TIMEOUT_ENV)
+    raw_ordered = os.getenv(DISPATCH_ORDERED_ENV)
+    if raw_ordered is None:
+        _ordered_names = {f.name for f in _features if getattr(f, "ordered", False)}
+    else:
+        _ordered_names = {n.strip() for n in raw_ordered.split(",") if n.strip()}
+    logger.info(
+        "Dispatch %s | timeout=%s | features ordonnées=%s",
+        "concurrent" if _concurrent else "séquentiel",
+        f"{_default_timeout}s" if _default_timeout else "illimité",
+        ", ".join(sorted(_ordered_names)) or "-",
+    )
+
+
+def _timeout_for(feature: Feature) -> float | None:
+    env_name = f"{DISPATCH_TIMEOUT_ENV}_{feature.name.upper()}"
+    env_raw = os.getenv(env_name)
+    if env_raw is not None:
+        return _parse_timeout(env_raw, _default_timeout, env_name)
+    if hasattr(feature, "dispatch_timeout"):
+        return getattr(feature, "dispatch_timeout")
+    return _default_timeout
+
+
+def _build_routes() -> None:
+    """Construire la table de routage à partir des intérêts déclarés par les features."""
+    global _legacy, _text, _triggers, _mention, _any_command, _by_command
+    legacy: List[Feature] = []
+    text: List[Feature] = []
+    triggers: List[Feature] = []
+    mention: List[Feature] = []
+    any_command: List[Feature] = []
+    by_command: Dict[str, List[Feature]] = {}
+    for f in _features:
+        if not getattr(f, "enabled", True):
+            continue
+        interests = getattr(f, "interests", None)
+        if interests is None:
+            legacy.append(f)
+            continue
+        if Interest.TEXT in interests:
+            text.append(f)
+        if Interest.TRIGGERS in interests:
+            triggers.append(f)
+        if Interest.MENTION in interests:
+            mention.append(f)
+        if Interest.COMMAND in interests:
+            names = getattr(f, "command_names", None)
+            if names is None:
+                any_command.append(f)
+            else:
+                for n in names:
+                    by_command.setdefault(n, []).append(f)
+    _legacy, _text, _triggers, _mention, _any_command, _by_command = (
+        legacy, text, triggers, mention, any_command, by_command,
+    )
+    logger.debug(
+        "Routage: %d legacy, %d texte, %d triggers, %d mention, %d commande(s) nommée(s)",
+        len(legacy), len(text), len(triggers), len(mention), len(by_command),
+    )
+
+
 def setup_all(client: discord.Client) -> None:
+    global _prefix
+    _load_dispatch_config()
+    _prefix = get_prefix()
     for f in _features:
         f.setup(client)
+    _build_routes()
 
 
 def reload_all() -> None:
@@ -32,8 +154,88 @@ def reload_all() -> None:
         reload_fn = getattr(f, "reload", None)
         if callable(reload_fn):
             reload_fn()
+    _build_routes()
 
 
-async def dispatch_on_message(message: discord.Message) -> None:
+async def close_all() -> None:
+    """Libérer les ressources des features qui exposent close() (sessions HTTP...), à l'arrêt."""
+    for f in _features:
+        close_fn = getattr(f, "close", None)
+        if not callable(close_fn):
+            continue
+        try:
+            await close_fn()
+        except Exception:
+            logger.exception("Erreur à la fermeture de la feature '%s'", f.name)
+
+
+async def dispatch_message_delete(message_id: int) -> None:
+    """Prévenir les features qui exposent on_message_delete (ex: annuler une réponse en cours)."""
     for f in _features:
-        await f.on_message(message)
+        handler = getattr(f, "on_message_delete", None)
+        if not callable(handler) or not getattr(f, "enabled", True):
+            continue
+        try:
+            await handler(message_id)
+        except Exception:
+            logger.exception("Erreur dans la feature '%s' (suppression du message %s)", f.name, message_id)
+
+
+def _route(ctx: MessageContext) -> List[Feature]:
+    """Features concernées par ce message, dans l'ordre d'enregistrement."""
+    selected: set[int] = {id(f) for f in _legacy}
+    if ctx.lowered:
+        selected.update(id(f) for f in _text)
+        if _triggers:
+            hits = ctx.trigger_hits
+            selected.update(id(f) for f in _triggers if f.name in hits)
+    if ctx.mentions_bot:
+        selected.update(id(f) for f in _mention)
+    if ctx.command is not None:
+        selected.update(id(f) for f in _any_command)
+        selected.update(id(f) for f in _by_command.get(ctx.command, ()))
+    if not selected:
+        return []
+    return [f for f in _features if id(f) in selected]
+
+
+async def _run_feature(feature: Feature, message: discord.Message, ctx: MessageContext) -> None:
+    """Exécuter une feature en isolant ses erreurs et en appliquant son budget de temps."""
+    timeout = _timeout_for(feature)
+    if getattr(feature, "interests", None) is None:
+        coro = feature.on_message(message)
+    else:
+        coro = feature.on_message(message, ctx)  # type: ignore[call-arg]
+    try:
+        if timeout is None:
+            await coro
+        else:
+            await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Feature '%s' annulée: budget de %.1fs dépassé (message %s)", feature.name, timeout, message.id)
+    except Exception:
+        logger.exception("Erreur dans la feature '%s' (message %s)", feature.name, message.id)
+
+
+async def _run_chain(features: List[Feature], message: discord.Message, ctx: MessageContext) -> None:
+    for f in features:
+        await _run_feature(f, message, ctx)
+
+
+async def dispatch_on_message(message: discord.Message) -> None:
+    ctx = MessageContext.build(message, _prefix)
+    if ctx is None:
+        return
+    features = _route(ctx)
+    if not features:
+        return
+    if not _concurrent:
+        await _run_chain(features, message, ctx)
+        return
+
+    ordered = [f for f in features if f.name in _ordered_names]
+    jobs: List[Awaitable[None]] = [_run_feature(f, message, ctx) for f in features if f.name not in _ordered_names]
+    if ordered:
+        jobs.append(_run_chain(ordered, message, ctx))
+    # gather annule les tâches filles si le dispatch lui-même est annulé (arrêt du bot)
+    await asyncio.gather(*jobs)
@@ -4,10 +4,17 @@ import os
 import json
 import logging
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Tuple
 import discord
 
+from .context import Interest, MessageContext
 from .registry import register
+from ..cooldowns import Cooldown, cooldowns, default_cooldown, parse_cooldown
+from ..matching import MATCH_REGEX, MATCH_SUBSTRING, parse_match_mode, trigger_matcher
+from ..members import member_cache
+from ..metrics import metrics
+from ..outbound import react
+from ..roles import ensure_role, role_batcher
 
 logger = logging.getLogger("nyahchan.feature.roles")
 
@@ -19,41 +26,69 @@ class RoleTrigger:
     trigger: str
     role_name: str
     remove_trigger: str | None = None
+    match: str = MATCH_SUBSTRING
+    cooldown: Cooldown = Cooldown()
 
 
 class RoleTriggersFeature:
     name = "role_triggers"
+    interests = Interest.TRIGGERS
 
     def __init__(self) -> None:
         self.triggers: List[RoleTrigger] = []
         self.reactions_enabled = os.getenv("REACTIONS_ENABLED", "1") not in ("0", "false", "False")
     def _load_from_config(self) -> None:
-        self.triggers.clear()
+        triggers: List[RoleTrigger] = []
+        cooldowns.configure()
+        role_batcher.configure()
+        default = default_cooldown()
         if os.path.exists(CONFIG_PATH):
             try:
                 with open(CONFIG_PATH, "r", encoding="utf-8") as f:
                     data = json.load(f)
                 for item in data.get("triggers", []):
+                    match = parse_match_mode(item.get("match"))
+                    # Les regex gardent leur casse (\W != \w); elles sont compilées insensibles à la casse
+                    norm = (lambda t: t) if match == MATCH_REGEX else str.lower
                     rt = RoleTrigger(
-                        trigger=str(item.get("trigger", "")).lower(),
+                        trigger=norm(str(item.get("trigger", ""))),
                         role_name=str(item.get("role_name", "")).strip(),
-                        remove_trigger=(str(item.get("remove_trigger")) if item.get("remove_trigger") else None)
+                        remove_trigger=(norm(str(item.get("remove_trigger"))) if item.get("remove_trigger") else None),
+                        match=match,
+                        cooldown=parse_cooldown(item.get("cooldown"), default),
                     )
                     if rt.trigger and rt.role_name:
-                        self.triggers.append(rt)
-                logger.info(f"Chargement {len(self.triggers)} trigger(s) de rôles depuis {CONFIG_PATH}.")
+                        triggers.append(rt)
+                logger.info(f"Chargement {len(triggers)} trigger(s) de rôles depuis {CONFIG_PATH}.")
             except Exception as e:
                 logger.error(f"Erreur lecture config role triggers: {e}")
 
         # Backward compatibility environnement si aucune config
-        if not self.triggers:
+        if not triggers:
             env_trigger = os.getenv("TRIGGER_WORD")
             env_role = os.getenv("ROLE_NAME")
             env_remove = os.getenv("REMOVE_TRIGGER")
             if env_trigger and env_role:
-                self.triggers.append(RoleTrigger(env_trigger.lower(), env_role, env_remove.lower() if env_remove else None))
+                triggers.append(
+                    RoleTrigger(env_trigger.lower(), env_role, env_remove.lower() if env_remove else None, cooldown=default)
+                )
                 logger.info("Fallback sur variables d'environnement pour triggers de rôles.")
 
+        # Motifs publiés dans l'index partagé, charge utile = (rang, est_un_retrait, trigger)
+        patterns: List[str] = []
+        payloads: List[Tuple[int, bool, RoleTrigger]] = []
+        modes: List[str] = []
+        for idx, rt in enumerate(triggers):
+            patterns.append(rt.trigger)
+            payloads.append((idx, False, rt))
+            modes.append(rt.match)
+            if rt.remove_trigger:
+                patterns.append(rt.remove_trigger)
+                payloads.append((idx, True, rt))
+                modes.append(rt.match)
+        self.triggers = triggers
+        trigger_matcher.publish(self.name, patterns, payloads, modes)
+
     def setup(self, client: discord.Client) -> None:  # noqa: D401
         self._load_from_config()
 
@@ -61,82 +96,87 @@ class RoleTriggersFeature:
         """Recharger la configuration des triggers depuis le JSON/env."""
         self._load_from_config()
 
-    async def _ensure_role(self, guild: discord.Guild, role_name: str) -> discord.Role | None:
-        for r in guild.roles:
-            if r.name == role_name:
-                return r
-        try:
-            role = await guild.create_role(name=role_name, mentionable=True, reason="Création auto pour trigger")
-            # Tentative reposition
-            me = guild.me
-            if me and me.top_role and me.top_role.position > 1:
-                target_pos = me.top_role.position - 1
-                try:
-                    await role.edit(position=target_pos, reason="Auto-reposition sous le top rôle du bot")
-                except Exception:
-                    pass
-            return role
-        except Exception as e:
-            logger.warning(f"Impossible de créer le rôle {role_name}: {e}")
-            return None
-
-    async def on_message(self, message: discord.Message) -> None:  # noqa: D401
-        if message.author.bot or message.guild is None:
+    async def on_message(self, message: discord.Message, ctx: MessageContext | None = None) -> None:  # noqa: D401
+        if ctx is None:
+            ctx = MessageContext.build(message)
+            if ctx is None:
+                return
+        hits = ctx.hits_for(self.name)
+        if not hits:
             return
-        content = (message.content or "").lower()
-        guild = message.guild
-        me = guild.me
+        guild = ctx.guild
+        me = ctx.bot_member
         if me is None:
             return
         if not me.guild_permissions.manage_roles:
             return
 
-        for rt in self.triggers:
-            trigger_hit = rt.trigger in content
-            remove_hit = rt.remove_trigger and rt.remove_trigger.lower() in content
-            if not trigger_hit and not remove_hit:
-                continue
+        # Regrouper par trigger (dans l'ordre de config): ajout et/ou retrait trouvés
+        matched: Dict[int, Tuple[RoleTrigger, bool, bool]] = {}
+        for idx, is_remove, rt in hits:
+            _, add_hit, rm_hit = matched.get(idx, (rt, False, False))
+            matched[idx] = (rt, add_hit or not is_remove, rm_hit or is_remove)
+
+        # Résolu une fois par message (cache TTL partagé, un seul fetch par membre)
+        member = await member_cache.resolve(guild, message.author)
+        if member is None:
+            return
 
-            role = await self._ensure_role(guild, rt.role_name)
+        # Changements collectés pour tout le message, puis envoyés au batcher en un lot
+        to_add: Dict[int, Tuple[discord.Role, str]] = {}
+        to_remove: Dict[int, Tuple[discord.Role, str]] = {}
+        for idx in sorted(matched):
+            rt, trigger_hit, remove_hit = matched[idx]
+            role = await ensure_role(guild, rt.role_name, reason="Création auto pour trigger")
             if role is None:
                 continue
             if role.position >= me.top_role.position:
                 logger.warning(f"Rôle '{role.name}' trop haut (pos={role.position} >= bot pos={me.top_role.position}).")
                 continue
 
-            member = message.author if isinstance(message.author, discord.Member) else None
-            if member is None:
-                try:
-                    member = await guild.fetch_member(message.author.id)  # type: ignore[arg-type]
-                except Exception:
-                    continue
-
-            # Add
-            if trigger_hit and (not remove_hit):
-                if role not in member.roles:
-                    try:
-                        await member.add_roles(role, reason=f"Trigger '{rt.trigger}'")
-                        if self.reactions_enabled:
-                            try:
-                                await message.add_reaction("✅")
-                            except Exception:
-                                pass
-                        logger.info(f"Rôle '{role.name}' attribué à {member.display_name} via '{rt.trigger}'.")
-                    except Exception as e:
-                        logger.error(f"Échec add rôle {role.name}: {e}")
-            # Remove
+            # Le retrait l'emporte; rien à faire si le membre est déjà dans l'état voulu
             if remove_hit:
-                if role in member.roles:
+                if role not in member.roles:
+                    continue
+                action = "remove"
+            elif role in member.roles:
+                continue
+            else:
+                action = "add"
+            # Cooldown propre à chaque action, consommé seulement par un changement réel
+            if cooldowns.hit(self.name, (rt.trigger, action), message.channel.id, message.author.id, rt.cooldown):
+                continue
+            if action == "add":
+                to_remove.pop(role.id, None)
+                to_add[role.id] = (role, rt.trigger)
+            else:
+                to_add.pop(role.id, None)
+                to_remove[role.id] = (role, rt.remove_trigger or rt.trigger)
+
+        if not to_add and not to_remove:
+            return
+        reason = "Triggers " + ", ".join(f"'{t}'" for _, t in (*to_add.values(), *to_remove.values()))
+        applied = await role_batcher.apply(
+            member,
+            add=[r for r, _ in to_add.values()],
+            remove=[r for r, _ in to_remove.values()],
+            reason=reason,
+        )
+        if not applied:
+            return
+        metrics.incr("trigger_sent", len(to_add) + len(to_remove), feature=self.name)
+        for role, trig in to_add.values():
+            logger.info(f"Rôle '{role.name}' attribué à {member.display_name} via '{trig}'.")
+        for role, trig in to_remove.values():
+            logger.info(f"Rôle '{role.name}' retiré de {member.display_name} via '{trig}'.")
+        # Une seule réaction par type de changement, quel que soit le nombre de triggers
+        if self.reactions_enabled:
+            for emoji, changed in (("✅", to_add), ("🗑️", to_remove)):
+                if changed:
                     try:
-                        await member.remove_roles(role, reason=f"Remove trigger '{rt.remove_trigger}'")
-                        if self.reactions_enabled:
-                            try:
-                                await message.add_reaction("🗑️")
-                            except Exception:
-                                pass
-                        logger.info(f"Rôle '{role.name}' retiré de {member.display_name} via '{rt.remove_trigger}'.")
-                    except Exception as e:
-                        logger.error(f"Échec remove rôle {role.name}: {e}")
+                        await react(message, emoji)
+                    except Exception:
+                        pass
 
 
 register(RoleTriggersFeature())
@@ -0,0 +1,123 @@
+"""Routeur unique des commandes préfixées (!ping, !vip...), partagé par les features."""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Tuple
+
+import discord
+
+from .context import Interest, MessageContext
+from .registry import register
+from ..outbound import Priority, send
+
+logger = logging.getLogger("nyahchan.router")
+
+Handler = Callable[[MessageContext], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class Command:
+    """Commande préfixée enregistrée dans le routeur.
+
+    - allowed_user_ids: si défini, seuls ces utilisateurs peuvent l'utiliser (les autres sont ignorés en silence) ;
+    - permission: permission Discord requise (ex: "manage_roles"), sinon `denied_message` est envoyé s'il est défini.
+    """
+
+    name: str
+    handler: Handler
+    aliases: Tuple[str, ...] = ()
+    allowed_user_ids: FrozenSet[int] | None = None
+    permission: str | None = None
+    denied_message: str | None = None
+
+    def allows(self, author: discord.abc.User) -> bool:
+        if self.allowed_user_ids is not None and author.id not in self.allowed_user_ids:
+            return False
+        if self.permission is not None:
+            perms = getattr(author, "guild_permissions", None)
+            return bool(perms is not None and getattr(perms, self.permission, False))
+        return True
+
+
+class CommandRouter:
+    """Table `nom ou alias -> Command`, alimentée par plusieurs features.
+
+    Chaque feature publie sa liste complète sous son nom (`owner`); la table est
+    reconstruite puis remplacée d'un bloc. En cas de conflit de nom, la plus
+    petite `precedence` garde la commande (à égalité, la première publiée):
+    les commandes intégrées passent avant les commandes configurées.
+    """
+
+    def __init__(self) -> None:
+        self._owners: Dict[str, Tuple[int, List[Command]]] = {}
+        self._table: Dict[str, Command] = {}
+
+    def publish(self, owner: str, commands: List[Command], precedence: int = 0) -> None:
+        self._owners[owner] = (precedence, list(commands))
+        table: Dict[str, Command] = {}
+        # sorted() est stable: à précédence égale, l'ordre de première publication est gardé
+        for own, (_, cmds) in sorted(self._owners.items(), key=lambda item: item[1][0]):
+            for cmd in cmds:
+                for key in (cmd.name, *cmd.aliases):
+                    existing = table.get(key)
+                    if existing is not None and existing is not cmd:
+                        logger.warning("Commande '%s' (%s) ignorée: déjà définie", key, own)
+                        continue
+                    table[key] = cmd
+        self._table = table
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        return frozenset(self._table)
+
+    def get(self, name: str) -> Command | None:
+        return self._table.get(name)
+
+
+# Table partagée: les features y publient leurs commandes dans setup()/reload()
+router = CommandRouter()
+
+
+class CommandRouterFeature:
+    """Seule feature routée sur Interest.COMMAND pour les commandes du routeur.
+
+    Le registry ne la réveille que pour les noms présents dans la table;
+    ici, une recherche dans un dict, la vérification des droits, puis le handler.
+    """
+
+    name = "command_router"
+    interests = Interest.COMMAND
+
+    def __init__(self, table: CommandRouter) -> None:
+        self.table = table
+
+    @property
+    def command_names(self) -> FrozenSet[str]:
+        """Noms et alias routés vers cette feature (relu par le registry après reload)."""
+        return self.table.names
+
+    def setup(self, client: discord.Client) -> None:  # noqa: D401
+        pass
+
+    async def on_message(self, message: discord.Message, ctx: MessageContext | None = None) -> None:  # noqa: D401
+        if ctx is None:
+            ctx = MessageContext.build(message)
+            if ctx is None:
+                return
+        if ctx.command is None:
+            return
+        cmd = self.table.get(ctx.command)
+        if cmd is None:
+            return
+        if not cmd.allows(message.author):
+            if cmd.denied_message:
+                try:
+                    await send(message.channel, cmd.denied_message, priority=Priority.HIGH)
+                except Exception:
+                    pass
+            return
+        await cmd.handler(ctx)
+
+
+register(CommandRouterFeature(router))
@@ -12,6 +12,7 @@ from .features import ollama_qna  # noqa: F401
 from .features import commands  # noqa: F401
 from .features import registry as feature_registry
 from .moderation import ModerationCommands
+from .outbound import outbound
 
 
 def create_client() -> discord.Client:
@@ -20,7 +21,9 @@ def create_client() -> discord.Client:
     use_members_intent = os.getenv("USE_MEMBERS_INTENT", "1") not in ("0", "false", "False")
     if use_members_intent:
         intents.members = True  # Peut nécessiter activation dans le portail développeur
-    client = discord.Client(intents=intents)
+    # Au-delà de cette attente, discord.py lève RateLimited et la file sortante met la route en pause
+    # (discord.py impose au moins 30s; 0 = il attend toujours lui-même)
+    client = discord.Client(intents=intents, max_ratelimit_timeout=outbound.max_ratelimit_wait or None)
     return client
 
 
@@ -60,6 +63,7 @@ async def async_main():
         logger.error("DISCORD_TOKEN manquant. Ajoutez-le dans .env à la racine ou exportez la variable.")
         return
 
+    outbound.configure()
     client = create_client()
     preflight_checks()
 
@@ -69,14 +73,18 @@ async def async_main():
     setattr(client, "moderation", moderation)
 
     # Features sont déjà importées en haut pour pouvoir utiliser le registry
-    from .features.registry import setup_all, reload_all
+    from .features.registry import setup_all, reload_all, close_all
     from .web import set_reload_callback
 
     # Import and setup events after .env is loaded
     from .events.ready import setup_ready_event
     from .events.message_create import setup_message_event
+    from .events.roles import setup_role_events
+    from .members import member_cache
+    member_cache.configure()
     setup_ready_event(client)
     setup_message_event(client)
+    setup_role_events(client)
     setup_all(client)
 
     # Permettre à la WebGUI de déclencher un reload à chaud des features
@@ -97,6 +105,10 @@ async def async_main():
             "Ou définissez USE_MEMBERS_INTENT=0 pour désactiver l'intent Members si inutile."
         )
         return
+    finally:
+        await close_all()
+        if not client.is_closed():
+            await client.close()
 
 
 def main():
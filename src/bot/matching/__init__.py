@@ -0,0 +1,29 @@
+"""Moteurs de correspondance de texte (mots-clés, triggers)."""
+from .aho_corasick import AhoCorasick
+from .tokens import TokenIndex, fold, tokenize
+from .patterns import UnsafePatternError, check_pattern
+from .service import (
+    MATCH_MODES,
+    MATCH_REGEX,
+    MATCH_SUBSTRING,
+    MATCH_WORD,
+    TriggerMatcher,
+    parse_match_mode,
+    trigger_matcher,
+)
+
+__all__ = [
+    "AhoCorasick",
+    "TokenIndex",
+    "fold",
+    "tokenize",
+    "UnsafePatternError",
+    "check_pattern",
+    "MATCH_MODES",
+    "MATCH_REGEX",
+    "MATCH_SUBSTRING",
+    "MATCH_WORD",
+    "TriggerMatcher",
+    "parse_match_mode",
+    "trigger_matcher",
+]
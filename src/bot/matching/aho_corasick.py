@@ -0,0 +1,85 @@
+"""Automate Aho-Corasick: recherche de N motifs en une seule passe sur le texte."""
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+# En dessous de ce nombre de motifs, N recherches `in` (implémentées en C) battent
+# le parcours caractère par caractère en Python: on garde alors la boucle simple.
+SMALL_SET_THRESHOLD = 64
+
+
+class AhoCorasick:
+    """Automate multi-motifs compilé une fois, interrogé à chaque message.
+
+    Chaque motif reçoit un identifiant = sa position dans la liste fournie au
+    constructeur. `find_all` renvoie les identifiants de tous les motifs présents
+    dans le texte (sous-chaînes, éventuellement chevauchantes), en O(len(texte) + hits)
+    quel que soit le nombre de motifs.
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "_size", "_small")
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        patterns = list(patterns)
+        self._size = len(patterns)
+        self._small: Tuple[Tuple[int, str], ...] | None = None
+        if self._size <= SMALL_SET_THRESHOLD:
+            self._small = tuple((pid, p) for pid, p in enumerate(patterns) if p)
+
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for pid, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] = out[node] + (pid,)
+
+        # Liens d'échec en BFS; les sorties de chaque nœud incluent celles de son lien d'échec
+        fail = [0] * len(goto)
+        queue: deque[int] = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[child] = target if target != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find_all(self, text: str) -> Set[int]:
+        """Identifiants des motifs présents dans `text`."""
+        if self._small is not None:
+            return {pid for pid, p in self._small if p in text}
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        hits: Set[int] = set()
+        node = 0
+        for ch in text:
+            nxt = goto[node].get(ch)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto[node].get(ch)
+            node = nxt or 0
+            if out[node]:
+                hits.update(out[node])
+        return hits
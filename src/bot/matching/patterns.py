@@ -0,0 +1,335 @@
+"""Triggers « regex »: validation à la sauvegarde et compilation en une alternance unique."""
+from __future__ import annotations
+
+import re
+import time
+from typing import Any, Callable, Iterable, List, Sequence, Tuple
+
+try:  # Python 3.11+
+    from re import _parser as _sre_parse  # type: ignore[attr-defined]
+    from re._constants import MAXREPEAT  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+    from sre_constants import MAXREPEAT  # type: ignore[no-redef]
+
+try:  # moteur optionnel: supporte un timeout par recherche
+    import regex as _regex_engine  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    _regex_engine = None
+
+MAX_PATTERN_LENGTH = 200
+
+# Sans le module `regex`, `re` ne peut pas être interrompu: seul check_pattern protège
+SUPPORTS_TIMEOUT = _regex_engine is not None
+
+_REPEATS = ("MAX_REPEAT", "MIN_REPEAT")
+
+# Caractères essayés pour savoir si deux alternatives peuvent commencer pareil, en plus
+# des littéraux et bornes d'intervalles des motifs (chiffres, lettres et espaces non ASCII)
+_PROBE_CHARS = [chr(c) for c in range(256)] + list("ſKéßαяЀ٣߀中\u2028\u3000")
+
+CharTest = Callable[[str], bool]
+
+
+class UnsafePatternError(ValueError):
+    """Motif refusé: invalide ou susceptible de backtracking catastrophique."""
+
+
+def _children(op: str, av: Any) -> List[list]:
+    """Sous-motifs d'un nœud de l'arbre produit par le parseur de `re`."""
+    if op in _REPEATS or op == "POSSESSIVE_REPEAT":
+        return [av[2]]
+    if op == "SUBPATTERN":
+        return [av[3]]
+    if op == "BRANCH":
+        return list(av[1])
+    if op == "ATOMIC_GROUP":
+        return [av]
+    if op in ("ASSERT", "ASSERT_NOT"):
+        return [av[1]]
+    if op == "GROUPREF_EXISTS":
+        return [p for p in av[1:] if p is not None]
+    return []
+
+
+def _same_char(code: int) -> CharTest:
+    target = chr(code).casefold()
+    return lambda c: c.casefold() == target
+
+
+def _category(name: str) -> CharTest:
+    """Catégorie `\\d`, `\\w`, `\\s`... (sémantique Unicode de `re`), négative si NOT_."""
+    if "DIGIT" in name:
+        test: CharTest = str.isdecimal
+    elif "WORD" in name:
+        test = lambda c: c.isalnum() or c == "_"  # noqa: E731
+    elif "SPACE" in name:
+        test = str.isspace
+    else:  # LINEBREAK
+        test = lambda c: c == "\n"  # noqa: E731
+    if "NOT_" in name:
+        return lambda c: not test(c)
+    return test
+
+
+def _in_tests(items: Sequence[Tuple[Any, Any]]) -> List[CharTest]:
+    """Un test par élément d'une classe `[...]` (un seul, global, si la classe est négative)."""
+    tests: List[CharTest] = []
+    negate = False
+    for op_raw, av in items:
+        op = str(op_raw)
+        if op == "NEGATE":
+            negate = True
+        elif op == "LITERAL":
+            tests.append(_same_char(av))
+        elif op == "RANGE":
+            lo, hi = av
+            tests.append(lambda c, lo=lo, hi=hi: any(len(v) == 1 and lo <= ord(v) <= hi for v in (c, c.lower(), c.upper())))
+        elif op == "CATEGORY":
+            tests.append(_category(str(av)))
+        else:  # élément inconnu: supposer n'importe quel caractère
+            tests.append(lambda c: True)
+    if negate:
+        inner = list(tests)
+        return [lambda c: not any(t(c) for t in inner)]
+    return tests
+
+
+def _first(seq: Iterable[Tuple[Any, Any]]) -> Tuple[List[CharTest], bool]:
+    """Tests des caractères par lesquels `seq` peut commencer, et si `seq` peut être vide."""
+    tests: List[CharTest] = []
+    for op_raw, av in seq:
+        op = str(op_raw)
+        nullable = False
+        if op == "LITERAL":
+            tests.append(_same_char(av))
+        elif op == "NOT_LITERAL":
+            same = _same_char(av)
+            tests.append(lambda c, same=same: not same(c))
+        elif op == "IN":
+            tests.extend(_in_tests(av))
+        elif op in ("AT", "ASSERT", "ASSERT_NOT"):
+            nullable = True  # ne consomme aucun caractère
+        elif op in _REPEATS or op == "POSSESSIVE_REPEAT":
+            sub, sub_nullable = _first(av[2])
+            tests.extend(sub)
+            nullable = av[0] == 0 or sub_nullable
+        elif op == "SUBPATTERN":
+            sub, nullable = _first(av[3])
+            tests.extend(sub)
+        elif op == "ATOMIC_GROUP":
+            sub, nullable = _first(av)
+            tests.extend(sub)
+        elif op == "BRANCH":
+            for branch in av[1]:
+                sub, sub_nullable = _first(branch)
+                tests.extend(sub)
+                nullable = nullable or sub_nullable
+        else:  # ANY, CATEGORY...: n'importe quel caractère
+            tests.append(lambda c: True)
+        if not nullable:
+            return tests, False
+    return tests, True
+
+
+def _probes(seq: Any) -> List[str]:
+    """Caractères à essayer: ceux du motif (littéraux, bornes d'intervalles) et _PROBE_CHARS."""
+    chars = set(_PROBE_CHARS)
+
+    def collect(node: Any) -> None:
+        if isinstance(node, (list, tuple)):
+            if len(node) == 2 and str(node[0]) == "LITERAL" and isinstance(node[1], int):
+                chars.add(chr(node[1]))
+            elif len(node) == 2 and str(node[0]) == "RANGE":
+                chars.update(chr(v) for v in node[1])
+            else:
+                for child in node:
+                    collect(child)
+        elif isinstance(node, _sre_parse.SubPattern):
+            collect(node.data)
+
+    collect(seq)
+    return sorted(chars)
+
+
+def _overlap(a: Sequence[CharTest], b: Sequence[CharTest], probes: Sequence[str]) -> bool:
+    return any(any(t(c) for t in a) and any(t(c) for t in b) for c in probes)
+
+
+def _check_alternatives(alternatives: Sequence[Sequence[CharTest]], probes: Sequence[str]) -> None:
+    for i, first in enumerate(alternatives):
+        for other in alternatives[i + 1:]:
+            if _overlap(first, other, probes):
+                raise UnsafePatternError(
+                    "alternatives qui se chevauchent dans une répétition (ex: (a|aa)+, (\\w|\\d)+): risque de backtracking"
+                )
+
+
+def _keep_branches(pattern: str) -> str:
+    """`pattern` avec `(?=)` avant chaque `|`, pour l'analyse seulement.
+
+    Le parseur de `re` réécrit une alternance de caractères seuls, (\\w|\\d) ou
+    (a|A), en classe [\\w\\d]: sans risque pour `re`, mais le module `regex` garde
+    l'alternance. L'assertion toujours vraie ne change pas ce que le motif trouve
+    et empêche cette réécriture (pas la factorisation des préfixes communs); les
+    `|` des classes, échappements et commentaires sont laissés.
+    """
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    in_class = False
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+            out.append(c)
+            i += 1
+            continue
+        if c == "[":
+            # `]` juste après `[` ou `[^` est un caractère de la classe
+            j = i + 1
+            j += pattern.startswith("^", j)
+            j += pattern.startswith("]", j)
+            out.append(pattern[i:j])
+            in_class = True
+            i = j
+            continue
+        if pattern.startswith("(?#", i):
+            j = pattern.find(")", i)
+            j = n if j < 0 else j + 1
+            out.append(pattern[i:j])
+            i = j
+            continue
+        out.append("(?=)|" if c == "|" else c)
+        i += 1
+    return "".join(out)
+
+
+def _walk(seq: Iterable[Tuple[Any, Any]], in_unbounded: bool, in_repeat: bool, probes: Sequence[str]) -> None:
+    for op_raw, av in seq:
+        op = str(op_raw)
+        if op in ("GROUPREF", "GROUPREF_EXISTS"):
+            raise UnsafePatternError("les références arrière (\\1, (?P=nom)) ne sont pas autorisées")
+        if op in _REPEATS:
+            unbounded = av[1] == MAXREPEAT
+            if av[1] > 1 and in_repeat and (unbounded or in_unbounded):
+                raise UnsafePatternError(
+                    "quantificateurs imbriqués (ex: (a+)+): risque de backtracking catastrophique"
+                )
+            if unbounded and _first(av[2])[1]:
+                raise UnsafePatternError(
+                    "répétition non bornée d'un motif qui peut être vide (ex: (a?)+): risque de backtracking"
+                )
+            _walk(av[2], in_unbounded or unbounded, in_repeat or av[1] > 1, probes)
+            continue
+        if op == "BRANCH" and in_unbounded:
+            # Le parseur factorise les préfixes communs: (a|aa)+ devient a(?:|a) répété.
+            # Une alternative qui peut être vide, ou deux alternatives qui peuvent commencer
+            # par le même caractère, permettent trop de découpages d'un même texte.
+            firsts = [_first(b) for b in av[1]]
+            if any(nullable for _, nullable in firsts):
+                raise UnsafePatternError(
+                    "alternative qui peut être vide dans une répétition (ex: (a|a?)+): risque de backtracking"
+                )
+            _check_alternatives([tests for tests, _ in firsts], probes)
+        # Les groupes atomiques et quantificateurs possessifs ne reviennent jamais en arrière
+        if op in ("ATOMIC_GROUP", "POSSESSIVE_REPEAT"):
+            for child in _children(op, av):
+                _walk(child, False, False, probes)
+            continue
+        for child in _children(op, av):
+            _walk(child, in_unbounded, in_repeat, probes)
+
+
+def check_pattern(pattern: str) -> None:
+    """Lever UnsafePatternError si le motif est invalide ou dangereux.
+
+    Refuse: motifs trop longs, syntaxe invalide, groupes nommés (réservés à
+    l'alternance combinée), motifs qui trouvent le texte vide (ils
+    déclencheraient sur chaque message), références arrière, quantificateurs
+    imbriqués et, sous une répétition non bornée, les corps qui peuvent être
+    vides et les alternatives qui peuvent commencer par le même caractère, y
+    compris via `[...]`, `\\w`, `\\d` ou `.`. Une classe `[...]` seule ne
+    consomme qu'un caractère par un seul test: ses éléments peuvent se
+    chevaucher.
+    """
+    if not pattern:
+        raise UnsafePatternError("motif vide")
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise UnsafePatternError(f"motif trop long ({len(pattern)} > {MAX_PATTERN_LENGTH} caractères)")
+    try:
+        compiled = re.compile(pattern)
+    except re.error as e:
+        raise UnsafePatternError(f"expression invalide: {e}") from e
+    if compiled.groupindex:
+        raise UnsafePatternError("les groupes nommés (?P<nom>...) ne sont pas autorisés")
+    try:
+        parsed = _sre_parse.parse(_keep_branches(pattern))
+    except re.error:  # pragma: no cover - réécriture mal comprise: analyser le motif tel quel
+        parsed = _sre_parse.parse(pattern)
+    if _first(parsed)[1] or compiled.fullmatch("") is not None:
+        raise UnsafePatternError("motif qui peut être vide (ex: a?, x*, mot|): il déclencherait sur chaque message")
+    _walk(parsed, False, False, _probes(parsed))
+
+
+class PatternSet:
+    """Motifs regex d'une feature: une alternance combinée et chaque motif compilé seul."""
+
+    __slots__ = ("combined", "single")
+
+    def __init__(self, combined: Any, single: List[Any]) -> None:
+        self.combined = combined
+        self.single = single
+
+
+def compile_alternation(patterns: Sequence[str]) -> PatternSet | None:
+    """Compiler les motifs en une alternance `(?P<r0>...)|(?P<r1>...)|...` et un par un.
+
+    L'alternance sert de filtre en une seule passe: un message sans aucun hit
+    (le cas courant) ne coûte qu'une recherche. Utilise le module `regex` s'il
+    est installé (recherche interruptible), sinon `re`.
+    """
+    if not patterns:
+        return None
+    engine, flags = (_regex_engine, _regex_engine.IGNORECASE) if _regex_engine is not None else (re, re.IGNORECASE)
+    alternation = "|".join(f"(?P<r{i}>{p})" for i, p in enumerate(patterns))
+    return PatternSet(engine.compile(alternation, flags), [engine.compile(p, flags) for p in patterns])
+
+
+def find_groups(compiled: PatternSet, text: str, timeout: float | None) -> List[int]:
+    """Index (croissants) de tous les motifs trouvés dans `text`.
+
+    L'alternance combinée ne rapporte qu'une alternative par position et saute
+    le texte déjà consommé: avec ["girl", "egirl"] sur "egirl", ou ["hello",
+    "hello world"] sur "hello world", un seul motif serait vu. Dès qu'elle trouve
+    quelque chose, les motifs pas encore vus sont donc cherchés un par un.
+
+    Lève TimeoutError si le budget est dépassé (module `regex` uniquement).
+    """
+    deadline = None if timeout is None else time.perf_counter() + timeout
+
+    def budget() -> dict:
+        if deadline is None or not SUPPORTS_TIMEOUT:
+            return {}
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutError
+        return {"timeout": remaining}
+
+    found: List[int] = []
+    for m in compiled.combined.finditer(text, **budget()):
+        name = m.lastgroup
+        if name is None or not name.startswith("r"):
+            # lastgroup désigne un groupe interne: retrouver l'alternative qui a matché
+            name = next(k for k, v in m.groupdict().items() if v is not None)
+        idx = int(name[1:])
+        if idx not in found:
+            found.append(idx)
+    if found and len(found) < len(compiled.single):
+        for idx, single in enumerate(compiled.single):
+            if idx not in found and single.search(text, **budget()) is not None:
+                found.append(idx)
+    return sorted(found)
@@ -0,0 +1,171 @@
+"""Service de correspondance partagé: un seul index pour les triggers de toutes les features."""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+from ..env import env_float, env_int
+from .aho_corasick import AhoCorasick
+from .patterns import SUPPORTS_TIMEOUT, UnsafePatternError, check_pattern, compile_alternation, find_groups
+from .tokens import TokenIndex, tokenize
+
+logger = logging.getLogger("nyahchan.matching")
+
+# Modes de correspondance d'un trigger
+MATCH_SUBSTRING = "substring"  # sous-chaîne du message en minuscules (historique)
+MATCH_WORD = "word"  # mot(s) entier(s), après casefold + suppression des accents
+MATCH_REGEX = "regex"  # expression régulière (insensible à la casse), validée par check_pattern
+MATCH_MODES = (MATCH_SUBSTRING, MATCH_WORD, MATCH_REGEX)
+
+# Budget de temps (ms) pour les triggers regex d'un message, et longueur max analysée
+REGEX_BUDGET_ENV = "TRIGGER_REGEX_BUDGET_MS"
+DEFAULT_REGEX_BUDGET_MS = 50
+REGEX_MAX_INPUT_ENV = "TRIGGER_REGEX_MAX_INPUT"
+DEFAULT_REGEX_MAX_INPUT = 4000
+
+
+def parse_match_mode(raw: object) -> str:
+    """Mode lu dans une config JSON; valeur absente ou inconnue -> sous-chaîne."""
+    mode = str(raw or MATCH_SUBSTRING).strip().lower()
+    return mode if mode in MATCH_MODES else MATCH_SUBSTRING
+
+
+class TriggerMatcher:
+    """Compile les triggers de toutes les features dans un automate unique.
+
+    Chaque feature publie ses motifs sous son nom (`owner`), chacun associé à une
+    charge utile (par défaut sa position dans la liste; les motifs vides sont
+    ignorés). `match` fait une seule passe sur le texte et renvoie, par owner,
+    les charges utiles des motifs trouvés. Comme elles viennent de la même
+    publication que l'automate, un reload concurrent ne peut pas désaligner
+    les résultats d'un message déjà analysé.
+
+    Les motifs en mode MATCH_WORD vont dans un TokenIndex: le message n'est alors
+    découpé en mots qu'une fois, et seulement si au moins un tel motif existe.
+
+    Les motifs MATCH_REGEX d'une feature sont compilés en une seule alternance
+    (complétée par une recherche par motif quand elle trouve un hit, voir
+    find_groups), exécutée sous un budget de temps par message (module `regex`): un motif lent
+    fait perdre les hits regex de ce message au lieu de bloquer la boucle d'événements.
+    """
+
+    def __init__(self) -> None:
+        self._sets: Dict[str, List[Tuple[str, Any, str]]] = {}
+        # id global (motif unique) -> [(owner, charge utile), ...]
+        self._targets: List[Tuple[Tuple[str, Any], ...]] = []
+        self._automaton = AhoCorasick(())
+        self._word_targets: List[Tuple[Tuple[str, Any], ...]] = []
+        self._word_index = TokenIndex(())
+        self._owner_regex: Dict[str, Tuple[Any, List[Any]] | None] = {}
+        self._regexes: List[Tuple[str, Any, List[Any]]] = []
+        self._regex_budget = DEFAULT_REGEX_BUDGET_MS / 1000
+        self._regex_max_input = DEFAULT_REGEX_MAX_INPUT
+
+    def publish(
+        self,
+        owner: str,
+        patterns: Sequence[str],
+        payloads: Sequence[Any] | None = None,
+        modes: Sequence[str] | None = None,
+    ) -> None:
+        """Remplacer les motifs d'une feature et recompiler l'index partagé."""
+        if payloads is None:
+            payloads = range(len(patterns))
+        if modes is None:
+            modes = [MATCH_SUBSTRING] * len(patterns)
+        entries = list(zip(patterns, payloads, modes))
+        self._sets[owner] = entries
+        self._owner_regex[owner] = self._compile_owner_regex(owner, entries)
+        self._rebuild()
+
+    @staticmethod
+    def _compile_owner_regex(owner: str, entries: List[Tuple[str, Any, str]]) -> Tuple[Any, List[Any]] | None:
+        patterns: List[str] = []
+        payloads: List[Any] = []
+        for pattern, payload, mode in entries:
+            if not pattern or mode != MATCH_REGEX:
+                continue
+            try:
+                check_pattern(pattern)
+            except UnsafePatternError as e:
+                logger.warning("Trigger regex ignoré pour %s (%r): %s", owner, pattern, e)
+                continue
+            patterns.append(pattern)
+            payloads.append(payload)
+        compiled = compile_alternation(patterns)
+        return (compiled, payloads) if compiled is not None else None
+
+    def _rebuild(self) -> None:
+        by_pattern: Dict[str, List[Tuple[str, Any]]] = {}
+        by_word: Dict[str, List[Tuple[str, Any]]] = {}
+        regexes: List[Tuple[str, Any, List[Any]]] = []
+        for owner, entries in self._sets.items():
+            for pattern, payload, mode in entries:
+                if not pattern or mode == MATCH_REGEX:
+                    continue
+                table = by_word if mode == MATCH_WORD else by_pattern
+                table.setdefault(pattern, []).append((owner, payload))
+            owner_regex = self._owner_regex.get(owner)
+            if owner_regex is not None:
+                regexes.append((owner, owner_regex[0], owner_regex[1]))
+        word_index = TokenIndex((pattern, gid) for gid, pattern in enumerate(by_word))
+        # Publication atomique: index et tables de cibles sont remplacés ensemble
+        self._automaton, self._targets, self._word_index, self._word_targets, self._regexes = (
+            AhoCorasick(by_pattern),
+            [tuple(t) for t in by_pattern.values()],
+            word_index,
+            [tuple(t) for t in by_word.values()],
+            regexes,
+        )
+        # 0 ou négatif -> valeur par défaut
+        self._regex_budget = (env_float(REGEX_BUDGET_ENV, DEFAULT_REGEX_BUDGET_MS) or DEFAULT_REGEX_BUDGET_MS) / 1000
+        self._regex_max_input = env_int(REGEX_MAX_INPUT_ENV, DEFAULT_REGEX_MAX_INPUT) or DEFAULT_REGEX_MAX_INPUT
+        if regexes and not SUPPORTS_TIMEOUT:
+            logger.warning(
+                "Triggers regex actifs sans le module 'regex': pas de budget de temps par message "
+                "(pip install regex). Seule la validation des motifs protège la boucle."
+            )
+        logger.debug(
+            "Index de triggers recompilé: %d sous-chaîne(s), %d mot(s) entier(s), %d alternance(s) regex, %d feature(s)",
+            len(by_pattern), len(by_word), len(regexes), len(self._sets),
+        )
+
+    def match(self, text: str) -> Dict[str, List[Any]]:
+        automaton, targets = self._automaton, self._targets
+        word_index, word_targets = self._word_index, self._word_targets
+        regexes = self._regexes
+        hits: Dict[str, List[Any]] = {}
+        for gid in automaton.find_all(text):
+            for owner, payload in targets[gid]:
+                hits.setdefault(owner, []).append(payload)
+        if len(word_index):
+            for gid in word_index.find_all(tokenize(text)):
+                for owner, payload in word_targets[gid]:
+                    hits.setdefault(owner, []).append(payload)
+        if regexes:
+            self._match_regex(text, regexes, hits)
+        return hits
+
+    def _match_regex(self, text: str, regexes: List[Tuple[str, Any, List[Any]]], hits: Dict[str, List[Any]]) -> None:
+        text = text[: self._regex_max_input]
+        budget = self._regex_budget
+        deadline = time.perf_counter() + budget
+        for owner, compiled, payloads in regexes:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    raise TimeoutError
+                found = find_groups(compiled, text, remaining)
+            except TimeoutError:
+                logger.warning(
+                    "Triggers regex: budget de %.0fms dépassé (message de %d caractères), hits regex ignorés pour %s",
+                    budget * 1000, len(text), owner,
+                )
+                continue
+            for idx in found:
+                hits.setdefault(owner, []).append(payloads[idx])
+
+
+# Instance partagée par les features
+trigger_matcher = TriggerMatcher()
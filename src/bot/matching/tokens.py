@@ -0,0 +1,60 @@
+"""Mode « mot entier »: normalisation, découpage en mots et index de triggers par mots."""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Set, Tuple
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """Casefold Unicode + suppression des accents ("Règlement" -> "reglement")."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """Mots du texte après `fold` (la ponctuation et les espaces séparent les mots)."""
+    return _WORD_RE.findall(fold(text))
+
+
+class TokenIndex:
+    """Index de triggers d'un ou plusieurs mots, interrogé avec les mots d'un message.
+
+    Les triggers sont rangés par premier mot; pour chaque mot du message, seuls les
+    triggers qui commencent par ce mot sont comparés. Le coût dépend donc du nombre
+    de mots du message et non du nombre de triggers.
+    """
+
+    __slots__ = ("_by_first", "_size")
+
+    def __init__(self, entries: Iterable[Tuple[str, int]]) -> None:
+        by_first: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        size = 0
+        for trigger, target in entries:
+            words = tuple(tokenize(trigger))
+            if not words:
+                continue
+            by_first.setdefault(words[0], []).append((words, target))
+            size += 1
+        self._by_first = by_first
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find_all(self, tokens: List[str]) -> Set[int]:
+        """Identifiants des triggers présents (mots consécutifs) dans `tokens`."""
+        by_first = self._by_first
+        found: Set[int] = set()
+        n = len(tokens)
+        for i, tok in enumerate(tokens):
+            candidates = by_first.get(tok)
+            if not candidates:
+                continue
+            for words, target in candidates:
+                k = len(words)
+                if k == 1 or (i + k <= n and tuple(tokens[i:i + k]) == words):
+                    found.add(target)
+        return found
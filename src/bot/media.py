@@ -0,0 +1,86 @@
+"""Envoi de fichiers locaux (GIFs) sans les relire ni les re-téléverser à chaque fois."""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import discord
+
+from .env import env_float
+from .outbound import Priority, send
+
+logger = logging.getLogger("nyahchan.media")
+
+# Durée (s) pendant laquelle l'URL d'une pièce jointe déjà envoyée est réutilisée.
+# Les URLs du CDN Discord sont signées et expirent: au-delà, le fichier est re-téléversé.
+MEDIA_URL_TTL_ENV = "MEDIA_URL_TTL"
+DEFAULT_MEDIA_URL_TTL = 12 * 3600.0
+
+
+@dataclass
+class _Media:
+    mtime: float
+    size: int
+    data: bytes
+    url: str | None = None
+    url_at: float = 0.0
+
+
+class MediaCache:
+    """Contenu des fichiers envoyés (en mémoire) et URL de leur dernier envoi, par chemin.
+
+    Une entrée est invalidée quand le mtime ou la taille du fichier change. Tant
+    que l'URL est récente, le fichier est envoyé comme image d'embed (aucun
+    téléversement); sinon il est téléversé depuis le buffer en mémoire, sans
+    relire le disque.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _Media] = {}
+
+    @property
+    def url_ttl(self) -> float:
+        return env_float(MEDIA_URL_TTL_ENV, DEFAULT_MEDIA_URL_TTL)
+
+    def _load(self, path: str) -> _Media | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._entries.pop(path, None)
+            return None
+        entry = self._entries.get(path)
+        if entry is not None and entry.mtime == st.st_mtime and entry.size == st.st_size:
+            return entry
+        with open(path, "rb") as f:
+            data = f.read()
+        entry = _Media(mtime=st.st_mtime, size=st.st_size, data=data)
+        self._entries[path] = entry
+        logger.debug("Fichier %s chargé en mémoire (%d octets)", path, len(data))
+        return entry
+
+    async def send(self, channel: discord.abc.Messageable, path: str, priority: Priority = Priority.LOW) -> bool:
+        """Envoyer `path` dans `channel`; False si le fichier est introuvable."""
+        entry = self._load(path)
+        if entry is None:
+            logger.debug(f"Fichier introuvable: {path}")
+            return False
+        if entry.url and time.monotonic() - entry.url_at < self.url_ttl:
+            embed = discord.Embed()
+            embed.set_image(url=entry.url)
+            await send(channel, embed=embed, priority=priority)
+            return True
+        file = discord.File(io.BytesIO(entry.data), filename=os.path.basename(path))
+        sent = await send(channel, file=file, priority=priority)
+        attachments = getattr(sent, "attachments", None)
+        if attachments:
+            entry.url = attachments[0].url
+            entry.url_at = time.monotonic()
+        return True
+
+
+# Instance partagée (grant_commands)
+media_cache = MediaCache()
@@ -0,0 +1,107 @@
+"""Résolution des membres d'un serveur avec un cache TTL borné, partagée par les features."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import discord
+
+from .env import env_flag, env_float, env_int
+from .metrics import metrics
+from .singleflight import SingleFlight
+from .ttl import TTLCache
+
+logger = logging.getLogger("nyahchan.members")
+
+MEMBER_CACHE_TTL_ENV = "MEMBER_CACHE_TTL"
+DEFAULT_MEMBER_CACHE_TTL = 300.0
+MEMBER_CACHE_MAX_ENV = "MEMBER_CACHE_MAX"
+DEFAULT_MEMBER_CACHE_MAX = 5000
+# 1 = charger tous les membres des serveurs au démarrage (nécessite USE_MEMBERS_INTENT=1)
+MEMBER_CACHE_WARMUP_ENV = "MEMBER_CACHE_WARMUP"
+
+
+class MemberCache:
+    """Membres déjà vus, par (serveur, utilisateur), gardés MEMBER_CACHE_TTL secondes.
+
+    Ordre de résolution: l'objet Member du message, le cache de discord.py
+    (rempli quand l'intent members est actif), ce cache, puis un seul
+    `fetch_member` par membre même si plusieurs messages le demandent en même temps.
+    Le TTL borne l'ancienneté des rôles lus dans le cache quand la gateway
+    n'envoie pas les mises à jour de membres (USE_MEMBERS_INTENT=0).
+    """
+
+    def __init__(self) -> None:
+        self.ttl = DEFAULT_MEMBER_CACHE_TTL
+        self._members: TTLCache[tuple, discord.Member] = TTLCache(maxsize=DEFAULT_MEMBER_CACHE_MAX)
+        self._fetches = SingleFlight()
+
+    def configure(self) -> None:
+        """Relire MEMBER_CACHE_TTL / MEMBER_CACHE_MAX (appelé après le chargement du .env)."""
+        self.ttl = env_float(MEMBER_CACHE_TTL_ENV, DEFAULT_MEMBER_CACHE_TTL)
+        self._members.maxsize = env_int(MEMBER_CACHE_MAX_ENV, DEFAULT_MEMBER_CACHE_MAX, minimum=1)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def put(self, member: discord.Member) -> None:
+        """Mémoriser une version à jour d'un membre (ex: renvoyée par member.edit)."""
+        if self.ttl > 0:
+            self._members.set((member.guild.id, member.id), member, self.ttl)
+
+    def forget(self, guild_id: int, user_id: int) -> None:
+        self._members.pop((guild_id, user_id))
+
+    async def resolve(self, guild: discord.Guild, user: discord.abc.User | int) -> discord.Member | None:
+        """Member correspondant à `user` sur `guild`, ou None s'il est introuvable."""
+        if isinstance(user, discord.Member) and user.guild.id == guild.id:
+            return user
+        user_id = user if isinstance(user, int) else user.id
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        key = (guild.id, user_id)
+        member = self._members.get(key)
+        if member is not None:
+            metrics.incr("member_cache", result="hit")
+            return member
+        metrics.incr("member_cache", result="miss")
+        return await self._fetches.do(key, lambda: self._fetch(guild, user_id))
+
+    async def _fetch(self, guild: discord.Guild, user_id: int) -> discord.Member | None:
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        except Exception as e:
+            logger.warning(f"Impossible de récupérer le membre {user_id} sur {guild.id}: {e}")
+            return None
+        if member is not None:
+            self.put(member)
+        return member
+
+
+# Instance partagée par les features
+member_cache = MemberCache()
+
+
+async def warm_up(client: discord.Client) -> None:
+    """Charger les membres de chaque serveur via la gateway (chunking), si MEMBER_CACHE_WARMUP=1.
+
+    Remplit le cache de discord.py en une requête gateway par serveur au lieu
+    d'un fetch REST par membre. Sans l'intent members, Discord refuse le chunking.
+    """
+    if not env_flag(MEMBER_CACHE_WARMUP_ENV, False):
+        return
+    if not client.intents.members:
+        logger.warning("%s=1 ignoré: nécessite USE_MEMBERS_INTENT=1", MEMBER_CACHE_WARMUP_ENV)
+        return
+    for guild in client.guilds:
+        if guild.chunked:
+            continue
+        try:
+            await guild.chunk(cache=True)
+            logger.info(f"Membres chargés pour {guild.name}: {guild.member_count}")
+        except Exception as e:
+            logger.warning(f"Échec du chargement des membres de {guild.name}: {e}")
+        await asyncio.sleep(0)
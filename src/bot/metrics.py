@@ -0,0 +1,63 @@
+"""Compteurs en mémoire du bot, exposés par la webGUI (/api/metrics)."""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+_Labels = Tuple[Tuple[str, str], ...]
+_Key = Tuple[str, _Labels]
+
+
+def _labels(labels: Dict[str, object]) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """Compteurs, durées observées et jauges, avec étiquettes optionnelles (ex: feature, scope).
+
+    Volontairement minimal: pas d'export Prometheus, juste un instantané JSON.
+    Une durée observée garde count/sum/max; une jauge est une fonction lue à chaque instantané.
+    """
+
+    def __init__(self) -> None:
+        self._counters: "Counter[_Key]" = Counter()
+        self._observed: Dict[_Key, List[float]] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def incr(self, name: str, amount: int = 1, **labels: object) -> None:
+        self._counters[(name, _labels(labels))] += amount
+
+    def get(self, name: str, **labels: object) -> int:
+        return self._counters.get((name, _labels(labels)), 0)
+
+    def observe(self, name: str, value: float, **labels: object) -> None:
+        stats = self._observed.setdefault((name, _labels(labels)), [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += value
+        if value > stats[2]:
+            stats[2] = value
+
+    def gauge(self, name: str, read: Callable[[], Dict[str, float]]) -> None:
+        """Enregistrer une jauge: `read()` renvoie {étiquette: valeur} au moment de l'instantané."""
+        self._gauges[name] = read
+
+    def snapshot(self) -> Dict[str, list]:
+        """{nom: [{"labels": {...}, "value": n} ou {"labels", "count", "sum", "max"}, ...]} trié par nom."""
+        out: Dict[str, list] = {}
+        for (name, labels), value in sorted(self._counters.items()):
+            out.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        for (name, labels), (count, total, peak) in sorted(self._observed.items()):
+            out.setdefault(name, []).append(
+                {"labels": dict(labels), "count": count, "sum": round(total, 6), "max": round(peak, 6)}
+            )
+        for name, read in sorted(self._gauges.items()):
+            out[name] = [{"labels": {"key": k}, "value": v} for k, v in read().items()]
+        return out
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._observed.clear()
+
+
+# Instance partagée par le bot et la webGUI
+metrics = Metrics()
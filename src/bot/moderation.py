@@ -6,6 +6,8 @@ import logging
 import discord
 from discord import app_commands
 
+from .outbound import Priority, outbound, send
+
 logger = logging.getLogger("nyahchan.moderation")
 
 
@@ -13,6 +15,15 @@ def _format_user_label(user: discord.abc.User) -> str:
     return f"{user} (`{user.id}`)"
 
 
+async def _critical(factory, route) -> None:
+    """Actions de modération: priorité CRITICAL, jamais mises en file derrière les envois cosmétiques."""
+    await outbound.call(factory, route=route, priority=Priority.CRITICAL)
+
+
+async def _respond(interaction: discord.Interaction, *args, **kwargs) -> None:
+    await _critical(lambda: interaction.response.send_message(*args, **kwargs), ("interaction", interaction.id))
+
+
 class ModerationCommands:
     def __init__(self, client: discord.Client) -> None:
         self.client = client
@@ -28,14 +39,16 @@ class ModerationCommands:
             reason: Optional[str] = None,
         ) -> None:
             if interaction.guild is None:
-                await interaction.response.send_message(
+                await _respond(
+                    interaction,
                     "Cette commande ne peut être utilisée que sur un serveur.",
                     ephemeral=True,
                 )
                 return
 
             if member == interaction.user:
-                await interaction.response.send_message(
+                await _respond(
+                    interaction,
                     "Tu ne peux pas te bannir toi-même.",
                     ephemeral=True,
                 )
@@ -55,14 +68,16 @@ class ModerationCommands:
             embed.add_field(name="Raison", value=reason_text, inline=False)
 
             try:
-                await member.send(
-                    f"Tu as été banni de **{interaction.guild.name}**.\nRaison: {reason_text}"
+                await send(
+                    member,
+                    f"Tu as été banni de **{interaction.guild.name}**.\nRaison: {reason_text}",
+                    priority=Priority.CRITICAL,
                 )
             except Exception:
                 pass
 
-            await interaction.guild.ban(member, reason=reason_text)
-            await interaction.response.send_message(embed=embed)
+            await _critical(lambda: interaction.guild.ban(member, reason=reason_text), ("ban", interaction.guild.id))
+            await _respond(interaction, embed=embed)
 
         @self.tree.command(name="kick", description="Expulser un membre avec une raison")
         @app_commands.checks.has_permissions(kick_members=True)
@@ -72,14 +87,16 @@ class ModerationCommands:
             reason: Optional[str] = None,
         ) -> None:
             if interaction.guild is None:
-                await interaction.response.send_message(
+                await _respond(
+                    interaction,
                     "Cette commande ne peut être utilisée que sur un serveur.",
                     ephemeral=True,
                 )
                 return
 
             if member == interaction.user:
-                await interaction.response.send_message(
+                await _respond(
+                    interaction,
                     "Tu ne peux pas te kick toi-même.",
                     ephemeral=True,
                 )
@@ -99,14 +116,16 @@ class ModerationCommands:
             embed.add_field(name="Raison", value=reason_text, inline=False)
 
             try:
-                await member.send(
-                    f"Tu as été expulsé de **{interaction.guild.name}**.\nRaison: {reason_text}"
+                await send(
+                    member,
+                    f"Tu as été expulsé de **{interaction.guild.name}**.\nRaison: {reason_text}",
+                    priority=Priority.CRITICAL,
                 )
             except Exception:
                 pass
 
-            await interaction.guild.kick(member, reason=reason_text)
-            await interaction.response.send_message(embed=embed)
+            await _critical(lambda: interaction.guild.kick(member, reason=reason_text), ("kick", interaction.guild.id))
+            await _respond(interaction, embed=embed)
 
         @self.tree.command(
             name="timeout",
@@ -120,14 +139,16 @@ class ModerationCommands:
             reason: Optional[str] = None,
         ) -> None:
             if interaction.guild is None:
-                await interaction.response.send_message(
+                await _respond(
+                    interaction,
                     "Cette commande ne peut être utilisée que sur un serveur.",
                     ephemeral=True,
                 )
                 return
 
             if member == interaction.user:
-                await interaction.response.send_message(
+                await _respond(
+                    interaction,
                     "Tu ne peux pas te mettre en timeout toi-même.",
                     ephemeral=True,
                 )
@@ -150,15 +171,17 @@ class ModerationCommands:
             embed.add_field(name="Raison", value=reason_text, inline=False)
 
             try:
-                await member.send(
+                await send(
+                    member,
                     f"Tu as été mis en timeout sur **{interaction.guild.name}** "
-                    f"pour {minutes} minute(s).\nRaison: {reason_text}"
+                    f"pour {minutes} minute(s).\nRaison: {reason_text}",
+                    priority=Priority.CRITICAL,
                 )
             except Exception:
                 pass
 
-            await member.timeout(until, reason=reason_text)
-            await interaction.response.send_message(embed=embed)
+            await _critical(lambda: member.timeout(until, reason=reason_text), ("member", interaction.guild.id, member.id))
+            await _respond(interaction, embed=embed)
 
     async def sync(self) -> None:
         try:
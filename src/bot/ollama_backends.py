@@ -0,0 +1,154 @@
+"""Pool de serveurs Ollama: routage au moins chargé, sondes de santé et éviction des serveurs en panne."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence
+
+import aiohttp
+
+from .metrics import metrics
+
+logger = logging.getLogger("nyahchan.ollama_backends")
+
+# Intervalle (s) entre deux sondes de santé (0 = pas de sonde)
+OLLAMA_HEALTH_INTERVAL_ENV = "OLLAMA_HEALTH_INTERVAL"
+DEFAULT_HEALTH_INTERVAL = 30.0
+# Échecs consécutifs (erreurs, timeouts, HTTP 5xx) avant d'écarter un serveur
+OLLAMA_MAX_FAILURES_ENV = "OLLAMA_MAX_FAILURES"
+DEFAULT_MAX_FAILURES = 3
+
+
+class Backend:
+    """Un serveur Ollama et son état: requêtes en cours, échecs consécutifs, écarté ou non."""
+
+    __slots__ = ("url", "in_flight", "failures", "healthy")
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.failures = 0
+        self.healthy = True
+
+    def __repr__(self) -> str:
+        return f"Backend({self.url!r}, in_flight={self.in_flight}, healthy={self.healthy})"
+
+
+class BackendPool:
+    """Serveurs listés dans OLLAMA_BASE_URL (séparés par des virgules).
+
+    - `pick` choisit, parmi les serveurs sains, celui qui a le moins de
+      requêtes en cours (à égalité, le premier de la liste). Si tous sont
+      écartés, tous redeviennent candidats plutôt que de refuser la question.
+    - Après `max_failures` échecs consécutifs, un serveur est écarté; une
+      sonde de santé réussie (GET /api/version) ou une requête réussie le réintègre.
+    - Par serveur: requêtes, erreurs et durées dans /api/metrics
+      (`ollama_backend_requests`, `ollama_backend_seconds`), résultats des sondes
+      (`ollama_backend_probes`) et jauge des requêtes en cours.
+    """
+
+    def __init__(self) -> None:
+        self.backends: List[Backend] = []
+        self.max_failures = DEFAULT_MAX_FAILURES
+        self.health_interval = DEFAULT_HEALTH_INTERVAL
+        self._health_task: asyncio.Task | None = None
+        metrics.gauge("ollama_backends", self._gauge)
+
+    def configure(self, urls: Sequence[str], max_failures: int, health_interval: float) -> None:
+        known: Dict[str, Backend] = {b.url: b for b in self.backends}
+        self.backends = [known.get(u.rstrip("/")) or Backend(u) for u in urls]
+        self.max_failures = max(max_failures, 1)
+        self.health_interval = health_interval
+
+    def _gauge(self) -> Dict[str, float]:
+        # -1 = serveur écarté
+        return {b.url: (b.in_flight if b.healthy else -1) for b in self.backends}
+
+    def pick(self, exclude: Sequence[Backend] = ()) -> Backend | None:
+        candidates = [b for b in self.backends if b not in exclude]
+        healthy = [b for b in candidates if b.healthy]
+        pool = healthy or candidates
+        if not pool:
+            return None
+        return min(pool, key=lambda b: b.in_flight)
+
+    @contextmanager
+    def use(self, backend: Backend) -> Iterator[None]:
+        """Compter une requête en cours sur `backend` pendant le bloc."""
+        backend.in_flight += 1
+        try:
+            yield
+        finally:
+            backend.in_flight -= 1
+
+    def success(self, backend: Backend, seconds: float) -> None:
+        metrics.incr("ollama_backend_requests", backend=backend.url, result="ok")
+        metrics.observe("ollama_backend_seconds", seconds, backend=backend.url)
+        backend.failures = 0
+        if not backend.healthy:
+            backend.healthy = True
+            logger.info(f"[ollama] Serveur {backend.url} réintégré")
+
+    def failure(self, backend: Backend, reason: str) -> None:
+        metrics.incr("ollama_backend_requests", backend=backend.url, result="error")
+        self._count_failure(backend, reason)
+
+    def _count_failure(self, backend: Backend, reason: str) -> None:
+        """Échec d'une requête ou d'une sonde: écarter le serveur au-delà de max_failures."""
+        backend.failures += 1
+        if backend.healthy and backend.failures >= self.max_failures:
+            backend.healthy = False
+            logger.warning(f"[ollama] Serveur {backend.url} écarté après {backend.failures} échec(s): {reason}")
+
+    def start(self, session: Callable[[], aiohttp.ClientSession]) -> None:
+        """Lancer les sondes de santé en tâche de fond (si health_interval > 0)."""
+        self.stop()
+        if self.health_interval > 0 and self.backends:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop(session))
+
+    def stop(self) -> None:
+        task, self._health_task = self._health_task, None
+        if task is not None:
+            task.cancel()
+
+    async def _health_loop(self, session: Callable[[], aiohttp.ClientSession]) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self.probe(session(), b) for b in self.backends))
+
+    async def probe(self, session: aiohttp.ClientSession, backend: Backend) -> bool:
+        """GET /api/version sur `backend`; met à jour son état et renvoie True s'il répond."""
+        start = time.perf_counter()
+        try:
+            timeout = aiohttp.ClientTimeout(total=min(self.health_interval, 10.0) or 10.0)
+            async with session.get(f"{backend.url}/api/version", timeout=timeout) as resp:
+                ok = resp.status == 200
+                reason = f"HTTP {resp.status}"
+        except Exception as e:  # noqa: BLE001 - toute erreur réseau compte comme un échec
+            ok, reason = False, repr(e)
+        metrics.incr("ollama_backend_probes", backend=backend.url, result="ok" if ok else "error")
+        if ok:
+            backend.failures = 0
+            if not backend.healthy:
+                backend.healthy = True
+                logger.info(f"[ollama] Serveur {backend.url} de nouveau joignable ({(time.perf_counter() - start) * 1000:.0f}ms)")
+        else:
+            # Compté dans ollama_backend_probes seulement, pas comme une requête en erreur
+            self._count_failure(backend, f"sonde: {reason}")
+        return ok
+
+
+def parse_backends(raw: str | None) -> List[str]:
+    """OLLAMA_BASE_URL -> liste d'URLs (séparées par des virgules ou des espaces), sans doublons."""
+    urls: List[str] = []
+    for part in (raw or "").replace(",", " ").split():
+        url = part.rstrip("/")
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+# Instance partagée (ollama_qna)
+backend_pool = BackendPool()
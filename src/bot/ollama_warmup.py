@@ -0,0 +1,134 @@
+"""Préchargement du modèle Ollama au démarrage et maintien en mémoire par pings périodiques."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List
+
+import aiohttp
+
+from .metrics import metrics
+from .ollama_backends import Backend
+
+logger = logging.getLogger("nyahchan.ollama_warmup")
+
+# 1 = précharger le modèle sur chaque serveur au démarrage
+OLLAMA_WARMUP_ENV = "OLLAMA_WARMUP"
+# Intervalle (s) entre deux pings qui gardent le modèle chargé (0 = aucun ping)
+OLLAMA_KEEPALIVE_PING_ENV = "OLLAMA_KEEPALIVE_PING"
+DEFAULT_KEEPALIVE_PING = 240.0
+
+
+class ModelWarmer:
+    """Charge le modèle sur chaque serveur, puis le garde chargé.
+
+    Au démarrage, pour chaque serveur: vérifie que le modèle existe
+    (GET /api/tags), puis l'appelle sans prompt (POST /api/generate), ce qui
+    le charge sans rien générer; la durée de ce premier chargement est
+    journalisée et exposée (`ollama_cold_load_seconds`). Ensuite, toutes les
+    `ping_interval` secondes, les serveurs inactifs sont rappelés de la même
+    façon pour qu'Ollama ne décharge pas le modèle (OLLAMA_MODEL_KEEP_ALIVE, 5 min
+    par défaut côté Ollama); un serveur injoignable au démarrage est préchargé
+    dès qu'il répond. `ready` indique, par serveur, si le modèle est chargé.
+    """
+
+    def __init__(self) -> None:
+        self.ready: Dict[str, bool] = {}
+        self.cold_load: Dict[str, float] = {}
+        # Serveurs où le modèle n'est pas installé: ni ping ni nouvel essai
+        self.missing: set[str] = set()
+        self._task: asyncio.Task | None = None
+        metrics.gauge("ollama_ready", lambda: {url: float(ok) for url, ok in self.ready.items()})
+
+    @property
+    def all_ready(self) -> bool:
+        return bool(self.ready) and all(self.ready.values())
+
+    def start(
+        self,
+        session: Callable[[], aiohttp.ClientSession],
+        backends: List[Backend],
+        model: str,
+        keep_alive: str | int | None,
+        ping_interval: float,
+    ) -> None:
+        self.stop()
+        self.ready = {b.url: False for b in backends}
+        self.cold_load = {}
+        self.missing = set()
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(session, backends, model, keep_alive, ping_interval)
+        )
+
+    def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+
+    async def _run(self, session, backends: List[Backend], model: str, keep_alive, ping_interval: float) -> None:
+        await asyncio.gather(*(self._warm(session(), b, model, keep_alive) for b in backends))
+        if self.all_ready:
+            logger.info(f"[ollama] Modèle {model} prêt sur {len(backends)} serveur(s)")
+        if ping_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(ping_interval)
+            # Un serveur qui traite déjà une question garde le modèle chargé de lui-même
+            idle = [b for b in backends if b.in_flight == 0 and b.healthy and b.url not in self.missing]
+            # Un serveur injoignable au démarrage est préchargé dès qu'il répond
+            await asyncio.gather(*(
+                self._load(session(), b, model, keep_alive) if self.ready.get(b.url) else self._warm(session(), b, model, keep_alive)
+                for b in idle
+            ))
+
+    async def _warm(self, session: aiohttp.ClientSession, backend: Backend, model: str, keep_alive) -> None:
+        if not await self._has_model(session, backend, model):
+            return
+        start = time.perf_counter()
+        if await self._load(session, backend, model, keep_alive):
+            elapsed = time.perf_counter() - start
+            self.cold_load[backend.url] = elapsed
+            metrics.observe("ollama_cold_load_seconds", elapsed, backend=backend.url)
+            logger.info(f"[ollama] Modèle {model} chargé sur {backend.url} en {elapsed:.1f}s")
+
+    async def _has_model(self, session: aiohttp.ClientSession, backend: Backend, model: str) -> bool:
+        try:
+            async with session.get(f"{backend.url}/api/tags") as resp:
+                if resp.status != 200:
+                    logger.warning(f"[ollama] Liste des modèles indisponible sur {backend.url} (HTTP {resp.status})")
+                    return False
+                data = await resp.json()
+        except Exception as e:
+            logger.warning(f"[ollama] Serveur {backend.url} injoignable au démarrage: {e}")
+            return False
+        names = {m.get("name") for m in data.get("models") or ()} | {m.get("model") for m in data.get("models") or ()}
+        # "llama3" désigne "llama3:latest"
+        if model in names or (":" not in model and f"{model}:latest" in names):
+            return True
+        self.missing.add(backend.url)
+        logger.error(
+            f"[ollama] Modèle {model!r} absent de {backend.url} (disponibles: {', '.join(sorted(n for n in names if n)) or '-'}). "
+            f"Installez-le avec: ollama pull {model}"
+        )
+        return False
+
+    async def _load(self, session: aiohttp.ClientSession, backend: Backend, model: str, keep_alive) -> bool:
+        # Sans prompt, /api/generate charge le modèle (ou prolonge son maintien) sans générer
+        payload: Dict[str, object] = {"model": model}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        try:
+            async with session.post(f"{backend.url}/api/generate", json=payload) as resp:
+                await resp.read()
+                ok = resp.status == 200
+        except Exception as e:
+            logger.warning(f"[ollama] Chargement du modèle sur {backend.url} impossible: {e}")
+            ok = False
+        metrics.incr("ollama_keepalive_pings", backend=backend.url, result="ok" if ok else "error")
+        self.ready[backend.url] = ok
+        return ok
+
+
+# Instance partagée (ollama_qna)
+model_warmer = ModelWarmer()
@@ -0,0 +1,305 @@
+"""Ordonnanceur des appels sortants vers Discord (envois, réactions, rôles).
+
+Toutes les features passent par `outbound` au lieu d'appeler l'API directement.
+Les appels sont classés par priorité et par route (un salon, un membre, les
+rôles d'un serveur...). Une route n'a qu'un appel en cours à la fois: les
+suivants attendent ici, où ils peuvent être triés, fusionnés ou abandonnés,
+plutôt que dans la file interne de discord.py, où ils sont servis dans l'ordre
+d'arrivée.
+
+Les courtes limites de débit restent attendues par discord.py. Au-delà de
+OUTBOUND_MAX_RATELIMIT_WAIT secondes (`max_ratelimit_timeout` du client), il
+lève `discord.RateLimited`: la route est alors mise en pause jusqu'à la fin de
+la limite et l'appel remis en tête de sa file, sans bloquer de worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List
+
+import discord
+
+from .env import env_float, env_int
+from .metrics import metrics
+
+logger = logging.getLogger("nyahchan.outbound")
+
+OUTBOUND_CONCURRENCY_ENV = "OUTBOUND_CONCURRENCY"
+DEFAULT_CONCURRENCY = 8
+OUTBOUND_MAX_QUEUE_ENV = "OUTBOUND_MAX_QUEUE"
+DEFAULT_MAX_QUEUE = 200
+# Attente max (s) laissée à discord.py avant de mettre la route en pause (0 = discord.py attend toujours)
+OUTBOUND_MAX_RATELIMIT_WAIT_ENV = "OUTBOUND_MAX_RATELIMIT_WAIT"
+DEFAULT_MAX_RATELIMIT_WAIT = 30.0
+
+
+class Priority(enum.IntEnum):
+    """Classe de priorité d'un appel (plus petit = plus urgent)."""
+
+    CRITICAL = 0  # modération: exécuté tout de suite, jamais mis en file
+    HIGH = 1  # réponses aux commandes, changements de rôles
+    NORMAL = 2  # embeds de mots-clés, réponses Ollama
+    LOW = 3  # cosmétique: réactions, GIFs
+
+
+class OutboundDropped(Exception):
+    """Appel abandonné parce que la file était saturée."""
+
+
+class _Job:
+    __slots__ = ("factory", "route", "priority", "key", "future", "enqueued")
+
+    def __init__(self, factory, route, priority, key, future) -> None:
+        self.factory: Callable[[], Awaitable[Any]] = factory
+        self.route: Hashable = route
+        self.priority: Priority = priority
+        self.key: Hashable | None = key
+        self.future: asyncio.Future = future
+        self.enqueued = time.monotonic()
+
+
+class OutboundScheduler:
+    """File d'appels sortants par priorité, avec suivi par route, fusion et délestage.
+
+    - Les workers prennent le plus ancien appel de la plus haute priorité dont la
+      route est libre (aucun appel en cours, pas en pause après une limite de débit).
+    - Réserve: les appels LOW occupent au plus la moitié des workers, NORMAL et
+      LOW ensemble tous sauf un. Des routes lentes ou limitées ne retardent donc
+      jamais un appel HIGH faute de worker.
+    - `coalesce`: un appel identique déjà en file (même clé) n'est pas ajouté,
+      l'appelant reçoit le résultat du premier.
+    - Délestage: LOW est refusé dès que la file est à moitié pleine, NORMAL
+      quand elle est pleine. HIGH est toujours accepté et évince au besoin
+      l'appel LOW (puis NORMAL) le plus ancien.
+    """
+
+    def __init__(self) -> None:
+        self.concurrency = DEFAULT_CONCURRENCY
+        self.max_queue = DEFAULT_MAX_QUEUE
+        self.max_ratelimit_wait = DEFAULT_MAX_RATELIMIT_WAIT
+        self._queues: Dict[Priority, Deque[_Job]] = {p: deque() for p in Priority if p is not Priority.CRITICAL}
+        self._by_key: Dict[Hashable, _Job] = {}
+        self._busy: "Counter[Hashable]" = Counter()
+        self._running: "Counter[Priority]" = Counter()  # appels en cours dans les workers, par priorité
+        self._parked: Dict[Hashable, float] = {}  # route -> fin de sa limite de débit (time.monotonic)
+        self._changed: asyncio.Event | None = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        metrics.gauge("outbound_queue_depth", self.depths)
+
+    def configure(self) -> None:
+        """Relire OUTBOUND_* (appelé après le chargement du .env, avant la création du client)."""
+        self.concurrency = env_int(OUTBOUND_CONCURRENCY_ENV, DEFAULT_CONCURRENCY, minimum=1)
+        self.max_queue = env_int(OUTBOUND_MAX_QUEUE_ENV, DEFAULT_MAX_QUEUE, minimum=1)
+        self.max_ratelimit_wait = env_float(OUTBOUND_MAX_RATELIMIT_WAIT_ENV, DEFAULT_MAX_RATELIMIT_WAIT)
+
+    @property
+    def depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def depths(self) -> Dict[str, float]:
+        out: Dict[str, float] = {p.name.lower(): len(q) for p, q in self._queues.items()}
+        out["in_flight"] = sum(self._busy.values())
+        out["parked_routes"] = len(self._parked)
+        return out
+
+    async def call(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        *,
+        route: Hashable,
+        priority: Priority = Priority.NORMAL,
+        coalesce: Hashable | None = None,
+    ) -> Any:
+        """Exécuter `factory()` selon sa priorité; renvoie son résultat ou lève son exception.
+
+        Lève OutboundDropped si l'appel est refusé ou évincé par le délestage.
+        """
+        if priority is Priority.CRITICAL:
+            job = _Job(factory, route, priority, None, None)
+            while True:
+                try:
+                    return await self._execute(job, started=time.monotonic())
+                except discord.RateLimited as e:
+                    # Pas de file pour la modération: attendre la fin de la limite, comme discord.py
+                    metrics.incr("outbound_rate_limited", priority="critical")
+                    await asyncio.sleep(e.retry_after)
+        if coalesce is not None:
+            existing = self._by_key.get(coalesce)
+            if existing is not None:
+                metrics.incr("outbound_coalesced", priority=priority.name.lower())
+                return await asyncio.shield(existing.future)
+        self._ensure_workers()
+        if not self._admit(priority):
+            metrics.incr("outbound_dropped", priority=priority.name.lower())
+            raise OutboundDropped(f"file sortante saturée ({self.depth} appels), {priority.name} refusé")
+        job = _Job(factory, route, priority, coalesce, asyncio.get_running_loop().create_future())
+        self._queues[priority].append(job)
+        if coalesce is not None:
+            self._by_key[coalesce] = job
+        self._changed.set()  # type: ignore[union-attr]
+        return await asyncio.shield(job.future)
+
+    def _admit(self, priority: Priority) -> bool:
+        depth = self.depth
+        if priority is Priority.LOW:
+            return depth < self.max_queue // 2
+        if priority is Priority.NORMAL:
+            return depth < self.max_queue
+        if depth >= self.max_queue:
+            # HIGH: faire de la place en évinçant le travail le moins important
+            for victim_priority in (Priority.LOW, Priority.NORMAL):
+                queue = self._queues[victim_priority]
+                if queue:
+                    victim = queue.popleft()
+                    self._forget_key(victim)
+                    metrics.incr("outbound_dropped", priority=victim_priority.name.lower())
+                    if not victim.future.done():
+                        victim.future.set_exception(OutboundDropped("évincé par un appel prioritaire"))
+                        victim.future.exception()  # l'appelant a pu disparaître entre-temps
+                    break
+        return True
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Nouvelle boucle (tests, redémarrage): repartir d'un état propre
+            self._loop = loop
+            self._changed = asyncio.Event()
+            self._workers = []
+            self._busy.clear()
+            self._running.clear()
+            self._parked.clear()
+            self._by_key.clear()
+            for q in self._queues.values():
+                q.clear()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(loop.create_task(self._worker()))
+
+    def _share(self, priority: Priority) -> int:
+        """Workers que les appels de `priority` et moins urgents peuvent occuper ensemble."""
+        if priority is Priority.LOW:
+            return max(self.concurrency // 2, 1)
+        if priority is Priority.NORMAL:
+            return max(self.concurrency - 1, 1)
+        return self.concurrency
+
+    def _has_room(self, priority: Priority) -> bool:
+        """Un appel de `priority` de plus respecte-t-il la réserve de chaque priorité plus urgente?"""
+        return all(
+            sum(n for p, n in self._running.items() if p >= level) < self._share(level)
+            for level in self._queues
+            if level <= priority
+        )
+
+    def _unpark(self) -> float | None:
+        """Libérer les routes dont la limite est finie; délai avant la prochaine fin (None si aucune)."""
+        now = time.monotonic()
+        for route in [r for r, until in self._parked.items() if until <= now]:
+            del self._parked[route]
+        return min(self._parked.values()) - now if self._parked else None
+
+    def _pick(self) -> _Job | None:
+        self._unpark()
+        for priority, queue in self._queues.items():
+            if not self._has_room(priority):
+                continue
+            for job in queue:
+                if job.route not in self._busy and job.route not in self._parked:
+                    queue.remove(job)
+                    self._running[priority] += 1
+                    return job
+        return None
+
+    def _park(self, job: _Job, retry_after: float) -> None:
+        """Route limitée par Discord: la mettre en pause et remettre l'appel en tête de sa file."""
+        until = time.monotonic() + retry_after
+        self._parked[job.route] = max(self._parked.get(job.route, until), until)
+        self._queues[job.priority].appendleft(job)
+        if job.key is not None:
+            self._by_key.setdefault(job.key, job)
+        metrics.incr("outbound_rate_limited", priority=job.priority.name.lower())
+        logger.info("Route %r limitée par Discord: en pause %.1fs", job.route, retry_after)
+
+    async def _worker(self) -> None:
+        changed = self._changed
+        assert changed is not None
+        while True:
+            job = self._pick()
+            if job is None:
+                changed.clear()
+                # Réveil sur nouvel appel, route libérée ou fin de pause d'une route
+                try:
+                    await asyncio.wait_for(changed.wait(), self._unpark())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._forget_key(job)
+            try:
+                result = await self._execute(job, started=time.monotonic())
+            except discord.RateLimited as e:
+                self._park(job, e.retry_after)
+            except Exception as e:  # noqa: BLE001 - transmise à l'appelant
+                if not job.future.done():
+                    job.future.set_exception(e)
+                    job.future.exception()
+            except asyncio.CancelledError:
+                # Annulation du worker pendant l'appel: ne pas laisser l'appelant attendre indéfiniment
+                job.future.cancel()
+                raise
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self._running[job.priority] -= 1
+                if self._running[job.priority] <= 0:
+                    del self._running[job.priority]
+                changed.set()
+
+    async def _execute(self, job: _Job, started: float) -> Any:
+        label = job.priority.name.lower()
+        metrics.observe("outbound_wait_seconds", started - job.enqueued, priority=label)
+        self._busy[job.route] += 1
+        try:
+            return await job.factory()
+        finally:
+            self._busy[job.route] -= 1
+            if self._busy[job.route] <= 0:
+                del self._busy[job.route]
+            metrics.incr("outbound_calls", priority=label)
+            metrics.observe("outbound_call_seconds", time.monotonic() - started, priority=label)
+            if self._changed is not None:
+                self._changed.set()
+
+    def _forget_key(self, job: _Job) -> None:
+        if job.key is not None and self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+
+# Instance partagée par toutes les features
+outbound = OutboundScheduler()
+
+
+async def send(
+    channel: discord.abc.Messageable,
+    *args: Any,
+    priority: Priority = Priority.NORMAL,
+    coalesce: Hashable | None = None,
+    **kwargs: Any,
+) -> Any:
+    """`channel.send(...)` via l'ordonnanceur (route = le salon)."""
+    route = ("channel", getattr(channel, "id", id(channel)))
+    return await outbound.call(lambda: channel.send(*args, **kwargs), route=route, priority=priority, coalesce=coalesce)
+
+
+async def react(message: discord.Message, emoji: str, priority: Priority = Priority.LOW) -> Any:
+    """`message.add_reaction(emoji)`, fusionné si la même réaction est déjà en file."""
+    route = ("reactions", message.channel.id)
+    return await outbound.call(
+        lambda: message.add_reaction(emoji), route=route, priority=priority, coalesce=("react", message.id, emoji)
+    )
@@ -0,0 +1,272 @@
+"""Résolution des rôles par nom, partagée par les features qui attribuent des rôles."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+import discord
+
+from .env import env_float
+from .members import member_cache
+from .metrics import metrics
+from .outbound import Priority, outbound
+from .singleflight import SingleFlight
+from .ttl import TTLCache
+
+logger = logging.getLogger("nyahchan.roles")
+
+# Fenêtre (ms) pendant laquelle les changements de rôles d'un membre sont regroupés
+ROLE_BATCH_WINDOW_ENV = "ROLE_BATCH_WINDOW_MS"
+DEFAULT_ROLE_BATCH_WINDOW_MS = 250
+# Durée max (s) pendant laquelle les rôles renvoyés par notre dernière requête
+# priment sur le cache de la gateway, le temps qu'elle confirme la modification
+_RECENT_BATCH_TTL = 5.0
+
+
+class RoleCache:
+    """Index `nom -> rôle` par serveur, construit à la demande depuis `guild.roles`.
+
+    Tenu à jour par les événements gateway (voir events/roles.py). Quand plusieurs
+    rôles portent le même nom, le premier de `guild.roles` (le plus bas) gagne,
+    comme l'ancien parcours linéaire; un événement qui touche un nom en doublon
+    fait simplement reconstruire l'index du serveur au prochain accès. L'objet
+    gardé pour un rôle est remplacé par celui de la gateway dès qu'elle l'envoie:
+    c'est lui que discord.py met à jour (position, permissions...).
+    """
+
+    def __init__(self) -> None:
+        self._by_guild: Dict[int, Dict[str, discord.Role]] = {}
+
+    def _index(self, guild: discord.Guild) -> Dict[str, discord.Role]:
+        index = self._by_guild.get(guild.id)
+        if index is None:
+            index = {}
+            for role in guild.roles:
+                index.setdefault(role.name, role)
+            self._by_guild[guild.id] = index
+        return index
+
+    def get(self, guild: discord.Guild, name: str) -> discord.Role | None:
+        return self._index(guild).get(name)
+
+    def add(self, role: discord.Role) -> None:
+        index = self._by_guild.get(role.guild.id)
+        if index is None:
+            return
+        known = index.get(role.name)
+        if known is None or known.id == role.id:
+            index[role.name] = role
+
+    def remove(self, role: discord.Role) -> None:
+        index = self._by_guild.get(role.guild.id)
+        if index is not None and index.get(role.name) is role:
+            # Un autre rôle du même nom peut exister: on reconstruit au prochain accès
+            self.invalidate(role.guild.id)
+
+    def update(self, before: discord.Role, after: discord.Role) -> None:
+        if before.name != after.name:
+            self.invalidate(after.guild.id)
+        else:
+            self.add(after)
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        """Oublier l'index d'un serveur (ou de tous)."""
+        if guild_id is None:
+            self._by_guild.clear()
+        else:
+            self._by_guild.pop(guild_id, None)
+
+
+# Instance partagée, alimentée par les événements de rôles
+role_cache = RoleCache()
+
+
+# Créations de rôles en cours, par (serveur, nom)
+_creations = SingleFlight()
+
+
+async def ensure_role(guild: discord.Guild, role_name: str, reason: str) -> discord.Role | None:
+    """Rôle `role_name` du serveur, créé (et placé sous le top rôle du bot) s'il n'existe pas.
+
+    Les appels concurrents pour un même rôle manquant partagent une seule
+    création (et un seul repositionnement) au lieu de créer des doublons.
+    """
+    role = role_cache.get(guild, role_name)
+    if role is not None:
+        return role
+    return await _creations.do((guild.id, role_name), lambda: _create_role(guild, role_name, reason))
+
+
+async def _create_role(guild: discord.Guild, role_name: str, reason: str) -> discord.Role | None:
+    # Un appel précédent a pu terminer la création entre la lecture du cache et ici
+    role = role_cache.get(guild, role_name)
+    if role is not None:
+        return role
+    try:
+        role = await outbound.call(
+            lambda: guild.create_role(name=role_name, mentionable=True, reason=reason),
+            route=("roles", guild.id),
+            priority=Priority.HIGH,
+        )
+    except Exception as e:
+        logger.warning(f"Impossible de créer le rôle '{role_name}': {e}")
+        return None
+    # L'objet renvoyé par l'API n'est jamais mis à jour: préférer celui du cache de discord.py
+    role = guild.get_role(role.id) or role
+    role_cache.add(role)
+    # Tentative reposition sous le top rôle du bot
+    me = guild.me
+    if me and me.top_role and me.top_role.position > 1:
+        target_pos = me.top_role.position - 1
+        try:
+            await outbound.call(
+                lambda: role.edit(position=target_pos, reason="Auto-reposition sous le top rôle du bot"),
+                route=("roles", guild.id),
+                priority=Priority.HIGH,
+            )
+        except Exception:
+            pass
+    # Le rôle a pu arriver par la gateway (et être repositionné) pendant ces appels
+    role = guild.get_role(role.id) or role
+    role_cache.add(role)
+    return role
+
+
+class _PendingRoles:
+    __slots__ = ("member", "adds", "removes", "reasons", "future")
+
+    def __init__(self, member: discord.Member, future: asyncio.Future) -> None:
+        self.member = member
+        self.adds: Dict[int, discord.Role] = {}
+        self.removes: Dict[int, discord.Role] = {}
+        self.reasons: List[str] = []
+        self.future = future
+
+
+class RoleMutationBatcher:
+    """Regroupe les ajouts/retraits de rôles d'un membre en un seul `member.edit(roles=...)`.
+
+    Le premier changement ouvre une fenêtre de ROLE_BATCH_WINDOW_MS; tout ce qui
+    arrive pour le même membre pendant ce temps (autres triggers, autres messages)
+    est fusionné, le dernier changement d'un rôle l'emportant. À la fin de la
+    fenêtre, les rôles du membre sont relus (le Member du message peut dater de
+    plusieurs secondes) et le lot n'est envoyé que s'il change quelque chose:
+    un seul rôle via `add_roles`/`remove_roles`, qui ne touchent pas aux autres
+    rôles, plusieurs en un seul `member.edit(roles=...)`.
+
+    Les rôles relus sont ceux du cache de la gateway, sauf si notre requête
+    précédente n'y est pas encore visible: la liste qu'elle a produite sert alors
+    de base, jusqu'au premier `on_member_update` du membre (`confirm`) ou au plus
+    quelques secondes. Un changement fait entre-temps par un modérateur ou une
+    autre feature arrive après cet événement et n'est donc pas écrasé.
+
+    Les lots d'un même membre sont envoyés l'un après l'autre: un lot ouvert
+    pendant l'envoi du précédent attend sa fin pour partir de la liste qu'il a
+    produite, au lieu de la relire avant qu'elle existe et d'annuler ses ajouts.
+    """
+
+    def __init__(self) -> None:
+        self.window = DEFAULT_ROLE_BATCH_WINDOW_MS / 1000
+        self._pending: Dict[Tuple[int, int], _PendingRoles] = {}
+        # Dernier lot de chaque membre en cours d'envoi (ou en attente du précédent)
+        self._flushing: Dict[Tuple[int, int], asyncio.Task] = {}
+        # Rôles produits par notre dernière requête, pas encore confirmés par la gateway
+        self._recent: TTLCache[Tuple[int, int], Dict[int, discord.Role]] = TTLCache(maxsize=10_000)
+
+    def configure(self) -> None:
+        """Relire ROLE_BATCH_WINDOW_MS (appelé au chargement des configs, après le .env)."""
+        self.window = env_float(ROLE_BATCH_WINDOW_ENV, DEFAULT_ROLE_BATCH_WINDOW_MS) / 1000
+
+    async def apply(
+        self,
+        member: discord.Member,
+        add: Iterable[discord.Role] = (),
+        remove: Iterable[discord.Role] = (),
+        reason: str | None = None,
+    ) -> bool:
+        """Mettre en file des changements de rôles et attendre l'envoi du lot.
+
+        Renvoie True si le lot a été appliqué (une requête envoyée), False s'il
+        n'y avait rien à changer ou si la requête a échoué.
+        """
+        key = (member.guild.id, member.id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = _PendingRoles(member, asyncio.get_running_loop().create_future())
+            self._pending[key] = pending
+            asyncio.ensure_future(self._flush_later(key))
+        pending.member = member
+        for role in add:
+            pending.removes.pop(role.id, None)
+            pending.adds[role.id] = role
+        for role in remove:
+            pending.adds.pop(role.id, None)
+            pending.removes[role.id] = role
+        if reason and reason not in pending.reasons:
+            pending.reasons.append(reason)
+        return await asyncio.shield(pending.future)
+
+    async def _flush_later(self, key: Tuple[int, int]) -> None:
+        await asyncio.sleep(self.window)
+        pending = self._pending.pop(key)
+        # Prendre la suite du lot précédent avant d'attendre: un troisième lot attendra celui-ci
+        previous = self._flushing.get(key)
+        task = asyncio.current_task()
+        self._flushing[key] = task  # type: ignore[assignment]
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            applied = await self._flush(key, pending)
+        except Exception as e:
+            logger.error(f"Échec mise à jour des rôles de {pending.member.display_name}: {e}")
+            applied = False
+        finally:
+            if self._flushing.get(key) is task:
+                del self._flushing[key]
+        pending.future.set_result(applied)
+
+    def confirm(self, member: discord.Member) -> None:
+        """La gateway a envoyé une mise à jour du membre: son cache fait de nouveau foi."""
+        self._recent.pop((member.guild.id, member.id))
+
+    def _current_roles(self, key: Tuple[int, int], member: discord.Member) -> Dict[int, discord.Role]:
+        recent = self._recent.get(key)
+        if recent is not None:
+            return dict(recent)
+        fresh = member.guild.get_member(member.id) or member
+        return {r.id: r for r in fresh.roles if not r.is_default()}
+
+    async def _flush(self, key: Tuple[int, int], pending: _PendingRoles) -> bool:
+        member = pending.member
+        current = self._current_roles(key, member)
+        target = dict(current)
+        for role_id in pending.removes:
+            target.pop(role_id, None)
+        target.update(pending.adds)
+        added = [r for rid, r in target.items() if rid not in current]
+        removed = [r for rid, r in current.items() if rid not in target]
+        if not added and not removed:
+            return False
+        reason = "; ".join(pending.reasons)[:512] or None
+        if len(added) + len(removed) == 1:
+            # Un seul rôle: requête ciblée, la liste des autres rôles n'est pas réécrite
+            if added:
+                call = lambda: member.add_roles(*added, reason=reason)  # noqa: E731
+            else:
+                call = lambda: member.remove_roles(*removed, reason=reason)  # noqa: E731
+        else:
+            roles = list(target.values())
+            call = lambda: member.edit(roles=roles, reason=reason)  # noqa: E731
+        updated = await outbound.call(call, route=("member", member.guild.id, member.id), priority=Priority.HIGH)
+        if isinstance(updated, discord.Member):
+            target = {r.id: r for r in updated.roles if not r.is_default()}
+            member_cache.put(updated)
+        self._recent.set(key, target, _RECENT_BATCH_TTL)
+        metrics.incr("role_batch_edits")
+        metrics.incr("role_batch_changes", len(added) + len(removed))
+        return True
+
+
+# Instance partagée: un lot par membre, tous messages et features confondus
+role_batcher = RoleMutationBatcher()
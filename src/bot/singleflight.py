@@ -0,0 +1,48 @@
+"""Dédoublonnage d'opérations asynchrones concurrentes (« single-flight »)."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Un seul appel en cours par clé: les appelants concurrents attendent le même résultat.
+
+    L'opération tourne dans sa propre tâche: si un appelant est annulé (timeout
+    du dispatch par exemple), les autres continuent d'attendre et l'opération
+    n'est pas interrompue à mi-chemin. La clé est libérée dès la fin de
+    l'opération; le résultat n'est pas mis en cache.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Vrai si une opération est en cours pour `key` (l'appelant suivant la rejoindra)."""
+        return key in self._inflight
+
+    def cancel(self, key: Hashable) -> bool:
+        """Annuler l'opération en cours pour `key` (tous ses appelants reçoivent CancelledError)."""
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Éviter "Task exception was never retrieved" si tous les appelants ont été annulés
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,83 @@
+"""Cache clé -> valeur à durée de vie limitée et taille bornée (LRU)."""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """Dictionnaire borné où chaque entrée expire après son propre TTL.
+
+    Les entrées sont gardées dans l'ordre de dernière écriture: la plus ancienne
+    est en tête. L'expiration est paresseuse (une entrée expirée est supprimée
+    quand on la lit) et `set` purge au passage quelques entrées expirées en tête,
+    ce qui garde un coût constant par opération. Au-delà de `maxsize` entrées,
+    la plus ancienne est évincée même si elle n'a pas expiré.
+
+    Pas de verrou: prévu pour être utilisé depuis la boucle asyncio uniquement.
+    """
+
+    __slots__ = ("_data", "maxsize", "_clock")
+
+    # Nombre max d'entrées expirées retirées en tête à chaque écriture
+    _PURGE_STEP = 8
+
+    def __init__(self, maxsize: int = 10_000, clock: Callable[[], float] = time.monotonic) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize doit être > 0")
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self.maxsize = maxsize
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING  # type: ignore[arg-type]
+
+    def get(self, key: K, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires <= self._clock():
+            del self._data[key]
+            return default
+        return value
+
+    def remaining(self, key: K) -> float:
+        """Secondes avant expiration de `key` (0 si absente ou expirée)."""
+        item = self._data.get(key)
+        if item is None:
+            return 0.0
+        left = item[0] - self._clock()
+        if left <= 0:
+            del self._data[key]
+            return 0.0
+        return left
+
+    def set(self, key: K, value: V, ttl: float) -> None:
+        now = self._clock()
+        data = self._data
+        data[key] = (now + ttl, value)
+        data.move_to_end(key)
+        for _ in range(self._PURGE_STEP):
+            oldest = next(iter(data))
+            if oldest == key or data[oldest][0] > now:
+                break
+            del data[oldest]
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def pop(self, key: K, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List
 import logging
 
 from fastapi import FastAPI, Request
@@ -21,6 +21,12 @@ from .config.grant_commands_store import (
     load_grant_commands,
     save_grant_commands,
 )
+from .config.faq_store import (
+    load_faq,
+    save_faq,
+)
+from .matching import MATCH_MODES, MATCH_REGEX, UnsafePatternError, check_pattern
+from .metrics import metrics
 
 
 logger = logging.getLogger("nyahchan.web")
@@ -44,6 +50,61 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 
+def _check_triggers(items: list, kind: str, patterns_of: Callable[[dict], List[str]]) -> str | None:
+    """Vérifier les champs optionnels "match" et "cooldown" et les regex de chaque entrée; renvoie un message d'erreur ou None.
+
+    Les regex dangereuses (backtracking catastrophique) sont refusées ici, à la sauvegarde.
+    """
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        mode = item.get("match")
+        if mode is not None and mode not in MATCH_MODES:
+            return f"{kind} #{idx + 1}: mode de correspondance inconnu {mode!r} (attendu: {', '.join(MATCH_MODES)})"
+        cooldown = item.get("cooldown")
+        if cooldown is not None and not _valid_cooldown(cooldown):
+            return f"{kind} #{idx + 1}: cooldown invalide {cooldown!r} (nombre de secondes ou objet trigger/channel/user)"
+        if mode == MATCH_REGEX:
+            for pattern in patterns_of(item):
+                try:
+                    check_pattern(pattern)
+                except UnsafePatternError as e:
+                    return f"{kind} #{idx + 1}: regex {pattern!r} refusée: {e}"
+    return None
+
+
+def _check_faq(entries: list) -> str | None:
+    """Chaque entrée de la FAQ doit avoir au moins une question et une réponse non vide."""
+    for idx, entry in enumerate(entries):
+        questions = entry.get("questions") if isinstance(entry, dict) else None
+        if not isinstance(questions, list) or not any(isinstance(q, str) and q.strip() for q in questions):
+            return f"Entrée #{idx + 1}: au moins une question est requise"
+        answer = entry.get("answer")
+        if not isinstance(answer, str) or not answer.strip():
+            return f"Entrée #{idx + 1}: la réponse est vide"
+    return None
+
+
+def _valid_cooldown(raw: Any) -> bool:
+    values = raw.values() if isinstance(raw, dict) else [raw]
+    if isinstance(raw, dict) and not set(raw) <= {"trigger", "channel", "user"}:
+        return False
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or v < 0:
+            return False
+    return True
+
+
+def _keyword_patterns(item: dict) -> List[str]:
+    return [str(t).strip() for t in item.get("triggers", []) or [] if str(t).strip()]
+
+
+def _role_patterns(item: dict) -> List[str]:
+    return [str(item[k]) for k in ("trigger", "remove_trigger") if item.get(k)]
+
+
 # ---------- UI PAGES ----------
 
 
@@ -83,6 +144,16 @@ async def ui_grant(request: Request) -> Any:
     )
 
 
+@app.get("/ui/faq", response_class=HTMLResponse)
+async def ui_faq(request: Request) -> Any:
+    logger.debug("Rendering /ui/faq")
+    data = load_faq()
+    return templates.TemplateResponse(
+        "faq.html",
+        {"request": request, "entries": data.get("entries", [])},
+    )
+
+
 # ---------- API: KEYWORD RESPONSES ----------
 
 
@@ -99,6 +170,10 @@ async def api_save_keywords(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(embeds, list):
         logger.warning("Invalid payload on /api/keywords: 'embeds' n'est pas une liste")
         return {"ok": False, "error": "'embeds' doit être une liste"}
+    error = _check_triggers(embeds, "Embed", _keyword_patterns)
+    if error:
+        logger.warning("Invalid payload on /api/keywords: %s", error)
+        return {"ok": False, "error": error}
     logger.info("Saving keyword responses (%d embeds)", len(embeds))
     save_keyword_responses({"embeds": embeds})
     return {"ok": True}
@@ -119,6 +194,10 @@ async def api_save_roles(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(triggers, list):
         logger.warning("Invalid payload on /api/roles: 'triggers' n'est pas une liste")
         return {"ok": False, "error": "'triggers' doit être une liste"}
+    error = _check_triggers(triggers, "Trigger", _role_patterns)
+    if error:
+        logger.warning("Invalid payload on /api/roles: %s", error)
+        return {"ok": False, "error": error}
     logger.info("Saving role triggers (%d triggers)", len(triggers))
     save_role_triggers({"triggers": triggers})
     return {"ok": True}
@@ -144,6 +223,39 @@ async def api_save_grant(payload: Dict[str, Any]) -> Dict[str, Any]:
     return {"ok": True}
 
 
+# ---------- API: FAQ ----------
+
+
+@app.get("/api/faq", response_class=JSONResponse)
+async def api_get_faq() -> Dict[str, Any]:
+    logger.debug("GET /api/faq")
+    return load_faq()
+
+
+@app.post("/api/faq", response_class=JSONResponse)
+async def api_save_faq(payload: Dict[str, Any]) -> Dict[str, Any]:
+    entries = payload.get("entries", [])
+    if not isinstance(entries, list):
+        logger.warning("Invalid payload on /api/faq: 'entries' n'est pas une liste")
+        return {"ok": False, "error": "'entries' doit être une liste"}
+    error = _check_faq(entries)
+    if error:
+        logger.warning("Invalid payload on /api/faq: %s", error)
+        return {"ok": False, "error": error}
+    logger.info("Saving FAQ (%d entries)", len(entries))
+    save_faq({"entries": entries})
+    return {"ok": True}
+
+
+# ---------- API: METRICS ----------
+
+
+@app.get("/api/metrics", response_class=JSONResponse)
+async def api_get_metrics() -> Dict[str, Any]:
+    """Compteurs du bot (ex: envois supprimés par les cooldowns), depuis le démarrage."""
+    return {"ok": True, "metrics": metrics.snapshot()}
+
+
 # ---------- API: RELOAD (BOT CONFIG) ----------
 
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Layout src: comme run_bot.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
@@ -0,0 +1,35 @@
+from bot.env import env_flag, env_float, env_int, parse_float
+
+
+def test_env_float_defaults_and_bounds(monkeypatch):
+    monkeypatch.delenv("NYAH_TEST", raising=False)
+    assert env_float("NYAH_TEST", 1.5) == 1.5
+    monkeypatch.setenv("NYAH_TEST", "  ")
+    assert env_float("NYAH_TEST", 1.5) == 1.5
+    monkeypatch.setenv("NYAH_TEST", "abc")
+    assert env_float("NYAH_TEST", 1.5) == 1.5
+    monkeypatch.setenv("NYAH_TEST", "-3")
+    assert env_float("NYAH_TEST", 1.5) == 0.0
+    assert env_float("NYAH_TEST", 1.5, minimum=None) == -3.0
+
+
+def test_env_int(monkeypatch):
+    monkeypatch.setenv("NYAH_TEST", "3.9")
+    assert env_int("NYAH_TEST", 1) == 3
+    monkeypatch.setenv("NYAH_TEST", "0")
+    assert env_int("NYAH_TEST", 5, minimum=1) == 1
+
+
+def test_env_flag(monkeypatch):
+    monkeypatch.setenv("NYAH_TEST", "True")
+    assert env_flag("NYAH_TEST", False) is True
+    monkeypatch.setenv("NYAH_TEST", "0")
+    assert env_flag("NYAH_TEST", True) is False
+    monkeypatch.setenv("NYAH_TEST", "peut-être")
+    assert env_flag("NYAH_TEST", True) is True
+
+
+def test_parse_float_accepts_json_values():
+    assert parse_float(12, 0.0, "cooldown") == 12.0
+    assert parse_float(None, 4.0, "cooldown") == 4.0
+    assert parse_float([1], 4.0, "cooldown") == 4.0
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import discord
+import pytest
+
+from bot.outbound import OutboundDropped, OutboundScheduler, Priority
+
+
+def _scheduler(concurrency=1, max_queue=200):
+    sched = OutboundScheduler()
+    sched.concurrency = concurrency
+    sched.max_queue = max_queue
+    return sched
+
+
+def _recorder(log, name, delay=0.0):
+    async def call():
+        await asyncio.sleep(delay)
+        log.append(name)
+        return name
+
+    return call
+
+
+def test_priority_order():
+    async def run():
+        sched = _scheduler(concurrency=1)
+        log = []
+        # Le premier appel occupe l'unique worker; les suivants sont triés par priorité
+        first = asyncio.ensure_future(sched.call(_recorder(log, "busy", 0.05), route="a", priority=Priority.HIGH))
+        await asyncio.sleep(0.01)
+        calls = [
+            sched.call(_recorder(log, "low"), route="b", priority=Priority.LOW),
+            sched.call(_recorder(log, "normal"), route="c", priority=Priority.NORMAL),
+            sched.call(_recorder(log, "high"), route="d", priority=Priority.HIGH),
+        ]
+        await asyncio.gather(first, *calls)
+        return log
+
+    assert asyncio.run(run()) == ["busy", "high", "normal", "low"]
+
+
+def test_coalesced_calls_share_one_execution():
+    async def run():
+        sched = _scheduler(concurrency=1)
+        log = []
+        blocker = asyncio.ensure_future(sched.call(_recorder(log, "busy", 0.05), route="a"))
+        await asyncio.sleep(0.01)
+        results = await asyncio.gather(
+            *(sched.call(_recorder(log, "edit"), route="a", coalesce=("edit", 1)) for _ in range(3))
+        )
+        await blocker
+        return log, results
+
+    log, results = asyncio.run(run())
+    assert log == ["busy", "edit"]
+    assert results == ["edit", "edit", "edit"]
+
+
+def test_shedding_drops_low_then_evicts_for_high():
+    async def run():
+        sched = _scheduler(concurrency=1, max_queue=4)
+        log = []
+        blocker = asyncio.ensure_future(sched.call(_recorder(log, "busy", 0.05), route="a", priority=Priority.HIGH))
+        await asyncio.sleep(0.01)
+        queued = [
+            asyncio.ensure_future(sched.call(_recorder(log, f"low{i}"), route="a", priority=Priority.LOW))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        # File à moitié pleine: une réaction de plus est refusée
+        with pytest.raises(OutboundDropped):
+            await sched.call(_recorder(log, "low2"), route="a", priority=Priority.LOW)
+        queued += [
+            asyncio.ensure_future(sched.call(_recorder(log, f"normal{i}"), route="a", priority=Priority.NORMAL))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        # File pleine: HIGH est accepté en évinçant le LOW le plus ancien
+        high = asyncio.ensure_future(sched.call(_recorder(log, "high"), route="a", priority=Priority.HIGH))
+        results = await asyncio.gather(blocker, high, *queued, return_exceptions=True)
+        return log, results
+
+    log, results = asyncio.run(run())
+    assert isinstance(results[2], OutboundDropped)
+    assert log == ["busy", "high", "normal0", "normal1", "low1"]
+
+
+def test_rate_limited_route_is_parked_without_holding_a_worker():
+    async def run():
+        sched = _scheduler(concurrency=1)
+        log = []
+        attempts = []
+
+        async def limited():
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise discord.RateLimited(0.2)
+            log.append("limited")
+            return "ok"
+
+        start = time.monotonic()
+        parked = asyncio.ensure_future(sched.call(limited, route="a", priority=Priority.HIGH))
+        await asyncio.sleep(0.01)
+        assert sched.depths()["parked_routes"] == 1
+        # L'unique worker reste disponible pour les autres routes pendant la pause
+        other = await sched.call(_recorder(log, "other"), route="b", priority=Priority.LOW)
+        assert other == "other" and time.monotonic() - start < 0.15
+        # Un appel suivant sur la route en pause attend la fin de la limite, après le premier
+        follow = asyncio.ensure_future(sched.call(_recorder(log, "follow"), route="a", priority=Priority.HIGH))
+        result = await parked
+        await follow
+        return log, attempts, start, result
+
+    log, attempts, start, result = asyncio.run(run())
+    assert result == "ok"
+    assert attempts[1] - start >= 0.2
+    assert log == ["other", "limited", "follow"]
+
+
+def test_high_keeps_a_worker_when_lower_routes_are_slow():
+    async def run():
+        sched = _scheduler(concurrency=4)
+        log = []
+        slow = [
+            asyncio.ensure_future(sched.call(_recorder(log, f"low{i}", 0.3), route=("r", i), priority=Priority.LOW))
+            for i in range(4)
+        ] + [
+            asyncio.ensure_future(sched.call(_recorder(log, f"normal{i}", 0.3), route=("n", i), priority=Priority.NORMAL))
+            for i in range(4)
+        ]
+        await asyncio.sleep(0.01)
+        start = time.monotonic()
+        await sched.call(_recorder(log, "high"), route="h", priority=Priority.HIGH)
+        waited = time.monotonic() - start
+        await asyncio.gather(*slow)
+        return waited
+
+    assert asyncio.run(run()) < 0.1
@@ -0,0 +1,65 @@
+import pytest
+
+from bot.matching.patterns import UnsafePatternError, check_pattern, compile_alternation, find_groups
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        r"(a+)+$",
+        r"(a|aa)+",
+        r"(a|a?)+$",
+        r"(a?)+",
+        r"(?:a|\b)+",
+        r"(\w|\d)+x",
+        r"([a-z]|e)+!",
+        r"(.|a)*b",
+        r"(?:\s|\n)+x",
+        r"(a|A)+",
+        r"(a|a)+",
+        r"(a)\1",
+    ],
+)
+def test_rejects_ambiguous_repeats(pattern):
+    with pytest.raises(UnsafePatternError):
+        check_pattern(pattern)
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        r"\bnyah+\b",
+        r"(foo|bar)+",
+        r"(?:lol|mdr)+!*",
+        r"(ha)+",
+        r"[a-z0-9_]+",
+        r"[\w.-]+@\w+",
+        r"^!\w+\s+\d+$",
+        r"(x|[^x])+y",
+        r"[\w\d]+",
+        r"[a-zA-Z]+",
+        r"[A-Za-z0-9]+",
+        r"bonjour|salut",
+    ],
+)
+def test_accepts_safe_patterns(pattern):
+    check_pattern(pattern)
+
+
+@pytest.mark.parametrize("pattern", [r"a?", r"x*", r"girl|", r"(?:egirl)?", r"\b", r"^", r"(?:)"])
+def test_rejects_patterns_matching_empty_text(pattern):
+    with pytest.raises(UnsafePatternError, match="vide"):
+        check_pattern(pattern)
+
+
+@pytest.mark.parametrize(
+    "patterns, text, expected",
+    [
+        (["girl", "egirl"], "egirl", [0, 1]),
+        (["hello", "hello world"], "Hello world", [0, 1]),
+        (["a+b", "zz"], "xx", []),
+        (["chat", "chien"], "un chien", [1]),
+    ],
+)
+def test_find_groups_reports_overlapping_hits(patterns, text, expected):
+    assert find_groups(compile_alternation(patterns), text, 0.5) == expected
@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot.roles import RoleMutationBatcher
+
+
+class FakeRole:
+    def __init__(self, role_id):
+        self.id = role_id
+
+    def is_default(self):
+        return False
+
+
+class FakeMember:
+    """Membre dont les requêtes de rôles sont lentes (comme sous limitation de débit)."""
+
+    def __init__(self, delay):
+        self.id = 42
+        self.display_name = "membre"
+        self.roles = []
+        self.delay = delay
+        self.requests = 0
+        # Cache gateway jamais mis à jour: seul le suivi du batcher connaît nos changements
+        self.guild = SimpleNamespace(id=1, get_member=lambda _id: None)
+
+    async def edit(self, roles, reason=None):
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        self.roles = list(roles)
+
+    async def add_roles(self, *roles, reason=None):
+        await self.edit([*self.roles, *roles], reason)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.edit([r for r in self.roles if r not in roles], reason)
+
+
+def _ids(member):
+    return sorted(r.id for r in member.roles)
+
+
+def test_overlapping_batches_keep_earlier_roles():
+    async def run():
+        batcher = RoleMutationBatcher()
+        batcher.window = 0.01
+        member = FakeMember(delay=0.1)
+        r1, r2, r3, r4 = (FakeRole(i) for i in range(1, 5))
+        first = asyncio.ensure_future(batcher.apply(member, add=[r1, r2]))
+        # Second lot ouvert pendant l'envoi du premier
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(batcher.apply(member, add=[r3, r4]))
+        assert await first and await second
+        return member
+
+    member = asyncio.run(run())
+    assert _ids(member) == [1, 2, 3, 4]
+    assert member.requests == 2
+
+
+def test_three_overlapping_batches_run_in_order():
+    async def run():
+        batcher = RoleMutationBatcher()
+        batcher.window = 0.01
+        member = FakeMember(delay=0.1)
+        r1, r2, r3, r4, r5, r6 = (FakeRole(i) for i in range(1, 7))
+        calls = [asyncio.ensure_future(batcher.apply(member, add=[r1, r2]))]
+        await asyncio.sleep(0.03)
+        calls.append(asyncio.ensure_future(batcher.apply(member, add=[r3, r4], remove=[r1])))
+        await asyncio.sleep(0.03)
+        calls.append(asyncio.ensure_future(batcher.apply(member, add=[r5, r6])))
+        assert all(await asyncio.gather(*calls))
+        return member
+
+    assert _ids(asyncio.run(run())) == [2, 3, 4, 5, 6]
+
+
+def test_changes_within_window_are_merged():
+    async def run():
+        batcher = RoleMutationBatcher()
+        batcher.window = 0.02
+        member = FakeMember(delay=0)
+        r1, r2 = FakeRole(1), FakeRole(2)
+        results = await asyncio.gather(
+            batcher.apply(member, add=[r1]),
+            batcher.apply(member, add=[r2]),
+            batcher.apply(member, remove=[r1]),
+        )
+        return member, results
+
+    member, results = asyncio.run(run())
+    assert results == [True, True, True]
+    assert _ids(member) == [2]
+    assert member.requests == 1
+
+
+def test_no_request_when_nothing_changes():
+    async def run():
+        batcher = RoleMutationBatcher()
+        batcher.window = 0.01
+        member = FakeMember(delay=0)
+        member.roles = [FakeRole(1)]
+        return member, await batcher.apply(member, add=[FakeRole(1)])
+
+    member, applied = asyncio.run(run())
+    assert applied is False
+    assert member.requests == 0